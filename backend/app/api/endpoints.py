@@ -3,8 +3,7 @@ from ..core.schemas import DocumentBase, FeatureFileResponse, StepDefinitionRequ
 from ..services.document_parser import DocumentParser
 from ..services.gherkin_generator import GherkinGenerator
 from ..services.step_definition_generator import StepDefinitionGenerator
-import docx
-import io
+from ..services.text_extractor import extract_text
 
 router = APIRouter()
 document_parser = DocumentParser()
@@ -50,9 +49,4 @@ async def generate_steps(request: StepDefinitionRequest):
 async def _read_file_content(file: UploadFile) -> str:
     """Read content from uploaded file."""
     content_bytes = await file.read()
-    
-    if file.filename.endswith('.docx'):
-        doc = docx.Document(io.BytesIO(content_bytes))
-        return "\n".join(paragraph.text for paragraph in doc.paragraphs)
-    else:
-        return content_bytes.decode()
\ No newline at end of file
+    return extract_text(content_bytes, file.filename)
\ No newline at end of file
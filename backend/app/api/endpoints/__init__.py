@@ -1,8 +1,16 @@
 from fastapi import APIRouter
-from . import conversion
+from . import conversion, debug, health, jobs, steps
 
 router = APIRouter()
 # Include the legacy endpoint directly at /api level
 router.include_router(conversion.legacy_router)
 # Include the new endpoints under /conversion
-router.include_router(conversion.router, prefix="/conversion", tags=["conversion"])
\ No newline at end of file
+router.include_router(conversion.router, prefix="/conversion", tags=["conversion"])
+# Liveness/readiness probes
+router.include_router(health.router, tags=["health"])
+# Background conversion jobs with progress events
+router.include_router(jobs.router, tags=["jobs"])
+# Step definition generation against registered step libraries
+router.include_router(steps.router, tags=["steps"])
+# Saved request profiles, when profiling is enabled
+router.include_router(debug.router, tags=["debug"])
\ No newline at end of file
@@ -1,55 +1,302 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Form
-from typing import List, Dict, Any, Optional
-import PyPDF2
-from docx import Document
-from io import BytesIO
-from ...services.document_parser import DocumentParser
-from ...services.gherkin_generator import GherkinGenerator
-from ...services.document_type_identifier import DocumentTypeIdentifier
-from ...core.schemas import FeatureFileResponse, DocumentAnalysisResponse
+from fastapi import APIRouter, UploadFile, File, HTTPException, Form, Header
+from fastapi.responses import Response, StreamingResponse
+from typing import List, Dict, Any, AsyncIterator, Callable, Optional, Tuple
+import asyncio
+import json
+import re
+from ...services import pipeline
+from ...services.document_ir import records_from_parsed
+from ...services.gherkin_generator import FeatureWriter, GherkinGenerator, duplicate_comments
+from ...services.document_parser import SENTENCE_DOC_TYPES
+from ...services.document_cache import DocumentCache, CachedDocument
+from ...services.conversion_session import ConversionSession, conversion_sessions
+from ...services.feature_bundle import feature_file_name, stream_zip
+from ...services.fingerprint import output_fingerprint
+from ...services.executor import stage_executor, ExecutorSaturatedError, StageTimeoutError
+from ...services.metrics import pipeline_metrics
+from ...services.uploads import SpooledUpload, UploadTooLargeError, spool
+from ...core.schemas import FeatureFileResponse, DocumentAnalysisResponse, SessionUpdateRequest
+from ...core.config import settings
+from ...core.http_cache import entity_tag, matching_etag, not_modified
 
 # Create two separate routers
 router = APIRouter()  # for new endpoints
 legacy_router = APIRouter()  # for legacy endpoints
-document_parser = DocumentParser()
 gherkin_generator = GherkinGenerator()
-doc_identifier = DocumentTypeIdentifier()
+document_cache = DocumentCache(settings.document_cache_max_bytes)
+
+_file_format = pipeline.file_format
+
+# Smallest run of pages worth shipping to a separate worker
+PDF_MIN_PAGES_PER_RUN = 10
+
+# Largest number of documents parsed together in one batch conversion task
+BATCH_MAX_DOCUMENTS = 32
+
+SCENARIO_LINE = re.compile(r"^  Scenario(?: Outline)?:", re.MULTILINE)
+
+async def run_stage(stage: str, fn: Callable, *args: Any, size: Optional[int] = None) -> Any:
+    """Run a CPU-bound pipeline stage on the stage executor, mapping saturation and timeouts to HTTP errors"""
+    try:
+        with pipeline_metrics.stage(stage, size):
+            return await stage_executor.run(stage, fn, *args, size=size)
+    except ExecutorSaturatedError as e:
+        raise HTTPException(
+            status_code=503,
+            detail="The server is busy converting other documents. Please retry shortly.",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except StageTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+
+async def spool_upload(file: UploadFile) -> SpooledUpload:
+    """Spool an upload to memory or a temporary file, hashing it and enforcing the size limit"""
+    try:
+        # The multipart file is a blocking file object; copy it off the event loop
+        return await asyncio.to_thread(
+            spool, file.file, file.filename, settings.max_upload_bytes, settings.upload_spool_bytes, settings.upload_dir
+        )
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Error reading file: {str(e)}"
+        )
+
+async def read_upload(file: UploadFile) -> bytes:
+    upload = await spool_upload(file)
+    try:
+        return upload.read()
+    finally:
+        upload.close()
+
+async def load_document(
+    file: Optional[UploadFile],
+    document_id: Optional[str],
+    pages: Optional[str] = None,
+    max_pages: Optional[int] = None
+) -> CachedDocument:
+    """
+    Resolve a request to a cached document, either by the handle returned from /analyze
+    or by uploading the file. Uploads whose content is already cached skip extraction.
+    pages/max_pages restrict PDF extraction to a page selection.
+    """
+    if document_id:
+        entry = document_cache.get(document_id)
+        if entry is None:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Unknown or expired document_id: {document_id}. Please upload the file again."
+            )
+        return entry
+
+    if not file:
+        raise HTTPException(
+            status_code=400,
+            detail="No file uploaded. Please provide a document file or a document_id."
+        )
+
+    upload = await spool_upload(file)
+    try:
+        return await load_content(upload, pages, max_pages)
+    finally:
+        upload.close()
+
+def document_key(upload: SpooledUpload, pages: Optional[str] = None, max_pages: Optional[int] = None) -> str:
+    """The document cache handle of a spooled upload, without extracting it"""
+    file_format = _file_format(upload.filename)
+    if file_format != 'pdf' or not (pages or max_pages):
+        return DocumentCache.make_key(upload.sha256, file_format)
+    # A page selection yields a different document, so it is part of the handle
+    return DocumentCache.make_key(upload.sha256, f"{file_format}:{pages}:{max_pages}")
+
+async def load_content(
+    upload: SpooledUpload,
+    pages: Optional[str] = None,
+    max_pages: Optional[int] = None
+) -> CachedDocument:
+    """Look up a spooled upload in the document cache, extracting and caching it on a miss"""
+    filename = upload.filename
+    file_format = _file_format(filename)
+    if file_format != 'pdf':
+        pages, max_pages = None, None
+    key = document_key(upload, pages, max_pages)
+    entry = document_cache.get(key)
+    if entry is not None:
+        return entry
+
+    text_content, tables, headings = await extract_text_from_file(upload, pages, max_pages)
+    return document_cache.put(CachedDocument(
+        document_id=key,
+        filename=filename,
+        file_format=file_format,
+        text=text_content,
+        tables=tables,
+        headings=headings
+    ))
+
+def generate_feature(entry: CachedDocument, doc_type: str, parsed_content: Dict[str, Any], outlines: bool = False) -> str:
+    """Render the feature file of a parsed document, named after its file"""
+    with pipeline_metrics.stage("generate"):
+        feature_content = gherkin_generator.generate_feature(
+            parsed_content,
+            feature_name=entry.filename.rsplit('.', 1)[0],
+            doc_type=doc_type,
+            outlines=outlines
+        )
+    pipeline_metrics.count("scenarios", len(SCENARIO_LINE.findall(feature_content)))
+    return feature_content
+
+async def stream_feature(entry: CachedDocument, doc_type: str, outlines: bool = False) -> AsyncIterator[str]:
+    """
+    Render the feature file of a document while it is being parsed. The document is cut into
+    sections, parsed in chunks of about BDD_STREAM_CHUNK_CHARS on the stage executor one chunk
+    ahead of rendering, and the text of each chunk's scenarios is yielded as soon as it is rendered.
+    A document parsed before is rendered from its cached parse instead.
+    """
+    writer = FeatureWriter(gherkin_generator, entry.filename.rsplit('.', 1)[0], doc_type, outlines)
+    pending = "".join(writer.header())
+
+    parsed_content = entry.parsed.get(doc_type)
+    if parsed_content is not None:
+        with pipeline_metrics.stage("generate"):
+            pending += "".join(writer.write(records_from_parsed(parsed_content, doc_type)))
+        duplicates = parsed_content.get("duplicates", {})
+    else:
+        sections = await run_stage(
+            "segment", pipeline.segment_sections, entry.text, doc_type, settings.stream_chunk_chars, size=len(entry.text)
+        )
+        chunks: List[List[str]] = []
+        size = settings.stream_chunk_chars
+        for section in sections:
+            if size >= settings.stream_chunk_chars:
+                chunks.append([])
+                size = 0
+            chunks[-1].append(section)
+            size += len(section)
+        # A test case is a single section, to which the DOCX table offsets apply
+        tables = [entry.tables] if doc_type == "Test Case" else None
+
+        def parse(chunk: List[str]) -> asyncio.Task:
+            return asyncio.create_task(run_stage(
+                "parse", pipeline.parse_records, chunk, doc_type, tables, size=sum(len(section) for section in chunk)
+            ))
+
+        # Near-duplicates are collapsed across the chunks as their records come in
+        deduplicate = pipeline.document_parser.duplicate_filter()
+        duplicates = deduplicate.duplicates
+        task = parse(chunks[0]) if chunks else None
+        try:
+            for position in range(len(chunks)):
+                records = await task
+                task = parse(chunks[position + 1]) if position + 1 < len(chunks) else None
+                with pipeline_metrics.stage("generate"):
+                    pending += "".join(writer.write(deduplicate(records)))
+                if pending:
+                    yield pending
+                    pending = ""
+        finally:
+            if task is not None:
+                task.cancel()
+
+    with pipeline_metrics.stage("generate"):
+        pending += "".join(writer.close())
+        # The merged sentences a parse result lists, since a streamed feature comes without one
+        pending += duplicate_comments(duplicates)
+    pipeline_metrics.count("scenarios", writer.scenarios)
+    if pending:
+        yield pending
+
+async def segment_cached(entry: CachedDocument) -> None:
+    """Compute the sentence spans of a cached document once"""
+    if entry.sentences is None:
+        sentences = await run_stage("segment", pipeline.sentence_spans, entry.text, size=len(entry.text))
+        pipeline_metrics.count("sentences", len(sentences))
+        document_cache.update(entry, sentences=sentences)
+
+async def parse_cached(entry: CachedDocument, doc_type: str) -> Dict[str, Any]:
+    """Parse a cached document, reusing its sentence spans and earlier parse results"""
+    parsed_content = entry.parsed.get(doc_type)
+    if parsed_content is None:
+        if doc_type in SENTENCE_DOC_TYPES:
+            await segment_cached(entry)
+        parsed_content = await run_stage(
+            "parse", pipeline.parse_document, entry.text, doc_type, entry.sentences, entry.tables, size=len(entry.text)
+        )
+        document_cache.store_parsed(entry, doc_type, parsed_content)
+    return parsed_content
 
 @router.post("/analyze", response_model=DocumentAnalysisResponse)
 async def analyze_document(
-    file: UploadFile = File(description="The document file to analyze (PDF, DOCX, or TXT)")
+    file: UploadFile = File(description="The document file to analyze (PDF, DOCX, or TXT)"),
+    full_scan: bool = False,
+    pages: Optional[str] = Form(None, description="PDF page selection, e.g. 1-5,8,12-"),
+    max_pages: Optional[int] = Form(None, description="Maximum number of PDF pages to extract")
 ):
     """
-    Analyze document content and suggest document type
+    Analyze document content and suggest document type.
+    Large documents are classified from a sample unless full_scan is set; sample_sufficient
+    in the response tells whether that sample was decisive.
+    The returned document_id can be passed to the conversion endpoints instead of re-uploading the file.
     """
     try:
-        content = await file.read()
-        text_content = await extract_text_from_file(content, file.filename)
+        entry = await load_document(file, None, pages, max_pages)
         
         # Analyze document type
-        doc_scores = doc_identifier.identify_document_type(text_content)
-        suggested_type = doc_identifier.get_document_type(text_content)
+        if entry.type_scores is None or (full_scan and entry.type_sampled):
+            max_chars = None if full_scan else settings.identify_sample_chars
+            classification = await run_stage(
+                "identify", pipeline.classify_document, entry.text, max_chars,
+                size=min(len(entry.text), max_chars or len(entry.text))
+            )
+            document_cache.update(
+                entry,
+                type_scores=classification["scores"],
+                suggested_type=classification["suggested_type"],
+                type_sampled=classification["sampled"],
+                type_sample_sufficient=classification["sample_sufficient"]
+            )
         
         return {
             "filename": file.filename,
-            "suggested_type": suggested_type,
-            "confidence_scores": doc_scores,
-            "file_format": file.filename.split('.')[-1].lower() if '.' in file.filename else None
+            "suggested_type": entry.suggested_type,
+            "confidence_scores": entry.type_scores,
+            "file_format": entry.file_format or None,
+            "document_id": entry.document_id,
+            "sampled": entry.type_sampled,
+            "sample_sufficient": entry.type_sample_sufficient
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 # Enhanced conversion endpoint
 @legacy_router.post("/convert-to-feature", response_model=FeatureFileResponse)
 async def convert_to_feature(
-    file: UploadFile = File(description="The document file to convert (PDF, DOCX, or TXT)"),
-    doc_type: Optional[str] = Form(None, description="Document type (optional, will be auto-detected if not provided)")
+    response: Response,
+    file: Optional[UploadFile] = File(None, description="The document file to convert (PDF, DOCX, or TXT)"),
+    doc_type: Optional[str] = Form(None, description="Document type (optional, will be auto-detected if not provided)"),
+    document_id: Optional[str] = Form(None, description="Handle returned by /conversion/analyze; replaces the file upload"),
+    pages: Optional[str] = Form(None, description="PDF page selection, e.g. 1-5,8,12-"),
+    max_pages: Optional[int] = Form(None, description="Maximum number of PDF pages to extract"),
+    outlines: bool = Form(False, description="Fold scenarios that differ only in their values into Scenario Outlines"),
+    stream: bool = False,
+    if_none_match: Optional[str] = Header(None)
 ):
     """
     Enhanced endpoint for converting document to feature file with auto-detection
+
+    With stream=true the response is the feature file itself as text/plain, sent while the document
+    is still being parsed; the document type and id come in the X-BDD-Document-Type and
+    X-BDD-Document-Id headers, and the parsed content is left out.
+
+    The ETag of the response hashes the document content, the options and the pipeline version;
+    a request whose If-None-Match holds it gets 304 without the document being extracted or parsed.
     """
     # Validate file is provided
-    if not file:
+    if not file and not document_id:
         raise HTTPException(
             status_code=400,
             detail="No file uploaded. Please provide a document file."
@@ -69,9 +316,9 @@ async def convert_to_feature(
             detail=f"Invalid document type. Valid types are: {', '.join(valid_doc_types)}"
         )
 
-    try:
-        # Validate file format
-        file_ext = file.filename.lower().split('.')[-1] if '.' in file.filename else ''
+    # Validate file format
+    if file:
+        file_ext = _file_format(file.filename)
         valid_formats = {'pdf', 'docx', 'txt'}
         
         if file_ext not in valid_formats:
@@ -80,94 +327,267 @@ async def convert_to_feature(
                 detail=f"Unsupported file format: .{file_ext}. Please upload one of: {', '.join(valid_formats)}"
             )
 
-        # Read file content
+    # Identify the document by its content; the feature is named after the file it was first cached as
+    upload = None
+    if document_id:
+        entry = await load_document(None, document_id)
+        key, filename = entry.document_id, entry.filename
+    else:
+        upload = await spool_upload(file)
+        key = document_key(upload, pages, max_pages)
+        cached = document_cache.get(key)
+        filename = cached.filename if cached is not None else upload.filename
+
+    def feature_etag(filename: str) -> str:
+        return entity_tag(output_fingerprint(document=key, filename=filename, doc_type=doc_type, outlines=outlines, stream=stream))
+
+    matched = matching_etag(if_none_match, feature_etag(filename))
+    if matched:
+        if upload is not None:
+            upload.close()
+        return not_modified(matched)
+
+    if upload is not None:
+        # Read and extract file content (or reuse the cached extraction)
         try:
-            content = await file.read()
-        except Exception as e:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Error reading file: {str(e)}"
-            )
-        
-        # Extract text based on file type
-        if file_ext == 'pdf':
-            text_content = await extract_text_from_pdf(content)
-        elif file_ext == 'docx':
-            text_content = await extract_text_from_docx(content)
-        elif file_ext == 'txt':
-            try:
-                text_content = content.decode('utf-8')
-            except UnicodeDecodeError:
-                raise HTTPException(
-                    status_code=400,
-                    detail="Invalid text file encoding. Please ensure the file is UTF-8 encoded."
-                )
-        else:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Unsupported file format: .{file_ext}. Please upload PDF, DOCX, or TXT files."
+            entry = await load_content(upload, pages, max_pages)
+        finally:
+            upload.close()
+    # The entry may have been evicted and cached again under this upload's name in the meantime
+    etag = feature_etag(entry.filename)
+
+    try:
+        if stream:
+            chunks = stream_feature(entry, doc_type, outlines)
+            # Wait for the first chunk so parse errors still get a proper status code
+            first = await chunks.__anext__()
+
+            async def feature_text() -> AsyncIterator[str]:
+                try:
+                    yield first
+                    async for chunk in chunks:
+                        yield chunk
+                finally:
+                    await chunks.aclose()
+
+            return StreamingResponse(
+                feature_text(),
+                media_type="text/plain; charset=utf-8",
+                headers={"X-BDD-Document-Type": doc_type, "X-BDD-Document-Id": entry.document_id, "ETag": etag}
             )
 
         # Parse document content
-        parsed_content = document_parser.parse_document(text_content, doc_type)
+        parsed_content = await parse_cached(entry, doc_type)
         
         # Generate feature file
-        feature_content = gherkin_generator.generate_feature(
-            parsed_content,
-            feature_name=file.filename.rsplit('.', 1)[0],
-            doc_type=doc_type
-        )
+        feature_content = generate_feature(entry, doc_type, parsed_content, outlines)
 
+        response.headers["ETag"] = etag
         return {
             "feature_content": feature_content,
-            "suggested_steps": parsed_content
+            "suggested_steps": parsed_content,
+            "document_type": doc_type,
+            "file_format": entry.file_format,
+            "document_id": entry.document_id
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-async def extract_text_from_file(content: bytes, filename: str) -> str:
-    """Extract text content from file based on its format"""
+async def extract_text_from_file(
+    upload: SpooledUpload,
+    pages: Optional[str] = None,
+    max_pages: Optional[int] = None
+) -> Tuple[str, Optional[List[Dict[str, Any]]], Optional[List[Dict[str, Any]]]]:
+    """
+    Extract text content from file based on its format, plus the table structure of DOCX files
+    and the headings of DOCX and PDF files.
+    Large PDFs are split into page runs extracted concurrently by the stage executor workers.
+    Spooled uploads reach the workers as a path, so each maps the file instead of receiving a copy.
+    """
+    content, filename, size = upload.source, upload.filename, upload.size
     try:
-        file_ext = filename.lower().split('.')[-1] if '.' in filename else ''
-        
-        if file_ext == 'pdf':
-            pdf_file = BytesIO(content)
-            reader = PyPDF2.PdfReader(pdf_file)
-            text = ""
-            for page in reader.pages:
-                text += page.extract_text() + "\n"
-            return text
-            
-        elif file_ext == 'docx':
-            doc = Document(BytesIO(content))
-            return "\n".join([paragraph.text for paragraph in doc.paragraphs])
-            
-        elif file_ext == 'txt':
-            try:
-                return content.decode('utf-8')
-            except UnicodeDecodeError:
-                return content.decode('latin-1')  # fallback encoding
-        else:
+        if _file_format(filename) != 'pdf' or (size <= settings.executor_inline_max_bytes and not (pages or max_pages)):
+            return await run_stage("extract", pipeline.extract_document, content, filename, size=size)
+
+        page_count = await run_stage("extract", pipeline.pdf_page_count, content, size=size)
+        selected = pipeline.select_pages(page_count, pages, max_pages)
+        pipeline_metrics.count("pages", len(selected))
+        if not selected:
             raise HTTPException(
                 status_code=400,
-                detail=f"Unsupported file format: .{file_ext}"
+                detail=f"The page selection matches none of the {page_count} pages of {filename}"
+            )
+
+        runs = 1
+        if len(selected) >= settings.pdf_parallel_min_pages and stage_executor.max_workers > 1:
+            runs = min(stage_executor.max_workers, len(selected) // PDF_MIN_PAGES_PER_RUN)
+        run_size = -(-len(selected) // runs)
+        outline, *texts = await asyncio.gather(
+            run_stage("extract", pipeline.pdf_outline, content, size=size),
+            *(
+                run_stage("extract", pipeline.extract_text_from_pdf, content, selected[start:start + run_size], size=size)
+                for start in range(0, len(selected), run_size)
             )
-            
+        )
+        text = "".join(texts)
+        return text, None, pipeline.locate_headings(text, outline)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=400,
             detail=f"Error processing {filename}: {str(e)}"
         )
 
+def _feature_record(
+    index: int,
+    entry: CachedDocument,
+    doc_type: str,
+    parsed_content: Dict[str, Any],
+    outlines: bool = False
+) -> Dict[str, Any]:
+    try:
+        feature_content = generate_feature(entry, doc_type, parsed_content, outlines)
+    except Exception as e:
+        return _error_record(index, entry.filename, HTTPException(status_code=500, detail=str(e)))
+    return {
+        "index": index,
+        "filename": entry.filename,
+        "status": "success",
+        "document_id": entry.document_id,
+        "feature_content": feature_content,
+        "parsed_content": parsed_content
+    }
+
+def _error_record(index: int, filename: str, error: HTTPException) -> Dict[str, Any]:
+    return {
+        "index": index,
+        "filename": filename,
+        "status": "error",
+        "status_code": error.status_code,
+        "detail": error.detail
+    }
+
+async def convert_batch(
+    items: List[Dict[str, Any]],
+    doc_type: str,
+    pages: Optional[str] = None,
+    max_pages: Optional[int] = None,
+    outlines: bool = False
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Convert a batch of documents concurrently and yield one record per document as it finishes.
+
+    Each item carries a filename plus either a spooled upload or a document_id. Files are
+    extracted concurrently (at most BDD_BATCH_CONCURRENCY stage tasks per batch, so one batch
+    cannot saturate the executor on its own), and documents whose extraction finishes together
+    are parsed as one nlp.pipe batch. Failures are reported as error records, never raised.
+    """
+    slots = asyncio.Semaphore(settings.batch_concurrency)
+    extracted: asyncio.Queue = asyncio.Queue()
+    results: asyncio.Queue = asyncio.Queue()
+
+    async def extract(index: int, item: Dict[str, Any]) -> None:
+        async with slots:
+            try:
+                if item.get("document_id"):
+                    entry = await load_document(None, item["document_id"])
+                else:
+                    entry = await load_content(item["upload"], pages, max_pages)
+                await extracted.put((index, item["filename"], entry, None))
+            except HTTPException as e:
+                await extracted.put((index, item["filename"], None, e))
+            except Exception as e:
+                await extracted.put((index, item["filename"], None, HTTPException(status_code=500, detail=str(e))))
+            finally:
+                if item.get("upload"):
+                    item["upload"].close()
+
+    async def parse(batch: List[Tuple[int, CachedDocument]]) -> None:
+        async with slots:
+            try:
+                parsed_batch = await run_stage(
+                    "parse", pipeline.parse_documents,
+                    [entry.text for _, entry in batch], doc_type,
+                    [entry.sentences for _, entry in batch], [entry.tables for _, entry in batch],
+                    size=sum(len(entry.text) for _, entry in batch)
+                )
+            except HTTPException as e:
+                for index, entry in batch:
+                    await results.put(_error_record(index, entry.filename, e))
+                return
+            except Exception:
+                parsed_batch = None
+
+        if parsed_batch is None:
+            # Isolate the failing document by parsing the batch one file at a time
+            for index, entry in batch:
+                try:
+                    await results.put(_feature_record(index, entry, doc_type, await parse_cached(entry, doc_type), outlines))
+                except HTTPException as e:
+                    await results.put(_error_record(index, entry.filename, e))
+                except Exception as e:
+                    await results.put(_error_record(index, entry.filename, HTTPException(status_code=500, detail=str(e))))
+            return
+
+        for (index, entry), parsed_content in zip(batch, parsed_batch):
+            document_cache.store_parsed(entry, doc_type, parsed_content)
+            await results.put(_feature_record(index, entry, doc_type, parsed_content, outlines))
+
+    async def dispatch() -> None:
+        parsers = []
+        remaining = len(items)
+        while remaining:
+            # Group whatever extractions have completed into one parse batch
+            ready = [await extracted.get()]
+            while not extracted.empty() and len(ready) < BATCH_MAX_DOCUMENTS:
+                ready.append(extracted.get_nowait())
+            remaining -= len(ready)
+
+            batch = []
+            for index, filename, entry, error in ready:
+                if error is not None:
+                    await results.put(_error_record(index, filename, error))
+                elif doc_type in entry.parsed:
+                    await results.put(_feature_record(index, entry, doc_type, entry.parsed[doc_type], outlines))
+                else:
+                    batch.append((index, entry))
+            if batch:
+                parsers.append(asyncio.create_task(parse(batch)))
+        await asyncio.gather(*parsers)
+
+    tasks = [asyncio.create_task(extract(index, item)) for index, item in enumerate(items)]
+    tasks.append(asyncio.create_task(dispatch()))
+    try:
+        for _ in range(len(items)):
+            yield await results.get()
+    finally:
+        # The client may disconnect mid-stream; stop scheduling work for it
+        for task in tasks:
+            task.cancel()
+        for item in items:
+            if item.get("upload"):
+                item["upload"].close()
+
 @router.post("/convert")
 async def convert_document(
-    files: List[UploadFile] = File(...),
-    doc_type: str = None
+    files: List[UploadFile] = File([]),
+    doc_type: str = None,
+    document_ids: List[str] = Form([], description="Handles returned by /analyze; converted alongside any uploaded files"),
+    pages: Optional[str] = Form(None, description="PDF page selection applied to every uploaded PDF, e.g. 1-5,8,12-"),
+    max_pages: Optional[int] = Form(None, description="Maximum number of pages to extract from each uploaded PDF"),
+    outlines: bool = Form(False, description="Fold scenarios that differ only in their values into Scenario Outlines"),
+    stream: bool = False
 ):
     """
     Convert uploaded documents to Gherkin feature files
     Supported formats: PDF, DOCX, TXT
     Document types: BRD, FRD, User Story, Test Case
+
+    Documents are converted concurrently and failures are reported per file. With stream=true the
+    response is NDJSON: one record per document, in completion order, as soon as it is done.
     """
     if not doc_type:
         raise HTTPException(status_code=400, detail="Document type must be specified")
@@ -175,52 +595,40 @@ async def convert_document(
     if doc_type not in ["BRD", "FRD", "User Story", "Test Case"]:
         raise HTTPException(status_code=400, detail="Unsupported document type")
 
-    results = []
-    for file in files:
-        try:
-            content = await file.read()
-            
-            # Extract text based on file type
-            if file.filename.lower().endswith('.pdf'):
-                text_content = await extract_text_from_pdf(content)
-            elif file.filename.lower().endswith('.docx'):
-                text_content = await extract_text_from_docx(content)
-            elif file.filename.lower().endswith('.txt'):
-                text_content = content.decode('utf-8')
-            else:
-                raise HTTPException(
-                    status_code=400,
-                    detail="Unsupported file format. Please upload PDF, DOCX, or TXT files."
-                )
+    if not files and not document_ids:
+        raise HTTPException(status_code=400, detail="No files uploaded and no document_ids given")
 
-            # Parse document content
-            parsed_content = document_parser.parse_document(text_content, doc_type)
-            
-            # Generate Gherkin feature file
-            feature_content = gherkin_generator.generate_feature(
-                parsed_content,
-                feature_name=file.filename.rsplit('.', 1)[0],
-                doc_type=doc_type
-            )
+    # Spool the uploads up front; the multipart files are closed once the handler returns
+    items = []
+    try:
+        for file in files:
+            items.append({"filename": file.filename, "upload": await spool_upload(file)})
+    except HTTPException:
+        for item in items:
+            item["upload"].close()
+        raise
+    items += [{"filename": document_id, "document_id": document_id} for document_id in document_ids]
 
-            results.append({
-                "filename": file.filename,
-                "feature_content": feature_content,
-                "parsed_content": parsed_content
-            })
+    if stream:
+        async def ndjson() -> AsyncIterator[str]:
+            async for record in convert_batch(items, doc_type, pages, max_pages, outlines):
+                yield json.dumps(record) + "\n"
 
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Error processing {file.filename}: {str(e)}")
+        return StreamingResponse(ndjson(), media_type="application/x-ndjson")
 
+    results = sorted([record async for record in convert_batch(items, doc_type, pages, max_pages, outlines)], key=lambda record: record["index"])
     return {
-        "status": "success",
+        "status": "success" if all(record["status"] == "success" for record in results) else "partial",
         "results": results
     }
 
 @router.post("/validate")
 async def validate_document(
-    file: UploadFile = File(...),
-    doc_type: str = None
+    file: Optional[UploadFile] = File(None),
+    doc_type: str = None,
+    document_id: Optional[str] = Form(None, description="Handle returned by /analyze; replaces the file upload"),
+    pages: Optional[str] = Form(None, description="PDF page selection, e.g. 1-5,8,12-"),
+    max_pages: Optional[int] = Form(None, description="Maximum number of PDF pages to extract")
 ):
     """
     Validate document structure and content before conversion
@@ -229,30 +637,211 @@ async def validate_document(
     if not doc_type:
         raise HTTPException(status_code=400, detail="Document type must be specified")
 
-    try:
-        content = await file.read()
-        
-        # Extract text based on file type
-        if file.filename.lower().endswith('.pdf'):
-            text_content = await extract_text_from_pdf(content)
-        elif file.filename.lower().endswith('.docx'):
-            text_content = await extract_text_from_docx(content)
-        elif file.filename.lower().endswith('.txt'):
-            text_content = content.decode('utf-8')
-        else:
-            raise HTTPException(
-                status_code=400,
-                detail="Unsupported file format. Please upload PDF, DOCX, or TXT files."
-            )
+    entry = await load_document(file, document_id, pages, max_pages)
 
+    try:
         # Parse document content
-        parsed_content = document_parser.parse_document(text_content, doc_type)
+        parsed_content = await parse_cached(entry, doc_type)
         
         return {
             "status": "success",
-            "filename": file.filename,
+            "filename": entry.filename,
+            "document_id": entry.document_id,
             "parsed_structure": parsed_content
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error validating document: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error validating document: {str(e)}")
+
+async def convert_sections_concurrently(
+    texts: List[str],
+    names: List[str],
+    doc_type: Optional[str]
+) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Convert document sections in contiguous chunks of about equal size, one chunk per executor
+    worker, and yield (section index, result) pairs as chunks complete
+    """
+    runs = max(min(stage_executor.max_workers, len(texts)), 1)
+    target = sum(len(text) for text in texts) / runs
+    bounds, size = [0], 0
+    for index, text in enumerate(texts):
+        size += len(text)
+        if size >= target * len(bounds) and len(bounds) < runs and index + 1 < len(texts):
+            bounds.append(index + 1)
+    bounds.append(len(texts))
+
+    async def convert_chunk(start: int, stop: int) -> Tuple[int, List[Dict[str, Any]]]:
+        return start, await run_stage(
+            "parse", pipeline.convert_sections, texts[start:stop], names[start:stop], doc_type,
+            size=sum(len(text) for text in texts[start:stop])
+        )
+
+    tasks = [asyncio.create_task(convert_chunk(start, stop)) for start, stop in zip(bounds, bounds[1:])]
+    try:
+        for done in asyncio.as_completed(tasks):
+            start, results = await done
+            for offset, result in enumerate(results):
+                yield start + offset, result
+    finally:
+        for task in tasks:
+            task.cancel()
+
+@router.post("/convert-sections")
+async def convert_document_sections(
+    file: Optional[UploadFile] = File(None, description="The document file to convert (PDF, DOCX, or TXT)"),
+    doc_type: Optional[str] = Form(None, description="Document type of every section; by default each section is classified on its own"),
+    document_id: Optional[str] = Form(None, description="Handle returned by /analyze; replaces the file upload"),
+    pages: Optional[str] = Form(None, description="PDF page selection, e.g. 1-5,8,12-"),
+    max_pages: Optional[int] = Form(None, description="Maximum number of PDF pages to extract")
+):
+    """
+    Split a multi-module document at its headings and convert each section into its own feature file,
+    concurrently across the executor workers. The response is a zip of the feature files, streamed
+    while sections are still being converted; sections without scenarios are left out.
+    """
+    if doc_type and doc_type not in ["BRD", "FRD", "User Story", "Test Case"]:
+        raise HTTPException(status_code=400, detail="Unsupported document type")
+
+    entry = await load_document(file, document_id, pages, max_pages)
+    sections = await run_stage("segment", pipeline.detect_sections, entry.text, entry.headings, size=len(entry.text))
+    if not sections:
+        raise HTTPException(status_code=400, detail=f"No text found in {entry.filename}")
+
+    base_name = entry.filename.rsplit('.', 1)[0]
+    results = convert_sections_concurrently(
+        [entry.text[section["start"]:section["end"]] for section in sections],
+        [section["title"] or base_name for section in sections],
+        doc_type
+    )
+    # Wait for the first chunk so conversion errors still get a proper status code
+    try:
+        first = await results.__anext__()
+    except StopAsyncIteration:
+        first = None
+
+    async def feature_files() -> AsyncIterator[Tuple[str, str]]:
+        pending = [first] if first else []
+        try:
+            while True:
+                index, result = pending.pop() if pending else await results.__anext__()
+                if result["scenarios"]:
+                    yield feature_file_name(index, sections[index]["title"] or base_name), result["feature_content"]
+        except StopAsyncIteration:
+            return
+        finally:
+            await results.aclose()
+
+    return StreamingResponse(
+        stream_zip(feature_files()),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{base_name}-features.zip"'}
+    )
+
+async def update_session(session: ConversionSession, text: str) -> Dict[str, Any]:
+    """Bring a session to a new revision of its document, re-parsing only the changed sections"""
+    sections = await run_stage("segment", pipeline.segment_sections, text, session.doc_type, size=len(text))
+    fingerprints, missing = session.plan(sections)
+
+    parsed = {}
+    if missing:
+        texts = list(missing.values())
+        parsed_sections = await run_stage(
+            "parse", pipeline.parse_documents, texts, session.doc_type, None, None,
+            size=sum(len(section) for section in texts)
+        )
+        parsed = dict(zip(missing, parsed_sections))
+
+    with pipeline_metrics.stage("generate"):
+        patch = session.apply(fingerprints, parsed)
+    return {
+        "session_id": session.session_id,
+        "version": session.version,
+        "patch": patch,
+        "sections": session.section_count,
+        "reparsed_sections": len(missing)
+    }
+
+def _get_session(session_id: str) -> ConversionSession:
+    session = conversion_sessions.get(session_id)
+    if session is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Unknown or expired session_id: {session_id}. Please start a new session."
+        )
+    return session
+
+@router.post("/sessions")
+async def create_session(
+    doc_type: str = Form(..., description="Document type: BRD, FRD, User Story or Test Case"),
+    file: Optional[UploadFile] = File(None, description="The document file to preview (PDF, DOCX, or TXT)"),
+    document_id: Optional[str] = Form(None, description="Handle returned by /analyze; replaces the file upload"),
+    text: Optional[str] = Form(None, description="Document text; replaces the file upload"),
+    feature_name: Optional[str] = Form(None, description="Feature name, by default the file name")
+):
+    """
+    Start an incremental conversion session for the live preview.
+    Returns the feature file and, for uploads, the extracted text to edit; send each edit of
+    the text to PUT /sessions/{session_id} to receive a patch of the feature file.
+    """
+    if doc_type not in ["BRD", "FRD", "User Story", "Test Case"]:
+        raise HTTPException(status_code=400, detail="Unsupported document type")
+
+    if text is None:
+        entry = await load_document(file, document_id)
+        text = entry.text
+        feature_name = feature_name or entry.filename.rsplit('.', 1)[0]
+
+    session = conversion_sessions.create(doc_type, feature_name or "Document", gherkin_generator)
+    try:
+        async with session.lock:
+            result = await update_session(session, text)
+    except Exception:
+        conversion_sessions.remove(session.session_id)
+        raise
+
+    del result["patch"]
+    return {**result, "feature_content": session.feature_content, "text": text}
+
+@router.put("/sessions/{session_id}")
+async def update_session_text(session_id: str, request: SessionUpdateRequest, include_feature: bool = False):
+    """
+    Apply an edit of the document text to a session. The response carries the patch from the
+    previous version of the feature file: {"offset", "delete", "insert"} edits in ascending order,
+    with offsets into the previous version (apply them from last to first).
+    """
+    session = _get_session(session_id)
+    async with session.lock:
+        if request.base_version is not None and request.base_version != session.version:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Session is at version {session.version}, not {request.base_version}. Fetch the feature file again."
+            )
+        result = await update_session(session, request.text)
+        if include_feature:
+            result["feature_content"] = session.feature_content
+        return result
+
+@router.get("/sessions/{session_id}")
+async def get_session(session_id: str):
+    """
+    Current version and feature file of a session
+    """
+    session = _get_session(session_id)
+    return {
+        "session_id": session.session_id,
+        "version": session.version,
+        "sections": session.section_count,
+        "feature_content": session.feature_content
+    }
+
+@router.delete("/sessions/{session_id}")
+async def delete_session(session_id: str):
+    """
+    End a session and free its state
+    """
+    if not conversion_sessions.remove(session_id):
+        raise HTTPException(status_code=404, detail=f"Unknown or expired session_id: {session_id}")
+    return {"status": "deleted"}
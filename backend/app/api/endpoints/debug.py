@@ -0,0 +1,58 @@
+from fastapi import APIRouter, HTTPException, Header, Query, Request
+from fastapi.responses import FileResponse, PlainTextResponse
+from typing import Optional
+from ...services.profiler import profiling_allowed, request_profiler
+from ...core.config import settings
+
+router = APIRouter()
+
+def _check_access(request: Request, token: Optional[str]) -> None:
+    # Answer as if the routes did not exist, so a disabled deployment does not advertise them
+    if not settings.profiling_enabled:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not profiling_allowed(token, request.client.host if request.client else None):
+        if settings.profiling_token:
+            raise HTTPException(status_code=403, detail="A valid X-BDD-Profile token is required")
+        raise HTTPException(status_code=403, detail="Without BDD_PROFILING_TOKEN, profiles are only served to local clients")
+
+@router.get("/debug/profiles")
+async def list_profiles(request: Request, x_bdd_profile: Optional[str] = Header(None)):
+    """
+    Ids of the saved request profiles, most recent first
+    """
+    _check_access(request, x_bdd_profile)
+    return {
+        "profiles": [
+            {"profile_id": profile_id, "url": f"/api/debug/profiles/{profile_id}"}
+            for profile_id in request_profiler.list()
+        ]
+    }
+
+@router.get("/debug/profiles/{profile_id}")
+async def get_profile(
+    request: Request,
+    profile_id: str,
+    format: str = Query("prof", description="prof for the raw cProfile dump (snakeviz, pstats), text for a summary"),
+    sort: str = Query("cumulative", description="pstats sort key of the text summary"),
+    limit: int = Query(50, ge=1, description="Number of functions in the text summary"),
+    x_bdd_profile: Optional[str] = Header(None)
+):
+    """
+    A saved request profile, as a cProfile dump or a pstats text summary
+    """
+    _check_access(request, x_bdd_profile)
+    if not request_profiler.exists(profile_id):
+        raise HTTPException(status_code=404, detail=f"Unknown or expired profile_id: {profile_id}")
+
+    if format == "text":
+        try:
+            return PlainTextResponse(request_profiler.summary(profile_id, limit, sort))
+        except KeyError:
+            raise HTTPException(status_code=400, detail=f"Unknown sort key: {sort}")
+    if format != "prof":
+        raise HTTPException(status_code=400, detail="format must be prof or text")
+    return FileResponse(
+        str(request_profiler.path(profile_id)),
+        media_type="application/octet-stream",
+        filename=f"{profile_id}.prof"
+    )
@@ -0,0 +1,29 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from ...services.nlp_registry import nlp_registry
+from ...core.config import settings
+
+router = APIRouter()
+
+@router.get("/health")
+async def health():
+    """
+    Liveness probe; never touches the NLP models
+    """
+    return {"status": "ok"}
+
+@router.get("/health/ready")
+async def ready():
+    """
+    Readiness probe: succeeds once the NLP profiles configured for warm-up are loaded
+    """
+    pending = [profile for profile in settings.nlp_warmup_profiles if not nlp_registry.is_loaded(profile)]
+    return JSONResponse(
+        status_code=503 if pending else 200,
+        content={
+            "status": "loading" if pending else "ready",
+            "model": nlp_registry.model_name,
+            "loaded_profiles": nlp_registry.loaded_profiles(),
+            "pending_profiles": pending
+        }
+    )
@@ -0,0 +1,179 @@
+from fastapi import APIRouter, UploadFile, File, HTTPException, Form
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import Dict, Any, AsyncIterator, Optional
+import asyncio
+import json
+from . import conversion
+from ...services.document_parser import SENTENCE_DOC_TYPES
+from ...services.document_cache import CachedDocument
+from ...services.job_runner import job_runner, JobQueueFullError, ProgressCallback
+from ...services.job_store import job_store, TERMINAL_STATUSES
+from ...services.uploads import SpooledUpload
+
+router = APIRouter()
+
+# Seconds between keep-alive comments on an idle event stream, so proxies keep it open
+EVENT_KEEPALIVE = 15.0
+
+VALID_DOC_TYPES = ["BRD", "FRD", "User Story", "Test Case"]
+
+def _job_links(job: Dict[str, Any]) -> Dict[str, Any]:
+    job_id = job["job_id"]
+    return {
+        **job,
+        "events_url": f"/api/jobs/{job_id}/events",
+        "result_url": f"/api/jobs/{job_id}/result"
+    }
+
+async def _get_job(job_id: str, include_result: bool = False) -> Dict[str, Any]:
+    job = await asyncio.to_thread(job_store.get, job_id, include_result)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired job_id: {job_id}")
+    return job
+
+async def _convert(
+    progress: ProgressCallback,
+    doc_type: str,
+    entry: Optional[CachedDocument],
+    upload: Optional[SpooledUpload],
+    pages: Optional[str],
+    max_pages: Optional[int],
+    outlines: bool = False
+) -> Dict[str, Any]:
+    """Run the conversion pipeline of one job, reporting each stage as it starts"""
+    await progress("extract")
+    if entry is None:
+        try:
+            entry = await conversion.load_content(upload, pages, max_pages)
+        finally:
+            upload.close()
+
+    if doc_type in SENTENCE_DOC_TYPES:
+        await progress("segment")
+        await conversion.segment_cached(entry)
+
+    await progress("parse")
+    parsed_content = await conversion.parse_cached(entry, doc_type)
+
+    await progress("generate")
+    feature_content = conversion.generate_feature(entry, doc_type, parsed_content, outlines)
+    return {
+        "feature_content": feature_content,
+        "suggested_steps": parsed_content,
+        "document_type": doc_type,
+        "file_format": entry.file_format,
+        "document_id": entry.document_id
+    }
+
+@router.post("/jobs", status_code=202)
+async def submit_job(
+    file: Optional[UploadFile] = File(None, description="The document file to convert (PDF, DOCX, or TXT)"),
+    doc_type: Optional[str] = Form(None, description="Document type: BRD, FRD, User Story or Test Case"),
+    document_id: Optional[str] = Form(None, description="Handle returned by /conversion/analyze; replaces the file upload"),
+    pages: Optional[str] = Form(None, description="PDF page selection, e.g. 1-5,8,12-"),
+    max_pages: Optional[int] = Form(None, description="Maximum number of PDF pages to extract"),
+    outlines: bool = Form(False, description="Fold scenarios that differ only in their values into Scenario Outlines")
+):
+    """
+    Queue a document conversion and return its job immediately.
+    Follow progress on events_url (Server-Sent Events) and fetch the feature file from result_url.
+    """
+    if not doc_type or doc_type not in VALID_DOC_TYPES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Document type is required. Valid types are: {', '.join(VALID_DOC_TYPES)}"
+        )
+
+    entry, upload, filename = None, None, None
+    if document_id:
+        entry = conversion.document_cache.get(document_id)
+        if entry is None:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Unknown or expired document_id: {document_id}. Please upload the file again."
+            )
+        filename = entry.filename
+    elif file:
+        filename = file.filename
+        file_ext = conversion._file_format(filename)
+        if file_ext not in {'pdf', 'docx', 'txt'}:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unsupported file format: .{file_ext}. Please upload one of: pdf, docx, txt"
+            )
+        # The upload is gone once this request returns, so it is spooled before the job is queued
+        upload = await conversion.spool_upload(file)
+    else:
+        raise HTTPException(
+            status_code=400,
+            detail="No file uploaded. Please provide a document file or a document_id."
+        )
+
+    try:
+        job = await job_runner.submit(
+            lambda progress: _convert(progress, doc_type, entry, upload, pages, max_pages, outlines),
+            filename=filename,
+            doc_type=doc_type
+        )
+    except JobQueueFullError as e:
+        if upload is not None:
+            upload.close()
+        raise HTTPException(
+            status_code=503,
+            detail="Too many conversion jobs are queued. Please retry shortly.",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    return _job_links(job)
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """
+    Current status and per-stage progress of a job
+    """
+    return _job_links(await _get_job(job_id))
+
+@router.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """
+    Server-Sent Events stream of a job: a "progress" event on every change and a final
+    "done" event once the job succeeded or failed
+    """
+    await _get_job(job_id)
+
+    async def events() -> AsyncIterator[str]:
+        last = None
+        while True:
+            job = await asyncio.to_thread(job_store.get, job_id)
+            if job is None:
+                yield f"event: error\ndata: {json.dumps({'detail': f'Unknown or expired job_id: {job_id}'})}\n\n"
+                return
+            # Touching a queued or running job only moves updated_at, which is no progress
+            state = {**job, "updated_at": None}
+            if state != last:
+                event = "done" if job["status"] in TERMINAL_STATUSES else "progress"
+                yield f"event: {event}\ndata: {json.dumps(_job_links(job))}\n\n"
+                last = state
+            if job["status"] in TERMINAL_STATUSES:
+                return
+            # The store stays the source of truth; waking up early just avoids polling latency
+            if not await job_runner.wait(job_id, EVENT_KEEPALIVE):
+                yield ": keep-alive\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    """
+    Feature file of a finished job. Unfinished jobs answer 202 with their status;
+    failed jobs answer with the error the conversion failed with.
+    """
+    job = await _get_job(job_id, include_result=True)
+    if job["status"] == "failed":
+        raise HTTPException(status_code=job["status_code"] or 500, detail=job["error"])
+    if job["status"] != "succeeded":
+        return JSONResponse(status_code=202, content=_job_links(job))
+    return job["result"]
@@ -0,0 +1,185 @@
+from fastapi import APIRouter, UploadFile, File, HTTPException, Header, Response
+from fastapi.encoders import jsonable_encoder
+from typing import Dict, Any, List, Optional
+import asyncio
+from . import conversion
+from ...core.http_cache import entity_tag, matching_etag, not_modified
+from ...core.schemas import StepDefinitionRequest, StepDefinitionResponse, StepDefinitionBatchRequest, StepLibraryRequest
+from ...services.fingerprint import output_fingerprint
+from ...services.gherkin_parser import feature_cache
+from ...services.step_definition_generator import StepDefinitionGenerator
+from ...services.step_library import StepBinding, StepIndex, scan_step_sources, step_libraries
+
+router = APIRouter()
+step_generator = StepDefinitionGenerator()
+
+def _library_summary(name: str, index: StepIndex, errors: List[Dict[str, Any]] = None) -> Dict[str, Any]:
+    return {
+        "name": name,
+        "steps": len(index),
+        # Patterns without a required literal word are tried for every step
+        "unindexed_steps": index.unindexed_count,
+        "errors": errors or []
+    }
+
+def _get_library(name: str) -> StepIndex:
+    index = step_libraries.get(name)
+    if index is None:
+        raise HTTPException(status_code=404, detail=f"Unknown step library: {name}")
+    return index
+
+def _steps_etag(request: Any, step_index: Optional[StepIndex]) -> str:
+    """Entity tag of generated step definitions: the request, the library's bindings and the generator version"""
+    return entity_tag(output_fingerprint(
+        request=jsonable_encoder(request, exclude={"library"}),
+        library=step_index.fingerprint if step_index is not None else None
+    ))
+
+def _compile(request: StepLibraryRequest):
+    bindings, errors = [], []
+    for step in request.steps:
+        try:
+            bindings.append(StepBinding(
+                pattern=step.pattern,
+                kind=step.kind,
+                step_type=step.step_type,
+                source=step.source,
+                line=step.line,
+                function=step.function
+            ))
+        except ValueError as e:
+            errors.append({"pattern": step.pattern, "source": step.source, "line": step.line, "error": str(e)})
+    return bindings, errors
+
+@router.post("/generate-steps", response_model=StepDefinitionResponse)
+async def generate_steps(request: StepDefinitionRequest, response: Response, if_none_match: Optional[str] = Header(None)):
+    """
+    Generate step definitions from feature file content. With a library, steps an existing
+    definition already matches are returned as matched_steps and get no new stub. A request
+    whose If-None-Match holds the ETag of its earlier response gets 304 without the feature
+    being parsed.
+    """
+    step_index = _get_library(request.library) if request.library else None
+    etag = _steps_etag(request, step_index)
+    matched = matching_etag(if_none_match, etag)
+    if matched:
+        return not_modified(matched)
+    try:
+        result = step_generator.generate_step_definitions(
+            request.feature_content,
+            request.programming_language,
+            request.framework,
+            step_index,
+            request.pattern_kind
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    response.headers["ETag"] = etag
+    return StepDefinitionResponse(**result)
+
+@router.post("/generate-steps/batch")
+async def generate_steps_batch(request: StepDefinitionBatchRequest, response: Response, if_none_match: Optional[str] = Header(None)):
+    """
+    Generate one set of step definitions for several feature files. Steps shared between the
+    features get a single stub; features that fail to parse are reported and skipped.
+    """
+    step_index = _get_library(request.library) if request.library else None
+    etag = _steps_etag(request, step_index)
+    matched = matching_etag(if_none_match, etag)
+    if matched:
+        return not_modified(matched)
+    features, results = [], []
+    for index, source in enumerate(request.features):
+        name = source.name or f"feature {index + 1}"
+        try:
+            feature, cached = feature_cache.parse(source.content)
+        except ValueError as e:
+            results.append({"index": index, "name": name, "status": "error", "detail": str(e)})
+            continue
+        features.append(feature)
+        results.append({
+            "index": index,
+            "name": name,
+            "status": "success",
+            "feature": feature.name,
+            "scenarios": len(feature.scenarios) + sum(len(rule.scenarios) for rule in feature.rules),
+            "cached": cached
+        })
+
+    try:
+        generated = step_generator.generate_for_features(
+            features,
+            request.programming_language,
+            request.framework,
+            step_index,
+            request.pattern_kind
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    response.headers["ETag"] = etag
+    return {
+        "status": "success" if all(result["status"] == "success" for result in results) else "partial",
+        "features": results,
+        **generated
+    }
+
+@router.put("/step-libraries/{name}")
+async def register_step_library(name: str, request: StepLibraryRequest):
+    """
+    Register (or replace) a step library from regexes, cucumber expressions and behave parse
+    patterns. Patterns that do not compile are reported in errors and left out.
+    """
+    bindings, errors = await asyncio.to_thread(_compile, request)
+    index = await asyncio.to_thread(step_libraries.put, name, bindings)
+    return _library_summary(name, index, errors)
+
+@router.post("/step-libraries/{name}/sources")
+async def add_step_sources(name: str, files: List[UploadFile] = File(..., description="behave (.py), cucumber-js (.js, .ts) or cucumber-jvm (.java, .kt) step files")):
+    """
+    Scan step definition source files and add their steps, with file and line, to a library
+    """
+    sources = []
+    for file in files:
+        content = await conversion.read_upload(file)
+        sources.append((content.decode("utf-8", errors="replace"), file.filename))
+
+    def scan():
+        bindings, errors = [], []
+        for text, filename in sources:
+            found, failed = scan_step_sources(text, filename)
+            bindings.extend(found)
+            errors.extend(failed)
+        return bindings, errors
+
+    try:
+        bindings, errors = await asyncio.to_thread(scan)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    index = await asyncio.to_thread(step_libraries.extend, name, bindings)
+    return _library_summary(name, index, errors)
+
+@router.get("/step-libraries")
+async def list_step_libraries():
+    """
+    Registered step libraries and their sizes
+    """
+    libraries = []
+    for name in step_libraries.names():
+        index = step_libraries.get(name)
+        if index is not None:
+            libraries.append(_library_summary(name, index))
+    return {"libraries": libraries}
+
+@router.get("/step-libraries/{name}")
+async def get_step_library(name: str):
+    """
+    The step definitions of a library
+    """
+    index = _get_library(name)
+    return {**_library_summary(name, index), "definitions": [binding.to_dict() for binding in index.bindings]}
+
+@router.delete("/step-libraries/{name}")
+async def delete_step_library(name: str):
+    if not step_libraries.remove(name):
+        raise HTTPException(status_code=404, detail=f"Unknown step library: {name}")
+    return {"name": name, "deleted": True}
@@ -0,0 +1,337 @@
+"""
+Offline bulk conversion: turns a directory tree of requirement documents (PDF, DOCX, TXT) into
+feature files without going through the HTTP API.
+
+Documents are converted across worker processes, each loading the spaCy model once. A manifest
+in the output directory records the sha256 of every document, and the error of those that
+failed, together with a fingerprint of the pipeline code, templates, patterns, model and options;
+on the next run only new or changed documents are converted again, and the outputs of deleted
+ones are removed.
+Every file is written atomically, so an interrupted run never leaves a partial feature behind.
+
+    cd backend
+    python -m app.cli ../docs --out ../features --steps python
+"""
+from typing import Any, Dict, List, Optional
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from .core.config import settings
+from .services import pipeline
+from .services.document_parser import SENTENCE_DOC_TYPES
+from .services.fingerprint import output_fingerprint
+from .services.gherkin_generator import duplicate_comments
+from .services.gherkin_parser import parse_feature
+from .services.nlp_registry import nlp_registry
+from .services.step_definition_generator import StepDefinitionGenerator
+from .services.template_packs import FRAMEWORKS, PATTERN_KINDS, get_pack
+
+DOC_TYPES = ["BRD", "FRD", "User Story", "Test Case"]
+SUPPORTED_FORMATS = ("pdf", "docx", "txt")
+
+MANIFEST_NAME = ".bdd-manifest.json"
+MANIFEST_VERSION = 1
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as document:
+        for chunk in iter(lambda: document.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def tool_fingerprint(doc_type: Optional[str], outlines: bool) -> str:
+    """
+    Hash of everything besides a document that shapes its feature file: the pipeline code and
+    templates, the parser patterns (including pattern packs), the model and the conversion options
+    """
+    return output_fingerprint(manifest=MANIFEST_VERSION, doc_type=doc_type, outlines=outlines)
+
+
+def discover(source: Path, exclude: Optional[Path] = None) -> Dict[str, Path]:
+    """Supported documents under source by their POSIX path relative to it, skipping exclude"""
+    documents = {}
+    for directory, subdirectories, filenames in os.walk(source):
+        current = Path(directory)
+        subdirectories[:] = sorted(
+            name for name in subdirectories
+            if not name.startswith(".") and (exclude is None or (current / name).resolve() != exclude)
+        )
+        for filename in sorted(filenames):
+            if pipeline.file_format(filename) in SUPPORTED_FORMATS:
+                path = current / filename
+                documents[path.relative_to(source).as_posix()] = path
+    return documents
+
+
+def output_names(documents: List[str]) -> Dict[str, str]:
+    """
+    Feature file of each document: its path with a .feature extension, keeping the original
+    extension too where two documents of a directory share a name (spec.pdf, spec.docx)
+    """
+    stems: Dict[str, List[str]] = {}
+    for relative in documents:
+        stems.setdefault(relative.rsplit(".", 1)[0], []).append(relative)
+    return {
+        relative: f"{relative if len(siblings) > 1 else stem}.feature"
+        for stem, siblings in stems.items()
+        for relative in siblings
+    }
+
+
+def write_atomic(path: Path, content: str) -> None:
+    """Write through a temporary file in the same directory, renamed over the target"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(
+        "w", encoding="utf-8", dir=path.parent, prefix=f".{path.name}.", suffix=".tmp", delete=False
+    ) as temporary:
+        try:
+            temporary.write(content)
+            temporary.flush()
+            os.fsync(temporary.fileno())
+        except BaseException:
+            temporary.close()
+            os.unlink(temporary.name)
+            raise
+    os.replace(temporary.name, path)
+
+
+def load_manifest(path: Path) -> Dict[str, Any]:
+    try:
+        with open(path, encoding="utf-8") as manifest:
+            data = json.load(manifest)
+    except (OSError, ValueError):
+        return {"documents": {}}
+    return data if isinstance(data.get("documents"), dict) else {"documents": {}}
+
+
+def _init_worker(profiles: List[str]) -> None:
+    # One model per worker process, loaded before its first document
+    nlp_registry.warm_up(profiles)
+
+
+def convert_document(path: str, doc_type: Optional[str], outlines: bool) -> Dict[str, Any]:
+    """Extract, identify, parse and render one document; runs in a worker process"""
+    filename = os.path.basename(path)
+    if doc_type in SENTENCE_DOC_TYPES and pipeline.file_format(filename) == "pdf":
+        # Known requirement documents are parsed page by page, without holding their whole text
+        feature_content, duplicates = pipeline.convert_pdf_pages(path, filename.rsplit(".", 1)[0], doc_type, outlines)
+        return {"doc_type": doc_type, "feature_content": feature_content + duplicate_comments(duplicates)}
+
+    text, tables, _ = pipeline.extract_document(path, filename)
+    doc_type = doc_type or pipeline.doc_identifier.get_document_type(text)
+    if doc_type is None:
+        raise ValueError("Could not identify the document type; pass --doc-type")
+    parsed_content = pipeline.parse_document(text, doc_type, None, tables)
+    feature_content = pipeline.gherkin_generator.generate_feature(
+        parsed_content, feature_name=filename.rsplit(".", 1)[0], doc_type=doc_type, outlines=outlines
+    )
+    # The feature file is all a build leaves, so it lists the near-duplicates merged into it
+    feature_content += duplicate_comments(parsed_content.get("duplicates", {}))
+    return {"doc_type": doc_type, "feature_content": feature_content}
+
+
+def render_steps_file(result: Dict[str, Any]) -> str:
+    """One step definition module from the output of StepDefinitionGenerator"""
+    parts = ["\n".join(result["imports"])]
+    if result.get("setup_code"):
+        parts.append(result["setup_code"])
+    parts.extend(result["step_definitions"].values())
+    if result.get("footer"):
+        parts.append(result["footer"])
+    # Only blank lines are trimmed: stubs of a class body keep their indentation
+    return "\n\n\n".join(part.strip("\n") for part in parts) + "\n"
+
+
+def build(
+    source: Path,
+    out: Path,
+    doc_type: Optional[str] = None,
+    outlines: bool = False,
+    steps: Optional[str] = None,
+    framework: Optional[str] = None,
+    pattern_kind: Optional[str] = None,
+    workers: int = 0,
+    force: bool = False,
+    manifest_path: Optional[Path] = None,
+    log=print
+) -> Dict[str, Any]:
+    """
+    Convert the new and changed documents under source into feature files under out, remove the
+    features of deleted documents and, with steps, regenerate the shared step definitions.
+    Returns counts of converted, unchanged, removed and failed documents plus the failures, and
+    the feature files step generation could not read.
+
+    A document that fails is recorded in the manifest with its error and is not tried again until
+    it changes; it is still reported as failed on every run. Its feature file from an earlier
+    version, if any, is removed rather than left behind as if it were current.
+    """
+    start = time.perf_counter()
+    # An unknown language or framework is reported before any document is converted
+    steps_pack = get_pack(steps, framework) if steps else None
+    out.mkdir(parents=True, exist_ok=True)
+    manifest_path = manifest_path or out / MANIFEST_NAME
+    documents = discover(source, exclude=out.resolve())
+    outputs = output_names(list(documents))
+
+    fingerprint = tool_fingerprint(doc_type, outlines)
+    manifest = load_manifest(manifest_path)
+    # Entries of another tool version or other options say nothing about the current outputs
+    previous = manifest["documents"] if manifest.get("tool") == fingerprint and not force else {}
+
+    entries: Dict[str, Dict[str, Any]] = {}
+    stale: List[str] = []
+    failures: List[Dict[str, str]] = []
+    for relative, path in documents.items():
+        sha256 = file_sha256(path)
+        entry = previous.get(relative)
+        if entry and entry.get("sha256") == sha256 and entry.get("feature") == outputs[relative] and (
+            "error" in entry or (out / outputs[relative]).exists()
+        ):
+            entries[relative] = entry
+            if "error" in entry:
+                failures.append({"document": relative, "error": entry["error"]})
+                log(f"failed    {relative}: {entry['error']} (unchanged since it failed)", file=sys.stderr)
+        else:
+            entries[relative] = {"sha256": sha256, "feature": outputs[relative]}
+            stale.append(relative)
+
+    # Features no current document produces any more: deleted or renamed documents
+    removed = 0
+    current_features = set(outputs.values())
+    for entry in manifest["documents"].values():
+        feature = entry.get("feature")
+        if feature and feature not in current_features and (out / feature).is_file():
+            (out / feature).unlink()
+            removed += 1
+
+    unchanged = len(documents) - len(stale) - len(failures)
+    converted = 0
+
+    def finish(relative: str, result: Optional[Dict[str, Any]], error: Optional[BaseException]) -> None:
+        nonlocal converted, removed
+        if error is not None:
+            entries[relative]["error"] = str(error)
+            failures.append({"document": relative, "error": str(error)})
+            log(f"failed    {relative}: {error}", file=sys.stderr)
+            # The feature of an earlier version of the document no longer matches it
+            if (out / outputs[relative]).is_file():
+                (out / outputs[relative]).unlink()
+                removed += 1
+            return
+        write_atomic(out / outputs[relative], result["feature_content"])
+        entries[relative]["doc_type"] = result["doc_type"]
+        converted += 1
+        log(f"converted {relative} -> {outputs[relative]}")
+
+    try:
+        if workers > 0 and len(stale) > 1:
+            with ProcessPoolExecutor(
+                max_workers=min(workers, len(stale)),
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(settings.nlp_warmup_profiles,)
+            ) as pool:
+                futures = {
+                    pool.submit(convert_document, str(documents[relative]), doc_type, outlines): relative
+                    for relative in stale
+                }
+                for future in as_completed(futures):
+                    error = future.exception()
+                    finish(futures[future], None if error else future.result(), error)
+        else:
+            for relative in stale:
+                try:
+                    result = convert_document(str(documents[relative]), doc_type, outlines)
+                except Exception as e:
+                    finish(relative, None, e)
+                else:
+                    finish(relative, result, None)
+    finally:
+        # Saved even when interrupted, so the documents converted so far are not redone
+        steps_entry = manifest.get("steps")
+        write_atomic(manifest_path, json.dumps(
+            {"version": MANIFEST_VERSION, "tool": fingerprint, "documents": entries, "steps": steps_entry},
+            indent=2,
+            sort_keys=True
+        ) + "\n")
+
+    step_failures: List[Dict[str, str]] = []
+    if steps:
+        options = {"language": steps, "framework": framework, "pattern_kind": pattern_kind, "path": steps_pack.steps_file}
+        if converted or removed or steps_entry != options or not (out / options["path"]).exists():
+            features = []
+            for relative in sorted(entries, key=lambda name: entries[name]["feature"]):
+                if "error" in entries[relative]:
+                    continue
+                try:
+                    features.append(parse_feature((out / entries[relative]["feature"]).read_text(encoding="utf-8")))
+                except (OSError, ValueError) as e:
+                    step_failures.append({"document": relative, "error": f"Could not read its feature file: {e}"})
+                    log(f"skipped   {entries[relative]['feature']}: {e}", file=sys.stderr)
+            result = StepDefinitionGenerator().generate_for_features(features, steps, framework, None, pattern_kind)
+            write_atomic(out / options["path"], render_steps_file(result))
+            if steps_entry and steps_entry.get("path") != options["path"] and (out / steps_entry["path"]).is_file():
+                (out / steps_entry["path"]).unlink()
+            log(f"wrote     {options['path']} ({len(result['step_definitions'])} step definitions)")
+            manifest_data = json.loads(manifest_path.read_text(encoding="utf-8"))
+            manifest_data["steps"] = options
+            write_atomic(manifest_path, json.dumps(manifest_data, indent=2, sort_keys=True) + "\n")
+
+    return {
+        "documents": len(documents),
+        "converted": converted,
+        "unchanged": unchanged,
+        "removed": removed,
+        "failed": len(failures),
+        "failures": failures,
+        "step_failures": step_failures,
+        "seconds": round(time.perf_counter() - start, 3)
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    arg_parser = argparse.ArgumentParser(prog="python -m app.cli", description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("source", type=Path, help="Directory of PDF, DOCX and TXT documents, searched recursively")
+    arg_parser.add_argument("--out", type=Path, required=True, help="Directory the feature files are written to")
+    arg_parser.add_argument("--doc-type", choices=DOC_TYPES, help="Type of every document (default: identified per document)")
+    arg_parser.add_argument("--outlines", action="store_true", help="Fold scenarios that differ only in their values into Scenario Outlines")
+    arg_parser.add_argument("--steps", choices=sorted(FRAMEWORKS), help="Also generate step definitions for all features in this language")
+    default_frameworks = ", ".join(f"{frameworks[0]} for {language}" for language, frameworks in FRAMEWORKS.items())
+    arg_parser.add_argument("--framework", help=f"Step definition framework (default: {default_frameworks})")
+    arg_parser.add_argument("--pattern-kind", choices=sorted({kind for kinds in PATTERN_KINDS.values() for kind in kinds}))
+    arg_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes; 0 converts in this process")
+    arg_parser.add_argument("--manifest", type=Path, help=f"Manifest file (default: OUT/{MANIFEST_NAME})")
+    arg_parser.add_argument("--force", action="store_true", help="Convert every document, ignoring the manifest")
+    args = arg_parser.parse_args(argv)
+
+    if not args.source.is_dir():
+        arg_parser.error(f"{args.source} is not a directory")
+    try:
+        summary = build(
+            args.source, args.out, args.doc_type, args.outlines, args.steps, args.framework,
+            args.pattern_kind, args.workers, args.force, args.manifest
+        )
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    print(
+        f"{summary['converted']} converted, {summary['unchanged']} unchanged, {summary['removed']} removed, "
+        f"{summary['failed']} failed in {summary['seconds']} s"
+        + (f"; {len(summary['step_failures'])} feature files left out of the step definitions" if summary["step_failures"] else "")
+    )
+    return 1 if summary["failed"] or summary["step_failures"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+import os
+import tempfile
+
+
+def _env_int(name: str, default: int) -> int:
+    """Read an integer setting from the environment"""
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def _env_float(name: str, default: float) -> float:
+    """Read a float setting from the environment"""
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def _env_bool(name: str, default: bool = False) -> bool:
+    """Read a boolean setting (1/true/yes/on) from the environment"""
+    value = os.getenv(name)
+    return value.strip().lower() in ("1", "true", "yes", "on") if value else default
+
+
+def _env_list(name: str, default: str) -> list:
+    """Read a comma-separated list setting from the environment"""
+    return [item.strip() for item in os.getenv(name, default).split(",") if item.strip()]
+
+
+class Settings:
+    """Runtime settings, overridable through BDD_* environment variables"""
+
+    def __init__(self):
+        # Upper bound for the extracted-document cache shared by /analyze and the conversion endpoints.
+        # Like sessions and step libraries it is per process: document_ids need one server process
+        # (or sticky routing), unlike jobs, which live in the job store
+        self.document_cache_max_bytes = _env_int("BDD_DOCUMENT_CACHE_MAX_BYTES", 256 * 1024 * 1024)
+        # Uploads larger than this are rejected with 413; those past the spool threshold are written
+        # to a temporary file in upload_dir instead of being held in memory, unless Starlette already
+        # wrote them to its own temporary file, which is reused
+        self.max_upload_bytes = _env_int("BDD_MAX_UPLOAD_BYTES", 200 * 1024 * 1024)
+        self.upload_spool_bytes = _env_int("BDD_UPLOAD_SPOOL_BYTES", 1024 * 1024)
+        self.upload_dir = os.getenv("BDD_UPLOAD_DIR") or None
+        # Request bodies larger than this are refused before they are read; batch uploads count in full
+        self.max_request_bytes = _env_int("BDD_MAX_REQUEST_BYTES", self.max_upload_bytes + 1024 * 1024)
+        # Responses smaller than this are sent uncompressed even when the client accepts gzip or br
+        self.compression_min_bytes = _env_int("BDD_COMPRESSION_MIN_BYTES", 1024)
+        # spaCy model shared by all NLP profiles, and the profiles loaded in the background at startup
+        self.spacy_model = os.getenv("BDD_SPACY_MODEL", "en_core_web_sm")
+        self.nlp_warmup_profiles = _env_list("BDD_NLP_WARMUP", "sentences")
+        # Also import the PDF, template and job-store libraries in the background after startup
+        self.import_warmup = _env_bool("BDD_IMPORT_WARMUP", True)
+        # Documents longer than this are classified by /analyze from a sample; 0 always scans everything
+        self.identify_sample_chars = _env_int("BDD_IDENTIFY_SAMPLE_CHARS", 256 * 1024)
+        # Requirement and scenario sentences at least this similar (Jaccard of character shingles)
+        # to an earlier one are merged into it; 0 (the default) keeps near-duplicates
+        self.duplicate_threshold = _env_float("BDD_DUPLICATE_THRESHOLD", 0.0)
+        # Word positions in which steps may differ and still share a step definition or an outline;
+        # 0 (the default) only folds steps that differ in numbers and quoted strings
+        self.step_varying_words = _env_int("BDD_STEP_VARYING_WORDS", 0)
+        # Custom JSON/YAML pattern packs merged into DocumentParser's built-in patterns
+        self.pattern_packs = _env_list("BDD_PATTERN_PACKS", "")
+        # Process pool for extraction/NLP stages; 0 workers runs stages in a thread instead
+        self.executor_workers = _env_int("BDD_EXECUTOR_WORKERS", os.cpu_count() or 1)
+        # Without a pool the thread still takes one stage at a time, so the queue is sized as for one worker
+        self.executor_queue_size = _env_int("BDD_EXECUTOR_QUEUE_SIZE", 2 * max(self.executor_workers, 1))
+        self.executor_retry_after = _env_int("BDD_EXECUTOR_RETRY_AFTER", 5)
+        # Inputs up to this size skip the pool and run in a thread; they still hold the GIL while they
+        # run, so the default sends everything to the workers
+        self.executor_inline_max_bytes = _env_int("BDD_EXECUTOR_INLINE_MAX_BYTES", 0)
+        # Priority lanes in front of the executor: interactive tasks get a free worker before bulk ones
+        # (/conversion/convert batches and /jobs), and each lane uses at most this many workers at once.
+        # By default one worker is kept free of bulk work
+        self.lane_concurrency = {
+            "interactive": _env_int("BDD_INTERACTIVE_CONCURRENCY", max(self.executor_workers, 1)),
+            "bulk": _env_int("BDD_BULK_CONCURRENCY", max(self.executor_workers - 1, 1)),
+        }
+        # Clients share a lane by weight (default 1), identified by this request header or else their address
+        self.client_header = os.getenv("BDD_CLIENT_HEADER", "X-API-Key")
+        self.client_weights = {
+            client: float(weight)
+            for client, weight in (item.rsplit("=", 1) for item in _env_list("BDD_CLIENT_WEIGHTS", ""))
+        }
+        # Stage tasks a single /conversion/convert batch may have in flight at once
+        self.batch_concurrency = _env_int("BDD_BATCH_CONCURRENCY", max(self.executor_workers, 1))
+        # PDFs with at least this many selected pages are split into page runs across the workers
+        self.pdf_parallel_min_pages = _env_int("BDD_PDF_PARALLEL_MIN_PAGES", 40)
+        # Characters of document text parsed per task when a feature file is streamed
+        self.stream_chunk_chars = _env_int("BDD_STREAM_CHUNK_CHARS", 64 * 1024)
+        # Templates compiled into Python modules by "python -m app.services.template_packs DIR", and a
+        # directory keeping the bytecode of templates compiled at runtime
+        self.template_modules = os.getenv("BDD_TEMPLATE_MODULES") or None
+        self.template_cache_dir = os.getenv("BDD_TEMPLATE_CACHE_DIR") or None
+        # Background conversion jobs (/api/jobs): result store, time to live once finished and concurrency cap
+        self.job_store_url = os.getenv("BDD_JOB_STORE_URL", "sqlite:///jobs.db")
+        self.job_ttl = _env_float("BDD_JOB_TTL", 3600.0)
+        # Unfinished jobs are touched by their server a few times within this many seconds; one that was
+        # not was left behind by a crash or restart and fails
+        self.job_stale_after = _env_float("BDD_JOB_STALE_AFTER", 120.0)
+        self.job_concurrency = _env_int("BDD_JOB_CONCURRENCY", max(self.executor_workers, 1))
+        self.job_queue_size = _env_int("BDD_JOB_QUEUE_SIZE", 100)
+        # Incremental conversion sessions kept per server process (not shared with other processes), and their idle time to live
+        self.session_max = _env_int("BDD_SESSION_MAX", 64)
+        self.session_ttl = _env_float("BDD_SESSION_TTL", 1800.0)
+        # Parsed feature files kept for /generate-steps, keyed by a hash of their text
+        self.gherkin_cache_size = _env_int("BDD_GHERKIN_CACHE_SIZE", 256)
+        # On-demand request profiling: requests sending "X-BDD-Profile: <token>" are profiled
+        # when enabled; without a token, only requests from loopback addresses are
+        self.profiling_enabled = _env_bool("BDD_PROFILING")
+        self.profiling_token = os.getenv("BDD_PROFILING_TOKEN", "")
+        self.profile_dir = os.getenv("BDD_PROFILE_DIR", os.path.join(tempfile.gettempdir(), "bdd-profiles"))
+        self.profile_keep = _env_int("BDD_PROFILE_KEEP", 20)
+        self.stage_timeouts = {
+            "extract": _env_float("BDD_TIMEOUT_EXTRACT", 120.0),
+            "segment": _env_float("BDD_TIMEOUT_SEGMENT", 60.0),
+            "identify": _env_float("BDD_TIMEOUT_IDENTIFY", 30.0),
+            "parse": _env_float("BDD_TIMEOUT_PARSE", 120.0),
+        }
+
+
+settings = Settings()
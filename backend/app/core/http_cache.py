@@ -0,0 +1,154 @@
+from typing import Dict, Optional
+from functools import lru_cache
+from fastapi import Response
+from starlette.datastructures import Headers, MutableHeaders
+import zlib
+
+# Content codings the server can produce, preferred first when the client rates them equally
+CODINGS = ("br", "gzip")
+
+# Media types worth compressing; event streams are left alone so each event reaches the client at once
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+UNCOMPRESSED_TYPES = ("text/event-stream",)
+
+
+def entity_tag(fingerprint: str) -> str:
+    """Strong entity tag of a response from the hex fingerprint of everything that determines it"""
+    return f'"{fingerprint[:32]}"'
+
+
+def matching_etag(if_none_match: Optional[str], etag: str) -> Optional[str]:
+    """
+    The tag of an If-None-Match header that matches etag, if any. Tags are compared weakly, as
+    If-None-Match requires, and the coding suffix CompressionMiddleware adds is ignored, so a client
+    holding the gzip or br representation matches too.
+    """
+    if not if_none_match:
+        return None
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return etag
+        tag = candidate[2:] if candidate.startswith("W/") else candidate
+        base = tag.rsplit("-", 1)[0] + '"' if tag.endswith(tuple(f'-{coding}"' for coding in CODINGS)) else tag
+        if base == etag:
+            return tag
+    return None
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Vary": "Accept-Encoding"})
+
+
+@lru_cache(maxsize=None)
+def _brotli():
+    """The brotli module, or None when Brotli is not installed"""
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def negotiate_coding(accept_encoding: str) -> Optional[str]:
+    """The coding to send for an Accept-Encoding header: the highest-rated one available, br before gzip on a tie"""
+    ratings: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, parameters = item.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        parameter, _, value = parameters.partition("=")
+        if parameter.strip().lower() == "q":
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        ratings[name] = quality
+
+    available = [coding for coding in CODINGS if coding != "br" or _brotli() is not None]
+    rated = [(ratings.get(coding, ratings.get("*", 0.0)), -position, coding) for position, coding in enumerate(available)]
+    quality, _, coding = max(rated, default=(0.0, 0, None))
+    return coding if quality > 0 else None
+
+
+class _Encoder:
+    """Incremental gzip or br compressor; every chunk is flushed so streamed bodies stay streamed"""
+
+    def __init__(self, coding: str):
+        self.coding = coding
+        if coding == "br":
+            self._compressor = _brotli().Compressor(quality=4)
+        else:
+            self._compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        if self.coding == "br":
+            return self._compressor.process(data) + (self._compressor.finish() if final else self._compressor.flush())
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+def _compressible(status: int, headers: MutableHeaders) -> bool:
+    media_type = headers.get("content-type", "").split(";")[0].strip().lower()
+    return (
+        status not in (204, 304)
+        and "content-encoding" not in headers
+        and media_type.startswith(COMPRESSIBLE_TYPES)
+        and not media_type.startswith(UNCOMPRESSED_TYPES)
+    )
+
+
+class CompressionMiddleware:
+    """
+    Compress JSON and text responses with the best coding the client accepts (br when Brotli is
+    installed, else gzip). Bodies sent in one piece are compressed from min_bytes on; streamed bodies
+    always are, chunk by chunk. A strong ETag gets the coding as suffix, since the compressed bytes
+    are a different representation.
+    """
+
+    def __init__(self, app, min_bytes: int):
+        self.app = app
+        self.min_bytes = min_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        coding = negotiate_coding(Headers(scope=scope).get("accept-encoding", ""))
+        start = None
+        encoder: Optional[_Encoder] = None
+
+        async def compressing_send(message):
+            nonlocal start, encoder
+            if message["type"] == "http.response.start":
+                # Held back until the first body chunk shows whether the body is worth compressing
+                start = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start is not None:
+                headers = MutableHeaders(scope=start)
+                if _compressible(start["status"], headers):
+                    headers.add_vary_header("Accept-Encoding")
+                    if coding and (more_body or len(body) >= self.min_bytes):
+                        encoder = _Encoder(coding)
+                        headers["Content-Encoding"] = coding
+                        if "content-length" in headers:
+                            del headers["content-length"]
+                        etag = headers.get("etag")
+                        if etag and not etag.startswith("W/"):
+                            headers["ETag"] = f'{etag[:-1]}-{coding}"'
+                await send(start)
+                start = None
+
+            if encoder is not None:
+                message = {**message, "body": encoder.compress(body, final=not more_body)}
+            await send(message)
+
+        await self.app(scope, receive, compressing_send)
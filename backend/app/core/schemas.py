@@ -11,19 +11,54 @@ class FeatureFileResponse(BaseModel):
     suggested_steps: Dict[str, Any]
     document_type: str
     file_format: str
+    document_id: Optional[str] = None  # handle of the cached extraction
 
 class DocumentAnalysisResponse(BaseModel):
     filename: str
     suggested_type: Optional[str]
     confidence_scores: Dict[str, float]
     file_format: Optional[str]
+    document_id: Optional[str] = None  # pass to the conversion endpoints to skip re-upload
+    sampled: bool = False  # scores were computed from a sample of a large document
+    sample_sufficient: Optional[bool] = None  # whether the sample alone was decisive
+
+class SessionUpdateRequest(BaseModel):
+    text: str  # full text of the edited document
+    base_version: Optional[int] = None  # version the client's feature file is at; a mismatch answers 409
 
 class StepDefinitionRequest(BaseModel):
     feature_content: str
-    programming_language: str  # python, java, javascript, etc.
-    framework: Optional[str] = None  # behave, cucumber, jest, etc.
+    programming_language: str  # python, javascript, typescript or java
+    framework: Optional[str] = None  # behave or pytest-bdd (python), cucumber (javascript, typescript), junit (java)
+    library: Optional[str] = None  # registered step library to reuse existing definitions from
+    pattern_kind: Optional[str] = None  # regex (the default), parse (behave, pytest-bdd) or cucumber (cucumber expressions)
 
 class StepDefinitionResponse(BaseModel):
     step_definitions: Dict[str, str]  # step pattern -> implementation
     imports: list[str]  # required imports
-    setup_code: Optional[str] = None  # any necessary setup code
\ No newline at end of file
+    setup_code: Optional[str] = None  # any necessary setup code
+    footer: Optional[str] = None  # closes what setup_code opened, e.g. the Java class
+    matched_steps: List[Dict[str, Any]] = []  # steps bound by the step library, with their binding
+    unmatched_steps: List[str] = []  # steps that got a new stub
+
+class FeatureSource(BaseModel):
+    content: str
+    name: Optional[str] = None  # e.g. the feature file name, echoed in the results
+
+class StepDefinitionBatchRequest(BaseModel):
+    features: List[FeatureSource]
+    programming_language: str
+    framework: Optional[str] = None
+    library: Optional[str] = None
+    pattern_kind: Optional[str] = None
+
+class StepPattern(BaseModel):
+    pattern: str
+    kind: str = "regex"  # regex, cucumber (cucumber expression) or parse (behave's default matcher)
+    step_type: Optional[str] = None  # given, when, then; None matches any keyword
+    source: Optional[str] = None  # file defining the step
+    line: Optional[int] = None
+    function: Optional[str] = None
+
+class StepLibraryRequest(BaseModel):
+    steps: List[StepPattern]
\ No newline at end of file
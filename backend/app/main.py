@@ -1,11 +1,65 @@
-from fastapi import FastAPI
+from typing import Tuple
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from pathlib import Path
+import importlib
+import logging
+import threading
+import time
 from .api import api_router
+from .services.nlp_registry import nlp_registry
+from .services.executor import stage_executor
+from .services.job_runner import job_runner
+from .services.metrics import pipeline_metrics
+from .services.profiler import profiling_allowed, request_profiler
+from .services.scheduler import stage_scheduler
+from .services import template_packs
+from .core.config import settings
+from .core.http_cache import CompressionMiddleware
+
+logger = logging.getLogger(__name__)
+
+class RequestSizeLimit:
+    """
+    Refuse request bodies over max_bytes with 413 before they are read: at once when Content-Length
+    declares more, or as soon as that many bytes of a chunked body have arrived
+    """
+
+    def __init__(self, app, max_bytes: int):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.max_bytes:
+            await self.app(scope, receive, send)
+            return
+
+        detail = f"The request body is larger than the {self.max_bytes} byte limit"
+        declared = dict(scope["headers"]).get(b"content-length", b"")
+        if declared.isdigit() and int(declared) > self.max_bytes:
+            await JSONResponse({"detail": detail}, status_code=413)(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # Raised into the body parser, which hands HTTP errors on as responses
+                    raise HTTPException(status_code=413, detail=detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
 
 app = FastAPI(title="BDD Utility API", version="1.0.0")
 
+app.add_middleware(RequestSizeLimit, max_bytes=settings.max_request_bytes)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -15,6 +69,54 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# gzip/br for JSON and text responses; conversion results are large and compress well
+app.add_middleware(CompressionMiddleware, min_bytes=settings.compression_min_bytes)
+
+# Routes whose stage tasks run in the bulk lane: batch conversions. Background jobs are how the
+# UI converts a document, so they stay interactive unless the caller asks for the bulk lane.
+BULK_ROUTES = ("/api/conversion/convert",)
+
+def _request_priority(request: Request) -> Tuple[str, str]:
+    """The scheduler lane and client of a request; clients may move their own requests to the bulk lane"""
+    bulk = request.url.path in BULK_ROUTES or request.headers.get("X-BDD-Priority", "").lower() == "bulk"
+    client = request.headers.get(settings.client_header) or (request.client.host if request.client else "")
+    return "bulk" if bulk else "interactive", client
+
+@app.middleware("http")
+async def schedule_request(request: Request, call_next):
+    """Schedule the stage tasks of the request in its priority lane, sharing it fairly with other clients"""
+    with stage_scheduler.priority(*_request_priority(request)):
+        return await call_next(request)
+
+def _profiling_requested(request: Request) -> bool:
+    if not settings.profiling_enabled or "X-BDD-Profile" not in request.headers:
+        return False
+    # The header doubles as the credential of the debug routes, whose requests are not worth profiling
+    if request.url.path.startswith("/api/debug/"):
+        return False
+    return profiling_allowed(request.headers["X-BDD-Profile"], request.client.host if request.client else None)
+
+@app.middleware("http")
+async def time_request(request: Request, call_next):
+    """Add a Server-Timing header with the pipeline stages of the request, profiling it if asked to"""
+    requested = _profiling_requested(request)
+    profile = request_profiler.start() if requested else None
+    start = time.perf_counter()
+    try:
+        with pipeline_metrics.track_request() as timings:
+            response = await call_next(request)
+    finally:
+        profile_id = request_profiler.stop(profile) if profile is not None else None
+
+    # Streamed bodies are still being produced here; their header covers the time to first byte
+    response.headers["Server-Timing"] = pipeline_metrics.server_timing(timings, time.perf_counter() - start)
+    if profile_id:
+        response.headers["X-BDD-Profile-Id"] = profile_id
+        response.headers["X-BDD-Profile-Url"] = f"/api/debug/profiles/{profile_id}"
+    elif requested:
+        response.headers["X-BDD-Profile"] = "busy"
+    return response
+
 # Mount static files directory for uploaded files
 static_path = Path(__file__).parent / "static"
 static_path.mkdir(exist_ok=True)
@@ -23,6 +125,43 @@ app.mount("/static", StaticFiles(directory=str(static_path)), name="static")
 # Include API router
 app.include_router(api_router)
 
+# Libraries the routes import on first use; importing them at startup would delay binding
+WARM_UP_MODULES = ("PyPDF2", "jinja2", "sqlalchemy.orm")
+
+def _warm_up():
+    if settings.import_warmup:
+        for module in WARM_UP_MODULES:
+            try:
+                importlib.import_module(module)
+            except ImportError as e:
+                logger.error(f"Import warm-up of {module} failed: {str(e)}")
+        try:
+            template_packs.warm_up()
+        except Exception as e:
+            logger.error(f"Template warm-up failed: {str(e)}")
+    if not settings.nlp_warmup_profiles:
+        return
+    try:
+        nlp_registry.warm_up(settings.nlp_warmup_profiles)
+    except Exception as e:
+        logger.error(f"NLP warm-up failed: {str(e)}")
+
+@app.on_event("startup")
+async def start_warm_up():
+    # Load libraries and models in the background so the worker starts serving (and answering probes) immediately
+    if settings.import_warmup or settings.nlp_warmup_profiles:
+        threading.Thread(target=_warm_up, name="warm-up", daemon=True).start()
+
+@app.on_event("shutdown")
+async def stop_stage_executor():
+    job_runner.shutdown()
+    stage_executor.shutdown()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Pipeline stage metrics in the Prometheus text format"""
+    return PlainTextResponse(pipeline_metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/")
 async def root():
     return {
@@ -30,6 +169,9 @@ async def root():
         "docs_url": "/docs",
         "endpoints": [
             {"path": "/api/convert-to-feature", "method": "POST", "description": "Convert document to feature file"},
-            {"path": "/api/generate-steps", "method": "POST", "description": "Generate step definitions"}
+            {"path": "/api/generate-steps", "method": "POST", "description": "Generate step definitions"},
+            {"path": "/api/jobs", "method": "POST", "description": "Queue a conversion job and follow its progress"},
+            {"path": "/api/health/ready", "method": "GET", "description": "Readiness of the NLP models"},
+            {"path": "/metrics", "method": "GET", "description": "Per-stage pipeline metrics (Prometheus format)"}
         ]
     }
\ No newline at end of file
@@ -0,0 +1,149 @@
+from typing import Dict, Any, List, Optional, Tuple
+from collections import OrderedDict
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+import asyncio
+import hashlib
+import threading
+import time
+import uuid
+from .gherkin_generator import GherkinGenerator, SCENARIO_GROUPS
+from ..core.config import settings
+
+
+@dataclass
+class SectionResult:
+    """Parse result of one section and its scenarios, rendered, per scenario group"""
+    parsed: Dict[str, Any]
+    scenarios: List[List[str]]
+
+
+def fingerprint(section: str) -> str:
+    return hashlib.blake2b(section.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class ConversionSession:
+    """
+    Live-preview state of one document: the fingerprints of its sections, their parse results
+    and the feature file assembled from them. Each update re-parses only the sections whose
+    fingerprint is new and answers with a patch against the previous feature file.
+    """
+
+    def __init__(self, session_id: str, doc_type: str, feature_name: str, generator: GherkinGenerator):
+        self.session_id = session_id
+        self.doc_type = doc_type
+        self.feature_name = feature_name
+        self.generator = generator
+        self.version = 0
+        self.lock = asyncio.Lock()
+        self.last_used = time.monotonic()
+        self._fingerprints: List[str] = []
+        self._results: Dict[str, SectionResult] = {}
+        # The feature file as [header, scenario, scenario, ...]; concatenated it is the file
+        self._blocks: List[str] = []
+
+    @property
+    def feature_content(self) -> str:
+        return "".join(self._blocks)
+
+    @property
+    def section_count(self) -> int:
+        return len(self._fingerprints)
+
+    def plan(self, sections: List[str]) -> Tuple[List[str], Dict[str, str]]:
+        """Fingerprint the sections of a new revision and return those that need parsing"""
+        fingerprints = [fingerprint(section) for section in sections]
+        missing = {
+            key: section for key, section in zip(fingerprints, sections) if key not in self._results
+        }
+        return fingerprints, missing
+
+    def apply(self, fingerprints: List[str], parsed: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Make a planned revision current, given the parse results of its missing sections, and return
+        the patch from the previous feature file: a list of {"offset", "delete", "insert"} edits in
+        ascending offset order, with offsets into the previous file.
+        """
+        results = {}
+        for key in fingerprints:
+            result = self._results.get(key) or results.get(key)
+            if result is None:
+                groups = self.generator.build_scenario_groups(parsed[key], self.doc_type)
+                result = SectionResult(
+                    parsed=parsed[key],
+                    scenarios=[[self.generator.render_scenario(scenario) for scenario in group] for group in groups]
+                )
+            results[key] = result
+
+        blocks = [self._blocks[0] if self._blocks else self.generator.render_feature(self.feature_name, self.doc_type, [])]
+        for group in range(len(SCENARIO_GROUPS[self.doc_type])):
+            for key in fingerprints:
+                blocks.extend(results[key].scenarios[group])
+
+        patch = self._diff(self._blocks, blocks) if self._blocks else [{"offset": 0, "delete": 0, "insert": "".join(blocks)}]
+        self._fingerprints, self._results, self._blocks = fingerprints, results, blocks
+        self.version += 1
+        return patch
+
+    @staticmethod
+    def _diff(old: List[str], new: List[str]) -> List[Dict[str, Any]]:
+        # Unchanged sections keep their rendered strings, so the common prefix and suffix
+        # are found by identity; only the middle goes through the sequence matcher
+        prefix = 0
+        while prefix < min(len(old), len(new)) and old[prefix] is new[prefix]:
+            prefix += 1
+        suffix = 0
+        while suffix < min(len(old), len(new)) - prefix and old[-1 - suffix] is new[-1 - suffix]:
+            suffix += 1
+
+        offset = sum(len(block) for block in old[:prefix])
+        matcher = SequenceMatcher(None, old[prefix:len(old) - suffix], new[prefix:len(new) - suffix], autojunk=False)
+        patch = []
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            deleted = sum(len(block) for block in old[prefix + i1:prefix + i2])
+            if tag != "equal":
+                patch.append({"offset": offset, "delete": deleted, "insert": "".join(new[prefix + j1:prefix + j2])})
+            offset += deleted
+        return patch
+
+
+class SessionStore:
+    """In-process LRU of conversion sessions; sessions idle for longer than ttl seconds expire"""
+
+    def __init__(self, max_sessions: int, ttl: float):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._sessions: "OrderedDict[str, ConversionSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self, doc_type: str, feature_name: str, generator: GherkinGenerator) -> ConversionSession:
+        session = ConversionSession(uuid.uuid4().hex, doc_type, feature_name, generator)
+        with self._lock:
+            self._sessions[session.session_id] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return session
+
+    def get(self, session_id: str) -> Optional[ConversionSession]:
+        """Return a live session and mark it as recently used"""
+        now = time.monotonic()
+        with self._lock:
+            # The least recently used sessions come first, so expired ones are at the front
+            while self._sessions:
+                oldest = next(iter(self._sessions.values()))
+                if now - oldest.last_used <= self.ttl:
+                    break
+                self._sessions.popitem(last=False)
+
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.last_used = now
+                self._sessions.move_to_end(session_id)
+            return session
+
+    def remove(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+
+conversion_sessions = SessionStore(settings.session_max, settings.session_ttl)
@@ -0,0 +1,103 @@
+from typing import Dict, Any, List, Optional, Tuple
+from collections import OrderedDict
+from dataclasses import dataclass, field
+import sys
+import threading
+
+
+@dataclass
+class CachedDocument:
+    """Extracted text of an uploaded document plus everything derived from it"""
+    document_id: str
+    filename: str
+    file_format: str
+    text: str
+    tables: Optional[List[Dict[str, Any]]] = None  # DOCX table rows with their span in text
+    headings: Optional[List[Dict[str, Any]]] = None  # DOCX heading paragraphs / PDF bookmarks with their offset in text
+    sentences: Optional[List[Tuple[int, int]]] = None
+    type_scores: Optional[Dict[str, float]] = None
+    suggested_type: Optional[str] = None
+    type_sampled: bool = False
+    type_sample_sufficient: Optional[bool] = None
+    parsed: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    size: int = 0
+
+
+class DocumentCache:
+    """Content-addressed LRU cache of extracted documents, bounded by total size in bytes"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries: "OrderedDict[str, CachedDocument]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(content_sha256: Any, file_format: str) -> str:
+        """Derive the document handle from the sha256 of the raw upload bytes (hashed while spooling) and their format"""
+        digest = content_sha256.copy()
+        digest.update(file_format.encode())
+        return digest.hexdigest()
+
+    def get(self, document_id: str) -> Optional[CachedDocument]:
+        """Return the cached document and mark it as recently used"""
+        with self._lock:
+            entry = self._entries.get(document_id)
+            if entry is not None:
+                self._entries.move_to_end(document_id)
+            return entry
+
+    def put(self, entry: CachedDocument) -> CachedDocument:
+        """Insert (or replace) an entry and evict least recently used ones over the size bound"""
+        with self._lock:
+            previous = self._entries.pop(entry.document_id, None)
+            if previous is not None:
+                self.total_bytes -= previous.size
+            entry.size = self._estimate_size(entry)
+            self._entries[entry.document_id] = entry
+            self.total_bytes += entry.size
+            self._evict()
+            return entry
+
+    def update(self, entry: CachedDocument, **fields: Any) -> CachedDocument:
+        """Attach derived results to an entry and re-account its size"""
+        for name, value in fields.items():
+            setattr(entry, name, value)
+        with self._lock:
+            if self._entries.get(entry.document_id) is entry:
+                self.total_bytes -= entry.size
+                entry.size = self._estimate_size(entry)
+                self.total_bytes += entry.size
+                self._evict()
+        return entry
+
+    def store_parsed(self, entry: CachedDocument, doc_type: str, parsed: Dict[str, Any]) -> CachedDocument:
+        """Remember the parse result of an entry for the given document type"""
+        return self.update(entry, parsed={**entry.parsed, doc_type: parsed})
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _evict(self) -> None:
+        # Always keep the most recent entry, even if it alone exceeds the bound
+        while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            self.total_bytes -= evicted.size
+
+    @staticmethod
+    def _estimate_size(entry: CachedDocument) -> int:
+        size = sys.getsizeof(entry.text)
+        if entry.tables:
+            size += len(repr(entry.tables))
+        if entry.headings:
+            size += len(repr(entry.headings))
+        if entry.sentences:
+            size += 64 * len(entry.sentences)
+        for parsed in entry.parsed.values():
+            size += len(repr(parsed))
+        return size
@@ -0,0 +1,90 @@
+from typing import Dict, Any, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+# The records passed from the parser to the generator. They are tuples, without a per-instance
+# __dict__, so long documents stream through the stages as compact records rather than dicts,
+# and cross process boundaries cheaply.
+
+
+class Requirement(NamedTuple):
+    """A sentence of a BRD/FRD: a requirement, or with kind "scenarios" a given/when/then sentence"""
+    kind: str  # "requirements" or "scenarios", the scenario group it renders into
+    text: str
+
+
+class Criterion(NamedTuple):
+    type: str  # given, when, then or verification
+    text: str
+
+
+class Story(NamedTuple):
+    role: str
+    want: str
+    benefit: str
+    acceptance_criteria: Tuple[Criterion, ...] = ()
+
+
+class TestCaseStep(NamedTuple):
+    section: str  # preconditions, steps or expected_results
+    text: str
+
+
+class OutlineExamples(NamedTuple):
+    columns: List[str]
+    rows: List[List[str]]
+
+
+class Scenario(NamedTuple):
+    """A scenario to render; with examples it is a Scenario Outline whose steps use <column> placeholders"""
+    name: str
+    steps: Tuple[str, ...]
+    examples: Optional[OutlineExamples] = None
+
+
+Record = Union[Requirement, Story, TestCaseStep]
+
+
+def records_from_parsed(parsed_data: Dict[str, Any], doc_type: str) -> Iterator[Record]:
+    """The records of a parse result in its dict form, as returned by DocumentParser.parse_document"""
+    if doc_type in ("BRD", "FRD"):
+        for kind in ("requirements", "scenarios"):
+            for text in parsed_data[kind]:
+                yield Requirement(kind, text)
+    elif doc_type == "User Story":
+        for story in parsed_data["stories"]:
+            yield Story(
+                story["role"],
+                story["want"],
+                story["benefit"],
+                tuple(Criterion(criterion["type"], criterion["text"]) for criterion in story.get("acceptance_criteria", ()))
+            )
+    elif doc_type == "Test Case":
+        for section in ("preconditions", "steps", "expected_results"):
+            for text in parsed_data[section]:
+                yield TestCaseStep(section, text)
+    else:
+        raise ValueError(f"Unsupported document type: {doc_type}")
+
+
+def parsed_from_records(records: Iterable[Record], doc_type: str) -> Dict[str, Any]:
+    """The dict form of a parse result, without the actors and duplicates of requirement documents"""
+    if doc_type in ("BRD", "FRD"):
+        parsed: Dict[str, Any] = {"requirements": [], "scenarios": []}
+        for record in records:
+            parsed[record.kind].append(record.text)
+    elif doc_type == "User Story":
+        parsed = {"stories": [
+            {
+                "role": story.role,
+                "want": story.want,
+                "benefit": story.benefit,
+                "acceptance_criteria": [criterion._asdict() for criterion in story.acceptance_criteria]
+            }
+            for story in records
+        ]}
+    elif doc_type == "Test Case":
+        parsed = {"preconditions": [], "steps": [], "expected_results": []}
+        for step in records:
+            parsed[step.section].append(step.text)
+    else:
+        raise ValueError(f"Unsupported document type: {doc_type}")
+    return parsed
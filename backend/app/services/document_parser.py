@@ -1,16 +1,95 @@
-import spacy
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
 import re
 from pathlib import Path
 import json
+from .nlp_registry import nlp_registry
+from .document_ir import Criterion, Record, Requirement, Story, parsed_from_records, records_from_parsed
+from .near_duplicates import NearDuplicateIndex, collapse_near_duplicates
+from .pattern_matcher import PatternMatcher, load_pattern_pack, merge_patterns
+from ..core.config import settings
+
+# Document types whose parsing works on sentence spans
+SENTENCE_DOC_TYPES = ("BRD", "FRD")
+
+# Keywords marking a sentence as an acceptance criterion, anywhere in it ("unchecked" counts too)
+CRITERIA_KEYWORDS = re.compile(r"given|when|then|verify|check|ensure")
+
+# Headings that close the current user story block
+SECTION_HEADING = re.compile(r"^(?:#{1,6}\s|(?:epic|feature|module|section)\b\s*[:\-])", re.IGNORECASE)
+
+# Numbering stripped from test case lines
+STEP_PREFIX = re.compile(r"^(?:Step|Action)\s*\d+:?\s*")
+NUMBER_PREFIX = re.compile(r"^\d+\.\s*")
+
+# Blank lines separating the paragraphs of a requirements document
+PARAGRAPH_BREAK = re.compile(r"\n[ \t]*\n")
+
+# Line ends after a sentence, where a long paragraph can be cut without splitting a sentence
+SENTENCE_LINE_END = re.compile(r"(?<=[.!?])[ \t]*\n")
+
+# Column headers of test case tables, e.g. the ID / Steps / Expected Result grid
+TEST_CASE_COLUMNS = {
+    "preconditions": re.compile(r"^(?:pre-?\s?conditions?|prerequisites?)$", re.IGNORECASE),
+    "steps": re.compile(r"^(?:test\s+)?(?:steps?|actions?|procedure)(?:\s+to\s+(?:execute|reproduce))?$", re.IGNORECASE),
+    "expected_results": re.compile(r"^expected(?:\s+(?:results?|outcomes?|behaviou?r))?$", re.IGNORECASE),
+}
+
+class DuplicateFilter:
+    """
+    Drops the requirement and scenario sentences that near-duplicate an earlier one of the same
+    kind, across all the record batches it is called on: the incremental form of the collapse
+    done by parse_document. What it dropped is listed in duplicates, in the same form as the
+    "duplicates" of a parse result. A threshold of 0 keeps every record.
+    """
+
+    def __init__(self, threshold: float):
+        self.threshold = threshold
+        self.duplicates: Dict[str, List[Dict[str, Any]]] = {"requirements": [], "scenarios": []}
+        self._indexes: Dict[str, NearDuplicateIndex] = {}
+        self._merged: Dict[Tuple[str, int], Dict[str, Any]] = {}
+
+    def __call__(self, records: Iterable[Record]) -> Iterator[Record]:
+        for record in records:
+            if self.threshold and isinstance(record, Requirement):
+                index = self._indexes.setdefault(record.kind, NearDuplicateIndex(self.threshold))
+                group = index.add(record.text)
+                if group is not None:
+                    self._report(record.kind, index, group, record.text)
+                    continue
+            yield record
+
+    def _report(self, kind: str, index: NearDuplicateIndex, group: int, text: str) -> None:
+        entry = self._merged.get((kind, group))
+        if entry is None:
+            entry = self._merged[kind, group] = {"kept": index.representatives[group], "merged": []}
+            self.duplicates[kind].append(entry)
+        entry["merged"].append({"text": text, "similarity": index.similarity(text, group)})
 
 class DocumentParser:
-    def __init__(self):
-        # Load English language model with NLP pipeline
-        self.nlp = spacy.load("en_core_web_sm")
-        
+    def __init__(self, pattern_packs: Optional[List[str]] = None, duplicate_threshold: Optional[float] = None):
+        # Requirement and scenario sentences at least this similar are collapsed; 0 keeps them all
+        self.duplicate_threshold = settings.duplicate_threshold if duplicate_threshold is None else duplicate_threshold
+
         # Load custom keyword patterns for different document types
         self.patterns = self._load_patterns()
+        for path in settings.pattern_packs if pattern_packs is None else pattern_packs:
+            self.patterns = merge_patterns(self.patterns, load_pattern_pack(path))
+
+        # Compile the pattern tables once into combined matchers
+        requirement_patterns = self.patterns["BRD"]
+        self._requirement_matcher = PatternMatcher(
+            {category: patterns for category, patterns in requirement_patterns.items() if category != "actors"}
+        )
+        self._actor_matcher = PatternMatcher({"actors": requirement_patterns.get("actors", [])})
+        self._test_case_matcher = PatternMatcher(self.patterns["Test Case"])
+        self._story_patterns = [
+            re.compile(pattern, re.IGNORECASE) for pattern in self.patterns["User Story"]["patterns"]
+        ]
+
+    @property
+    def nlp(self):
+        """Shared sentence-segmentation pipeline, loaded on first use"""
+        return nlp_registry.get("sentences")
 
     def _load_patterns(self) -> Dict[str, Dict[str, List[str]]]:
         """Load custom patterns for different document types"""
@@ -57,139 +136,346 @@ class DocumentParser:
             }
         }
 
-    def parse_document(self, content: str, doc_type: str) -> Dict[str, Any]:
-        """Parse document content based on its type using NLP"""
+    def sentence_spans(self, content: str) -> List[Tuple[int, int]]:
+        """Return (start, end) character offsets of every sentence in the content"""
+        return [(sent.start_char, sent.end_char) for sent in self.nlp(content).sents]
+
+    def parse_document(
+        self,
+        content: str,
+        doc_type: str,
+        sentences: Optional[List[Tuple[int, int]]] = None,
+        tables: Optional[List[Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
+        """
+        Parse document content based on its type using NLP.
+        Pass previously computed sentence spans to skip re-running the NLP pipeline, and the
+        table structure of DOCX documents ({"start", "end", "rows"}) to parse test case grids by column.
+        """
         if doc_type == "BRD" or doc_type == "FRD":
-            return self._parse_requirements_doc(content)
+            return self._parse_requirements_doc(content, sentences)
         elif doc_type == "User Story":
             return self._parse_user_story(content)
         elif doc_type == "Test Case":
-            return self._parse_test_case(content)
+            return self._parse_test_case(content, tables)
         else:
             raise ValueError(f"Unsupported document type: {doc_type}")
 
-    def _parse_requirements_doc(self, content: str) -> Dict[str, Any]:
+    def parse_documents(
+        self,
+        contents: List[str],
+        doc_type: str,
+        sentences: Optional[List[Optional[List[Tuple[int, int]]]]] = None,
+        tables: Optional[List[Optional[List[Dict[str, Any]]]]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Parse several documents of the same type, batching their NLP work into one nlp.pipe call.
+        sentences/tables are per-document lists aligned with contents (None entries are allowed).
+        """
+        sentences = list(sentences or [None] * len(contents))
+        tables = list(tables or [None] * len(contents))
+
+        if doc_type == "BRD" or doc_type == "FRD":
+            missing = [index for index, spans in enumerate(sentences) if spans is None]
+            docs = self.nlp.pipe((contents[index] for index in missing), batch_size=16)
+            for index, doc in zip(missing, docs):
+                sentences[index] = [(sent.start_char, sent.end_char) for sent in doc.sents]
+            return [self._parse_requirements_doc(content, spans) for content, spans in zip(contents, sentences)]
+        elif doc_type == "User Story":
+            return self._parse_user_stories(contents)
+        elif doc_type == "Test Case":
+            return [self._parse_test_case(content, grid) for content, grid in zip(contents, tables)]
+        else:
+            raise ValueError(f"Unsupported document type: {doc_type}")
+
+    def iter_records(
+        self,
+        contents: Iterable[str],
+        doc_type: str,
+        tables: Optional[Iterable[Optional[List[Dict[str, Any]]]]] = None
+    ) -> Iterator[Record]:
+        """
+        Parse the sections of a document (see segment_sections) into records, lazily: the NLP
+        pipeline runs over the sections as the records are consumed, so a long document is never
+        held as one parse result. Near-duplicate requirements are kept; see duplicate_filter.
+        tables are per-section table structures, as for parse_documents.
+        """
+        if doc_type == "BRD" or doc_type == "FRD":
+            for doc in self.nlp.pipe(contents, batch_size=16):
+                yield from self._iter_requirements(doc.text, [(sent.start_char, sent.end_char) for sent in doc.sents])
+        elif doc_type == "User Story":
+            blocks = ((body, matches) for content in contents for matches, body in self._segment_story_blocks(content))
+            for doc, matches in self.nlp.pipe(blocks, as_tuples=True, batch_size=256):
+                yield self._story(matches, doc)
+        elif doc_type == "Test Case":
+            grids = iter(tables) if tables is not None else None
+            for content in contents:
+                yield from records_from_parsed(self._parse_test_case(content, next(grids) if grids else None), doc_type)
+        else:
+            raise ValueError(f"Unsupported document type: {doc_type}")
+
+    def duplicate_filter(self) -> "DuplicateFilter":
+        """A filter collapsing the near-duplicate requirements of one document as its records arrive"""
+        return DuplicateFilter(self.duplicate_threshold)
+
+    def iter_page_sections(self, pages: Iterable[str], doc_type: str) -> Iterator[str]:
+        """
+        The BRD/FRD paragraphs of segment_sections for text arriving page by page (each page
+        followed by a newline, as extract_text_from_pdf joins them), without joining the pages:
+        only the paragraph still open at the end of a page is carried over to the next one.
+        """
+        if doc_type not in SENTENCE_DOC_TYPES:
+            raise ValueError(f"Only BRD and FRD documents can be parsed page by page, not {doc_type}")
+        pending = ""
+        for page in pages:
+            *paragraphs, pending = PARAGRAPH_BREAK.split(f"{pending}{page}\n")
+            yield from (paragraph for paragraph in paragraphs if paragraph.strip())
+        if pending.strip():
+            yield pending
+
+    def segment_sections(self, content: str, doc_type: str, max_chars: Optional[int] = None) -> List[str]:
+        """
+        Split a document into independently parseable sections: paragraphs of BRD/FRD documents,
+        story blocks (each with its leading heading lines) of user stories, and the whole text of
+        a test case. Parsing the sections one by one yields the items of parsing the whole text.
+        With max_chars, BRD/FRD paragraphs longer than that are split further at line ends that
+        close a sentence.
+        """
+        if doc_type == "BRD" or doc_type == "FRD":
+            paragraphs = [paragraph for paragraph in PARAGRAPH_BREAK.split(content) if paragraph.strip()]
+            if not max_chars:
+                return paragraphs
+            return [piece for paragraph in paragraphs for piece in self._split_paragraph(paragraph, max_chars)]
+        elif doc_type == "User Story":
+            sections: List[List[str]] = []
+            current: List[str] = []
+            in_story = False
+            for line in content.split('\n'):
+                stripped = line.strip()
+                if self._match_story(stripped):
+                    if in_story:
+                        sections.append(current)
+                        current = []
+                    in_story = True
+                elif SECTION_HEADING.match(stripped) and in_story:
+                    sections.append(current)
+                    current, in_story = [], False
+                current.append(line)
+            sections.append(current)
+            return ["\n".join(lines) for lines in sections if any(line.strip() for line in lines)]
+        elif doc_type == "Test Case":
+            return [content] if content.strip() else []
+        else:
+            raise ValueError(f"Unsupported document type: {doc_type}")
+
+    @staticmethod
+    def _split_paragraph(paragraph: str, max_chars: int) -> List[str]:
+        """Cut a paragraph into pieces of about max_chars at line ends closing a sentence"""
+        pieces = []
+        start = cut = 0
+        for match in SENTENCE_LINE_END.finditer(paragraph):
+            if match.end() - start > max_chars and cut > start:
+                pieces.append(paragraph[start:cut])
+                start = cut
+            cut = match.end()
+        pieces.append(paragraph[start:])
+        return [piece for piece in pieces if piece.strip()]
+
+    def _parse_requirements_doc(self, content: str, sentences: Optional[List[Tuple[int, int]]] = None) -> Dict[str, Any]:
         """Parse BRD/FRD documents using NLP"""
-        doc = self.nlp(content)
+        if sentences is None:
+            sentences = self.sentence_spans(content)
         
-        # Extract requirements
+        # Extract requirements, the actors they mention, and scenarios
         requirements = []
         actors = set()
         scenarios = []
-        
-        # Process each sentence
-        for sent in doc.sents:
-            sent_text = sent.text.strip()
-            
-            # Extract requirements
-            for pattern in self.patterns["BRD"]["requirements"]:
-                if re.search(pattern, sent_text, re.IGNORECASE):
-                    requirements.append(sent_text)
-                    
-                    # Extract actors from requirements
-                    for actor_pattern in self.patterns["BRD"]["actors"]:
-                        actor_matches = re.findall(actor_pattern, sent_text, re.IGNORECASE)
-                        actors.update(actor_matches)
-                    
-                    break
-            
-            # Extract scenarios
-            for pattern in self.patterns["BRD"]["scenarios"]:
-                if re.search(pattern, sent_text, re.IGNORECASE):
-                    scenarios.append(sent_text)
-                    break
+        for record in self._iter_requirements(content, sentences):
+            if record.kind == "requirements":
+                requirements.append(record.text)
+                actors.update(self._actor_matcher.findall(record.text, "actors"))
+            else:
+                scenarios.append(record.text)
+
+        # BRDs restate requirements; near-duplicates are merged into their first occurrence
+        duplicates = {"requirements": [], "scenarios": []}
+        if self.duplicate_threshold:
+            requirements, duplicates["requirements"] = collapse_near_duplicates(requirements, self.duplicate_threshold)
+            scenarios, duplicates["scenarios"] = collapse_near_duplicates(scenarios, self.duplicate_threshold)
 
         return {
             "requirements": requirements,
             "actors": list(actors),
-            "scenarios": scenarios
+            "scenarios": scenarios,
+            "duplicates": duplicates
         }
 
+    def _iter_requirements(self, content: str, sentences: Iterable[Tuple[int, int]]) -> Iterator[Requirement]:
+        """The requirement and scenario sentences among the sentence spans, in document order"""
+        for start, end in sentences:
+            sent_text = content[start:end].strip()
+            categories = self._requirement_matcher.classify(sent_text)
+            if "requirements" in categories:
+                yield Requirement("requirements", sent_text)
+            if "scenarios" in categories:
+                yield Requirement("scenarios", sent_text)
+
     def _parse_user_story(self, content: str) -> Dict[str, Any]:
-        """Parse user stories using NLP"""
-        stories = []
+        """
+        Parse user stories in a single pass: the document is segmented once into story blocks,
+        and all block bodies go through one nlp.pipe batch to extract their own acceptance criteria
+        """
+        return self._parse_user_stories([content])[0]
+
+    def _parse_user_stories(self, contents: List[str]) -> List[Dict[str, Any]]:
+        """Parse the user stories of several documents with a single nlp.pipe over all their story blocks"""
+        documents_blocks = [self._segment_story_blocks(content) for content in contents]
+        docs = self.nlp.pipe(
+            (body for blocks in documents_blocks for _, body in blocks), batch_size=256
+        )
+
+        results = []
+        for blocks in documents_blocks:
+            results.append(parsed_from_records(
+                (self._story(matches, doc) for (matches, _), doc in zip(blocks, docs)), "User Story"
+            ))
         
-        # Split content into lines and process each line
+        return results
+
+    def _story(self, matches: re.Match, doc) -> Story:
+        """The user story of a block, from its story line match and its NLP-processed body"""
+        role, want, benefit = matches.groups()
+        return Story(
+            role.strip(),
+            want.strip(),
+            benefit.strip(),
+            tuple(self._classify_criteria(line for sent in doc.sents for line in sent.text.split("\n")))
+        )
+
+    def _segment_story_blocks(self, content: str) -> List[Tuple[re.Match, str]]:
+        """
+        Split the document into (story match, body text) blocks. A block starts at a line matching
+        a user story pattern and ends at the next story or section heading.
+        """
+        blocks = []
+        current = None
+        body: List[str] = []
+
         for line in content.split('\n'):
             line = line.strip()
             if not line:
                 continue
-                
-            # Try to match user story patterns
-            for pattern in self.patterns["User Story"]["patterns"]:
-                matches = re.match(pattern, line, re.IGNORECASE)
-                if matches:
-                    role, want, benefit = matches.groups()
-                    stories.append({
-                        "role": role.strip(),
-                        "want": want.strip(),
-                        "benefit": benefit.strip(),
-                        "acceptance_criteria": self._extract_acceptance_criteria(content)
-                    })
-                    break
-        
-        return {"stories": stories}
 
-    def _parse_test_case(self, content: str) -> Dict[str, Any]:
-        """Parse test cases using NLP"""
-        doc = self.nlp(content)
-        
-        preconditions = []
-        steps = []
-        expected_results = []
-        
+            matches = self._match_story(line)
+            if matches or SECTION_HEADING.match(line):
+                if current is not None:
+                    blocks.append((current, "\n".join(body)))
+                current, body = matches, []
+            elif current is not None:
+                body.append(line)
+
+        if current is not None:
+            blocks.append((current, "\n".join(body)))
+        return blocks
+
+    def _match_story(self, line: str) -> Optional[re.Match]:
+        for pattern in self._story_patterns:
+            matches = pattern.match(line)
+            if matches:
+                return matches
+        return None
+
+    def _parse_test_case(self, content: str, tables: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """
+        Parse test cases line by line. Tables with recognised column headers (Preconditions,
+        Test Steps, Expected Result) are read cell by cell instead of as lines.
+        """
+        sections = {"preconditions": [], "steps": [], "expected_results": []}
         current_section = None
-        
-        # Process each line
+        position = 0
+
+        for table in tables or []:
+            current_section = self._parse_test_case_lines(content[position:table["start"]], sections, current_section)
+            if self._parse_test_case_table(table["rows"], sections):
+                # A recognised grid closes whatever section the preceding text had open
+                current_section = None
+            else:
+                current_section = self._parse_test_case_lines(
+                    content[table["start"]:table["end"]], sections, current_section
+                )
+            position = table["end"]
+        self._parse_test_case_lines(content[position:], sections, current_section)
+
+        return sections
+
+    def _parse_test_case_lines(self, content: str, sections: Dict[str, List[str]], current_section: Optional[str]) -> Optional[str]:
+        """Append the lines of a text block to their sections and return the section in effect at the end"""
         for line in content.split('\n'):
             line = line.strip()
             if not line:
                 continue
             
             # Check for section headers
-            if any(re.match(pattern, line, re.IGNORECASE) for pattern in self.patterns["Test Case"]["preconditions"]):
+            section = self._test_case_matcher.match(line)
+            if section == "preconditions":
                 current_section = "preconditions"
                 continue
-            elif any(re.match(pattern, line, re.IGNORECASE) for pattern in self.patterns["Test Case"]["steps"]):
-                current_section = "steps"
-            elif any(re.match(pattern, line, re.IGNORECASE) for pattern in self.patterns["Test Case"]["expected_results"]):
-                current_section = "expected_results"
+            elif section is not None:
+                current_section = section
             
-            # Clean up the line by removing common prefixes
-            clean_line = re.sub(r"^(?:Step|Action)\s*\d+:?\s*", "", line)
-            clean_line = re.sub(r"^\d+\.\s*", "", clean_line)
-            
-            # Add line to appropriate section
-            if current_section == "preconditions":
-                preconditions.append(clean_line)
-            elif current_section == "steps":
-                steps.append(clean_line)
-            elif current_section == "expected_results":
-                expected_results.append(clean_line)
+            # Add line to appropriate section, without common prefixes
+            if current_section in sections:
+                sections[current_section].append(self._clean_step(line))
         
-        return {
-            "preconditions": preconditions,
-            "steps": steps,
-            "expected_results": expected_results
-        }
+        return current_section
+
+    def _parse_test_case_table(self, rows: List[List[str]], sections: Dict[str, List[str]]) -> bool:
+        """
+        Read a test case grid whose header row names its columns. Returns False when the table
+        has no steps or expected results column, so the caller can fall back to line parsing.
+        """
+        if not rows:
+            return False
+
+        columns = {}
+        for index, header in enumerate(rows[0]):
+            header = header.strip().rstrip(":*").strip()
+            for section, pattern in TEST_CASE_COLUMNS.items():
+                if section not in columns and pattern.match(header):
+                    columns[section] = index
+                    break
+        if "steps" not in columns and "expected_results" not in columns:
+            return False
+
+        for row in rows[1:]:
+            for section, index in columns.items():
+                if index < len(row):
+                    sections[section].extend(
+                        self._clean_step(line.strip()) for line in row[index].split("\n") if line.strip()
+                    )
+        return True
+
+    @staticmethod
+    def _clean_step(line: str) -> str:
+        """Remove step numbering such as "Step 2:" or "3." from a line"""
+        return NUMBER_PREFIX.sub("", STEP_PREFIX.sub("", line))
 
-    def _extract_acceptance_criteria(self, content: str) -> List[Dict[str, str]]:
-        """Extract acceptance criteria from user story content"""
+    def _classify_criteria(self, sentences: Iterable[str]) -> List[Criterion]:
+        """Categorize sentences containing acceptance criteria keywords"""
         criteria = []
-        doc = self.nlp(content)
         
         # Look for common acceptance criteria patterns
-        for sent in doc.sents:
-            sent_text = sent.text.strip().lower()
-            if any(keyword in sent_text for keyword in ["given", "when", "then", "verify", "check", "ensure"]):
+        for text in sentences:
+            sent_text = text.strip().lower()
+            if CRITERIA_KEYWORDS.search(sent_text):
                 # Categorize the criterion
                 if sent_text.startswith("given"):
-                    criteria.append({"type": "given", "text": sent.text})
+                    criteria.append(Criterion("given", text))
                 elif sent_text.startswith("when"):
-                    criteria.append({"type": "when", "text": sent.text})
+                    criteria.append(Criterion("when", text))
                 elif sent_text.startswith("then"):
-                    criteria.append({"type": "then", "text": sent.text})
+                    criteria.append(Criterion("then", text))
                 else:
-                    criteria.append({"type": "verification", "text": sent.text})
+                    criteria.append(Criterion("verification", text))
         
-        return criteria
\ No newline at end of file
+        return criteria
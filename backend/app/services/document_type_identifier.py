@@ -1,20 +1,19 @@
 from typing import Dict, Any, Optional
 import re
-import spacy
-from docx import Document
-from io import BytesIO
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Structural features, matched line by line over the lowercased text
+NUMBERED_LINE = re.compile(r"^\s*\d+\.", re.MULTILINE)
+
+# Sampling of large documents: windows taken after the head, and the score lead
+# the suggested type needs for the sample to count as decisive
+SAMPLE_WINDOWS = 8
+SAMPLE_DECISIVE_MARGIN = 0.2
+
 class DocumentTypeIdentifier:
     def __init__(self):
-        try:
-            self.nlp = spacy.load("en_core_web_sm")
-        except OSError as e:
-            logger.error(f"Failed to load spaCy model: {str(e)}")
-            raise RuntimeError("Failed to initialize document type identifier. Please ensure spaCy model is installed.")
-            
         self.patterns = {
             "BRD": [
                 r"business\s+requirements?\s+documents?",
@@ -46,50 +45,84 @@ class DocumentTypeIdentifier:
                 r"test\s+data"
             ]
         }
+        self._compiled_patterns = {
+            doc_type: [re.compile(pattern) for pattern in patterns]
+            for doc_type, patterns in self.patterns.items()
+        }
 
-    def identify_document_type(self, content: str) -> Dict[str, float]:
+    def identify_document_type(self, content: str, max_chars: Optional[int] = None) -> Dict[str, float]:
         """
         Analyze document content and return confidence scores for each document type.
         Returns a dictionary of document types and their confidence scores.
         """
-        doc = self.nlp(content.lower())
-        scores = {doc_type: 0.0 for doc_type in self.patterns.keys()}
+        return self.classify(content, max_chars)["scores"]
+
+    def classify(self, content: str, max_chars: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Score the document without running the NLP pipeline: one precompiled search per pattern
+        over the lowercased text plus line-based structural features.
+
+        Documents longer than max_chars are classified from a sample (the head of the document
+        plus evenly spaced windows). "sample_sufficient" tells whether the sample alone was
+        decisive; callers can rescore the full text when it is False.
+        """
+        sampled = max_chars is not None and 0 < max_chars < len(content)
+        text = self._sample(content, max_chars) if sampled else content
+        scores = self._score(text.lower())
+        suggested_type = self.get_document_type(text, scores)
+
+        ranked = sorted(scores.values(), reverse=True)
+        margin = ranked[0] - ranked[1] if len(ranked) > 1 else ranked[0]
+        return {
+            "scores": scores,
+            "suggested_type": suggested_type,
+            "sampled": sampled,
+            "sample_sufficient": (suggested_type is not None and margin >= SAMPLE_DECISIVE_MARGIN) if sampled else None
+        }
+
+    def _score(self, text: str) -> Dict[str, float]:
+        scores = {}
         
         # Calculate scores based on pattern matches
-        for doc_type, patterns in self.patterns.items():
-            matches = 0
-            for pattern in patterns:
-                if re.search(pattern, content.lower()):
-                    matches += 1
+        for doc_type, patterns in self._compiled_patterns.items():
+            matches = sum(1 for pattern in patterns if pattern.search(text))
             scores[doc_type] = matches / len(patterns)
         
-        # Analyze document structure
-        sentences = [sent.text.strip() for sent in doc.sents]
-        
         # Additional scoring based on document structure
-        if any("as a" in sent.lower() for sent in sentences):
+        if "as a" in text:
             scores["User Story"] += 0.3
         
-        if any(sent.strip().startswith(("Given", "When", "Then")) for sent in sentences):
-            scores["User Story"] += 0.2
-        
-        if any(re.match(r"^\d+\.", sent.strip()) for sent in sentences):
+        if NUMBERED_LINE.search(text):
             scores["Test Case"] += 0.2
         
-        if "scope" in content.lower() and "objective" in content.lower():
+        if "scope" in text and "objective" in text:
             scores["BRD"] += 0.2
         
-        if "system shall" in content.lower() or "must have" in content.lower():
+        if "system shall" in text or "must have" in text:
             scores["FRD"] += 0.2
             
         return scores
 
-    def get_document_type(self, content: str) -> Optional[str]:
+    @staticmethod
+    def _sample(content: str, max_chars: int) -> str:
+        """Take the head of the document and evenly spaced windows from the rest, cut at line boundaries"""
+        head = max_chars // 2
+        window = (max_chars - head) // SAMPLE_WINDOWS
+        parts = [content[:head]]
+        stride = (len(content) - head) // SAMPLE_WINDOWS
+        for index in range(SAMPLE_WINDOWS):
+            start = head + index * stride
+            start = content.find("\n", start, start + window) + 1 or start
+            parts.append(content[start:start + window])
+        return "\n".join(parts)
+
+    def get_document_type(self, content: str, scores: Optional[Dict[str, float]] = None) -> Optional[str]:
         """
         Determine the most likely document type.
         Returns the document type with the highest confidence score if above threshold.
         """
-        scores = self.identify_document_type(content)
+        if scores is None:
+            scores = self.identify_document_type(content)
         max_score = max(scores.values())
         max_type = max(scores.items(), key=lambda x: x[1])[0]
         
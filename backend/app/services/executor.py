@@ -0,0 +1,141 @@
+from typing import Any, Callable, Dict, Iterable, Optional
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import asyncio
+import logging
+import multiprocessing
+import threading
+import time
+from .nlp_registry import nlp_registry
+from .scheduler import StageScheduler, stage_scheduler
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ExecutorSaturatedError(Exception):
+    """Raised when the submission queue is full and the request should be retried later"""
+
+    def __init__(self, retry_after: int):
+        super().__init__("All conversion workers are busy")
+        self.retry_after = retry_after
+
+
+class StageTimeoutError(Exception):
+    """Raised when a pipeline stage does not finish within its time budget"""
+
+    def __init__(self, stage: str, timeout: float):
+        super().__init__(f"Stage '{stage}' did not finish within {timeout:g} seconds")
+        self.stage = stage
+        self.timeout = timeout
+
+
+def _init_worker(profiles: Iterable[str]) -> None:
+    # Preload the spaCy pipelines once per worker instead of on the first task
+    nlp_registry.warm_up(profiles)
+
+
+class StageExecutor:
+    """
+    Runs CPU-bound pipeline stages (extraction, segmentation, identification, parsing)
+    in a process pool so they do not block the event loop.
+
+    Tasks are handed to the pool one free worker at a time, in the order the scheduler picks:
+    by priority lane, then fairly between clients. Admission is bounded: each lane may have
+    ``queue_size`` tasks waiting; further submissions fail fast with ExecutorSaturatedError.
+    With ``max_workers=0`` stages run in a thread instead of a process pool.
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        retry_after: int,
+        stage_timeouts: Dict[str, float],
+        scheduler: StageScheduler,
+        inline_max_bytes: int = 0,
+        warmup_profiles: Iterable[str] = (),
+        start_method: str = "spawn"
+    ):
+        self.max_workers = max_workers
+        self.retry_after = retry_after
+        self.stage_timeouts = stage_timeouts
+        self.scheduler = scheduler
+        self.inline_max_bytes = inline_max_bytes
+        self.warmup_profiles = list(warmup_profiles)
+        self.start_method = start_method
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    async def run(self, stage: str, fn: Callable, *args: Any, size: Optional[int] = None) -> Any:
+        """
+        Run ``fn(*args)`` for the given stage off the event loop, honouring the stage timeout, which
+        includes the time spent waiting for a worker. Inputs no larger than ``inline_max_bytes`` run
+        in a thread of this process, where IPC would cost more than the work.
+        """
+        if size is not None and size <= self.inline_max_bytes:
+            return await asyncio.to_thread(fn, *args)
+
+        lane, client = self.scheduler.current()
+        timeout = self.stage_timeouts.get(stage)
+        start = time.monotonic()
+        try:
+            admitted = await asyncio.wait_for(self.scheduler.acquire(lane, client), timeout)
+        except asyncio.TimeoutError:
+            raise StageTimeoutError(stage, timeout)
+        if not admitted:
+            raise ExecutorSaturatedError(self.retry_after)
+
+        loop = asyncio.get_running_loop()
+        try:
+            if self.max_workers > 0:
+                work = self._get_pool().submit(fn, *args)
+            else:
+                future = loop.run_in_executor(None, fn, *args)
+        except BaseException:
+            self.scheduler.release(lane)
+            raise
+        # The slot is held until the work really finishes, even if the caller stops waiting
+        if self.max_workers > 0:
+            work.add_done_callback(lambda _: loop.call_soon_threadsafe(self.scheduler.release, lane))
+            future = asyncio.wrap_future(work)
+        else:
+            future.add_done_callback(lambda _: self.scheduler.release(lane))
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout and max(timeout - (time.monotonic() - start), 0))
+        except asyncio.TimeoutError:
+            future.cancel()
+            raise StageTimeoutError(stage, timeout)
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed); start a fresh pool for the next submission
+            logger.error(f"Stage executor pool broke while running stage '{stage}'")
+            self.shutdown()
+            raise
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                logger.info(f"Starting stage executor with {self.max_workers} worker processes")
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context(self.start_method),
+                    initializer=_init_worker,
+                    initargs=(self.warmup_profiles,)
+                )
+            return self._pool
+
+
+stage_executor = StageExecutor(
+    max_workers=settings.executor_workers,
+    retry_after=settings.executor_retry_after,
+    stage_timeouts=settings.stage_timeouts,
+    scheduler=stage_scheduler,
+    inline_max_bytes=settings.executor_inline_max_bytes,
+    warmup_profiles=settings.nlp_warmup_profiles
+)
@@ -0,0 +1,46 @@
+from typing import AsyncIterator, Optional, Tuple
+import io
+import re
+import zipfile
+
+SLUG_SEPARATOR = re.compile(r"[^a-z0-9]+")
+
+
+class _ZipBuffer(io.RawIOBase):
+    """Write-only, unseekable sink that hands out what the zip writer produced so far"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def feature_file_name(index: int, title: Optional[str]) -> str:
+    """Stable, sortable file name of the feature of the index-th section"""
+    slug = SLUG_SEPARATOR.sub("-", (title or "").lower()).strip("-")[:60] or "section"
+    return f"{index + 1:03d}-{slug}.feature"
+
+
+async def stream_zip(files: AsyncIterator[Tuple[str, str]]) -> AsyncIterator[bytes]:
+    """
+    Zip (name, text) files as they arrive, yielding archive bytes as soon as each file is written.
+    The sink is unseekable, so zipfile writes data descriptors instead of seeking back.
+    """
+    buffer = _ZipBuffer()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        async for name, text in files:
+            archive.writestr(name, text)
+            data = buffer.drain()
+            if data:
+                yield data
+    yield buffer.drain()
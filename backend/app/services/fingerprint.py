@@ -0,0 +1,49 @@
+from typing import Any, Optional
+from functools import lru_cache
+from importlib import metadata
+from pathlib import Path
+import hashlib
+import json
+from . import pipeline
+from ..core.config import settings
+
+SERVICES_DIR = Path(__file__).parent
+
+# Libraries whose upgrades can change the extracted text or its sentences
+VERSIONED_PACKAGES = ("spacy", "PyPDF2", "jinja2")
+
+
+def package_version(name: str) -> Optional[str]:
+    try:
+        return metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return None
+
+
+@lru_cache(maxsize=None)
+def pipeline_fingerprint() -> str:
+    """
+    Hash of everything besides a document and the options that shapes its outputs: the pipeline
+    code and templates, the parser patterns (including pattern packs) and the model. Computed
+    once per process; all of it only changes with a deploy or a restart.
+    """
+    digest = hashlib.sha256()
+    for source in sorted(SERVICES_DIR.rglob("*")):
+        if source.is_file() and source.suffix in (".py", ".jinja"):
+            digest.update(source.relative_to(SERVICES_DIR).as_posix().encode())
+            digest.update(source.read_bytes())
+    digest.update(json.dumps({
+        "patterns": pipeline.document_parser.patterns,
+        "model": settings.spacy_model,
+        "packages": {name: package_version(name) for name in VERSIONED_PACKAGES},
+        "duplicate_threshold": settings.duplicate_threshold,
+        "step_varying_words": settings.step_varying_words
+    }, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def output_fingerprint(**inputs: Any) -> str:
+    """Hash of the pipeline together with the inputs (JSON-serializable) of one output"""
+    digest = hashlib.sha256(pipeline_fingerprint().encode())
+    digest.update(json.dumps(inputs, sort_keys=True).encode())
+    return digest.hexdigest()
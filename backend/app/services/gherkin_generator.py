@@ -1,67 +1,191 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterable, Iterator, List, Tuple
+from functools import cached_property
 import re
-from jinja2 import Template
+from .document_ir import Record, Requirement, Scenario, Story, TestCaseStep, records_from_parsed
+from .step_normalizer import fold_outlines
+from .template_packs import get_template
+
+# Scenario groups of each document type, in the order they appear in the feature file
+SCENARIO_GROUPS = {
+    "BRD": ("requirements", "scenarios"),
+    "FRD": ("requirements", "scenarios"),
+    "User Story": ("stories",),
+    "Test Case": ("test_case",),
+}
+
+FEATURE_DESCRIPTIONS = {
+    "BRD": "Requirements derived from the source document",
+    "FRD": "Requirements derived from the source document",
+    "User Story": "Implementation of user stories",
+    "Test Case": "Automated test case execution",
+}
+
+# Scenario matching a when/then sentence of a requirements document
+WHEN_THEN = re.compile(r"(?:(?:given|when|if)\s+)?(.+?)[\s,]*\bthen\b[\s,]*(.+)", re.IGNORECASE)
+
+def _single_line(text: str) -> str:
+    return " ".join(text.split())
+
+
+def duplicate_comments(duplicates: Dict[str, List[Dict[str, Any]]]) -> str:
+    """
+    Gherkin comments closing a feature file that lists the near-duplicate sentences merged into
+    its scenarios, for feature files delivered without their parse result
+    """
+    lines = []
+    for entries in duplicates.values():
+        for entry in entries:
+            lines.append(f"  # Merged into \"{_single_line(entry['kept'])}\":")
+            lines.extend(f"  #   {_single_line(merged['text'])} (similarity {merged['similarity']})" for merged in entry["merged"])
+    return "\n" + "\n".join(lines) + "\n" if lines else ""
+
 
 class GherkinGenerator:
-    def __init__(self):
-        self.feature_template = Template("""Feature: {{ feature_name }}
-  {{ description }}
-
-  {% for scenario in scenarios %}
-  Scenario: {{ scenario.name }}
-    {% for step in scenario.steps %}
-    {{ step }}
-    {% endfor %}
-  {% endfor %}
-""")
-
-    def generate_feature(self, parsed_data: Dict[str, Any], feature_name: str, doc_type: str) -> str:
-        """Generate Gherkin feature file content from parsed document data."""
+    # Shared by all generators through the template environment, and compiled once per process
+    @cached_property
+    def header_template(self):
+        return get_template("feature_header.feature.jinja")
+
+    @cached_property
+    def scenario_template(self):
+        return get_template("feature_scenario.feature.jinja")
+
+    @cached_property
+    def outline_template(self):
+        return get_template("feature_outline.feature.jinja")
+
+    def generate_feature(self, parsed_data: Dict[str, Any], feature_name: str, doc_type: str, outlines: bool = False) -> str:
+        """
+        Generate Gherkin feature file content from parsed document data. With outlines, scenarios
+        of a group that differ only in their values are folded into Scenario Outlines.
+        """
         try:
-            if doc_type == "User Story":
-                return self._generate_from_user_story(parsed_data, feature_name)
-            elif doc_type in ["BRD", "FRD"]:
-                return self._generate_from_requirements(parsed_data, feature_name)
-            elif doc_type == "Test Case":
-                return self._generate_from_test_case(parsed_data, feature_name)
-            else:
-                raise ValueError(f"Unsupported document type: {doc_type}")
+            return "".join(self.iter_feature(records_from_parsed(parsed_data, doc_type), feature_name, doc_type, outlines))
         except Exception as e:
             raise ValueError(f"Error generating feature file: {str(e)}")
 
-    def _generate_from_user_story(self, parsed_data: Dict[str, Any]) -> str:
-        scenarios = []
-        for story in parsed_data["stories"]:
-            scenario = {
-                "name": f"Implement {story['want']}",
-                "steps": [
-                    f"Given I am a {story['role']}",
-                    f"When I {story['want']}",
-                    f"Then I should {story['benefit']}"
-                ]
-            }
-            scenarios.append(scenario)
-
-        return self.feature_template.render(
-            feature_name="User Story Implementation",
-            description="Implementation of user stories",
-            scenarios=scenarios
+    def iter_feature(self, records: Iterable[Record], feature_name: str, doc_type: str, outlines: bool = False) -> Iterator[str]:
+        """Render a feature file piece by piece from parse records, as they arrive (see FeatureWriter)"""
+        writer = FeatureWriter(self, feature_name, doc_type, outlines)
+        yield from writer.header()
+        yield from writer.write(records)
+        yield from writer.close()
+
+    def build_scenario_groups(self, parsed_data: Dict[str, Any], doc_type: str) -> List[List[Scenario]]:
+        """
+        Build the scenarios of parsed document data, as one list per entry of
+        SCENARIO_GROUPS[doc_type]. The feature file lists the groups one after the other.
+        """
+        if doc_type not in SCENARIO_GROUPS:
+            raise ValueError(f"Unsupported document type: {doc_type}")
+        if doc_type == "Test Case":
+            return [[self.test_case_scenario(parsed_data)]]
+        groups: List[List[Scenario]] = [[] for _ in SCENARIO_GROUPS[doc_type]]
+        for record in records_from_parsed(parsed_data, doc_type):
+            group, scenario = self.scenario_from_record(record)
+            groups[group].append(scenario)
+        return groups
+
+    def scenario_from_record(self, record: Record) -> Tuple[int, Scenario]:
+        """The scenario of a requirement or user story record, with the index of its scenario group"""
+        if isinstance(record, Story):
+            return 0, self._scenario(
+                f"Implement {record.want}",
+                [f"Given I am a {record.role}", f"When I {record.want}", f"Then I should {record.benefit}"]
+            )
+        if isinstance(record, Requirement):
+            sentence = record.text.rstrip(".")
+            match = WHEN_THEN.match(sentence) if record.kind == "scenarios" else None
+            if match:
+                steps = [f"When {match.group(1)}", f"Then {match.group(2)}"]
+            else:
+                steps = ["Given the system is available", f"Then {sentence}"]
+            return SCENARIO_GROUPS["BRD"].index(record.kind), self._scenario(sentence, steps)
+        raise ValueError(f"No scenario of its own for {type(record).__name__} records")
+
+    def test_case_scenario(self, sections: Dict[str, List[str]]) -> Scenario:
+        """The one scenario of a test case, from its preconditions, steps and expected results"""
+        return self._scenario(
+            "Execute test case",
+            [f"Given {precond}" for precond in sections["preconditions"]]
+            + [f"When {step}" for step in sections["steps"]]
+            + [f"Then {result}" for result in sections["expected_results"]]
         )
 
-    def _generate_from_test_case(self, parsed_data: Dict[str, Any]) -> str:
-        scenarios = [{
-            "name": "Execute test case",
-            "steps": [
-                f"Given {precond}" for precond in parsed_data["preconditions"]
-            ] + [
-                f"When {step}" for step in parsed_data["steps"]
-            ] + [
-                f"Then {result}" for result in parsed_data["expected_results"]
-            ]
-        }]
-
-        return self.feature_template.render(
-            feature_name="Test Case Execution",
-            description="Automated test case execution",
-            scenarios=scenarios
-        )
\ No newline at end of file
+    @staticmethod
+    def _scenario(name: str, steps: List[str]) -> Scenario:
+        # Sentences can span lines of the source document; a Gherkin step or name cannot
+        return Scenario(_single_line(name), tuple(_single_line(step) for step in steps))
+
+    def iter_scenario(self, scenario: Scenario) -> Iterator[str]:
+        """Render one scenario or scenario outline piece by piece, as it appears in the feature file"""
+        if scenario.examples is None:
+            return self.scenario_template.generate(scenario=scenario)
+
+        # Pad the Examples table into aligned columns, escaping cell separators
+        table = [scenario.examples.columns] + [
+            [value.replace("\\", "\\\\").replace("|", "\\|") for value in row] for row in scenario.examples.rows
+        ]
+        widths = [max(len(row[column]) for row in table) for column in range(len(table[0]))]
+        rows = [[value.ljust(width) for value, width in zip(row, widths)] for row in table]
+        return self.outline_template.generate(scenario=scenario, rows=rows)
+
+    def render_scenario(self, scenario: Scenario) -> str:
+        """Render one scenario or scenario outline as it appears in the feature file"""
+        return "".join(self.iter_scenario(scenario))
+
+    def iter_header(self, feature_name: str, doc_type: str) -> Iterator[str]:
+        return self.header_template.generate(
+            feature_name=feature_name,
+            description=FEATURE_DESCRIPTIONS[doc_type]
+        )
+
+    def render_feature(self, feature_name: str, doc_type: str, rendered_scenarios: List[str]) -> str:
+        """Assemble a feature file from its header and already rendered scenarios"""
+        return "".join(self.iter_header(feature_name, doc_type)) + "".join(rendered_scenarios)
+
+
+class FeatureWriter:
+    """
+    Renders a feature file incrementally while the records of its document arrive. write() yields
+    the scenarios of the first scenario group as soon as their records come in; later groups, and
+    with outlines every group (folding needs all of its scenarios), are held until close(). So is
+    a test case, whose one scenario collects the steps of the whole document.
+    """
+
+    def __init__(self, generator: GherkinGenerator, feature_name: str, doc_type: str, outlines: bool = False):
+        if doc_type not in SCENARIO_GROUPS:
+            raise ValueError(f"Unsupported document type: {doc_type}")
+        self.generator = generator
+        self.feature_name = feature_name
+        self.doc_type = doc_type
+        self.outlines = outlines
+        self.scenarios = 0  # rendered so far
+        self._held: List[List[Scenario]] = [[] for _ in SCENARIO_GROUPS[doc_type]]
+        self._test_case: Dict[str, List[str]] = {"preconditions": [], "steps": [], "expected_results": []}
+
+    def header(self) -> Iterator[str]:
+        return self.generator.iter_header(self.feature_name, self.doc_type)
+
+    def write(self, records: Iterable[Record]) -> Iterator[str]:
+        for record in records:
+            if isinstance(record, TestCaseStep):
+                self._test_case[record.section].append(record.text)
+                continue
+            group, scenario = self.generator.scenario_from_record(record)
+            if group or self.outlines:
+                self._held[group].append(scenario)
+            else:
+                yield from self._render(scenario)
+
+    def close(self) -> Iterator[str]:
+        if self.doc_type == "Test Case":
+            self._held[0].append(self.generator.test_case_scenario(self._test_case))
+        held, self._held = self._held, [[] for _ in SCENARIO_GROUPS[self.doc_type]]
+        for scenarios in held:
+            for scenario in fold_outlines(scenarios) if self.outlines else scenarios:
+                yield from self._render(scenario)
+
+    def _render(self, scenario: Scenario) -> Iterator[str]:
+        self.scenarios += 1
+        return self.generator.iter_scenario(scenario)
@@ -0,0 +1,428 @@
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+from collections import OrderedDict
+import hashlib
+import io
+import re
+import threading
+from ..core.config import settings
+
+# Gherkin keywords per dialect; "# language: xx" on the first lines selects one
+KEYWORDS = {
+    "en": {
+        "feature": ["Feature", "Business Need", "Ability"],
+        "rule": ["Rule"],
+        "background": ["Background"],
+        "scenario_outline": ["Scenario Outline", "Scenario Template"],
+        "scenario": ["Scenario", "Example"],
+        "examples": ["Examples", "Scenarios"],
+        "given": ["Given"],
+        "when": ["When"],
+        "then": ["Then"],
+        "and": ["And"],
+        "but": ["But"],
+    },
+}
+
+LANGUAGE_LINE = re.compile(r"^\s*#\s*language\s*:\s*([\w-]+)\s*$")
+DOC_STRING_SEPARATORS = ('"""', "```")
+STEP_TYPES = ("given", "when", "then")
+
+
+class GherkinSyntaxError(ValueError):
+    def __init__(self, line: int, message: str):
+        super().__init__(f"Line {line}: {message}")
+        self.line = line
+
+
+class Token(NamedTuple):
+    kind: str  # a KEYWORDS section with a colon (e.g. "scenario"), "step", "doc_string", "table_row", "tags", "empty", "other"
+    line: int
+    keyword: str  # the keyword as written; the media type of a doc string
+    text: str
+    indent: int
+
+
+class DocString(NamedTuple):
+    content: str
+    media_type: str
+
+
+class DataTable(NamedTuple):
+    rows: Tuple[Tuple[str, ...], ...]
+
+
+class Step(NamedTuple):
+    keyword: str
+    step_type: str  # given/when/then; And, But and * take the type of the step before them
+    text: str
+    line: int
+    argument: Optional[Union[DocString, DataTable]] = None
+
+
+class Examples(NamedTuple):
+    name: str
+    tags: Tuple[str, ...]
+    line: int
+    header: Tuple[str, ...]
+    rows: Tuple[Tuple[str, ...], ...]
+
+
+class Scenario(NamedTuple):
+    keyword: str
+    name: str
+    tags: Tuple[str, ...]
+    line: int
+    steps: Tuple[Step, ...]
+    examples: Tuple[Examples, ...] = ()
+
+
+class Background(NamedTuple):
+    name: str
+    line: int
+    steps: Tuple[Step, ...]
+
+
+class Rule(NamedTuple):
+    name: str
+    tags: Tuple[str, ...]
+    line: int
+    background: Optional[Background]
+    scenarios: Tuple[Scenario, ...]
+
+
+class Feature(NamedTuple):
+    name: str
+    tags: Tuple[str, ...]
+    line: int
+    language: str
+    description: str
+    background: Optional[Background]
+    scenarios: Tuple[Scenario, ...]
+    rules: Tuple[Rule, ...]
+
+
+def _keyword_matchers(language: str) -> List[Tuple[str, str]]:
+    """(kind, keyword) pairs, longest keyword first so "Scenario Outline" wins over "Scenario" """
+    if language not in KEYWORDS:
+        raise ValueError(f"Unsupported Gherkin language: {language}. Supported languages are: {', '.join(KEYWORDS)}")
+    pairs = [(kind, keyword) for kind, keywords in KEYWORDS[language].items() for keyword in keywords]
+    return sorted(pairs, key=lambda pair: len(pair[1]), reverse=True)
+
+
+def _split_row(line: str, number: int) -> Tuple[str, ...]:
+    if not line.endswith("|"):
+        raise GherkinSyntaxError(number, "table row must end with '|'")
+    cells, cell, escaped = [], [], False
+    for char in line[1:]:
+        if escaped:
+            cell.append({"n": "\n", "|": "|", "\\": "\\"}.get(char, "\\" + char))
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif char == "|":
+            cells.append("".join(cell).strip())
+            cell = []
+        else:
+            cell.append(char)
+    return tuple(cells)
+
+
+def tokenize(lines: Iterable[str]) -> Iterator[Token]:
+    """
+    Classify feature file lines one at a time. Doc strings are returned as one token with
+    their content, de-indented to their opening separator.
+    """
+    matchers = _keyword_matchers("en")
+    doc_string = None  # (separator, media type, indent, first line, content lines)
+    language = "en"
+
+    for number, raw in enumerate(lines, 1):
+        line = raw.rstrip("\r\n")
+        stripped = line.strip()
+        indent = len(line) - len(line.lstrip())
+
+        if doc_string is not None:
+            separator, media_type, start_indent, start, content = doc_string
+            if stripped == separator:
+                yield Token("doc_string", start, media_type, "\n".join(content), start_indent)
+                doc_string = None
+            else:
+                # Content keeps its indentation beyond the separator's
+                escaped = "".join("\\" + char for char in separator)
+                content.append(line[min(start_indent, indent):].replace(escaped, separator))
+            continue
+
+        if not stripped:
+            yield Token("empty", number, "", "", indent)
+        elif stripped.startswith("#"):
+            found = LANGUAGE_LINE.match(stripped)
+            if found:
+                language = found.group(1)
+                matchers = _keyword_matchers(language)
+                yield Token("language", number, "", language, indent)
+        elif stripped.startswith(DOC_STRING_SEPARATORS):
+            separator = stripped[:3]
+            doc_string = (separator, stripped[3:].strip(), indent, number, [])
+        elif stripped.startswith("|"):
+            yield Token("table_row", number, "", stripped, indent)
+        elif stripped.startswith("@"):
+            yield Token("tags", number, "", " ".join(tag for tag in stripped.split("#", 1)[0].split()), indent)
+        elif stripped.startswith("* "):
+            yield Token("step", number, "*", stripped[2:].strip(), indent)
+        else:
+            for kind, keyword in matchers:
+                if kind in ("given", "when", "then", "and", "but"):
+                    if stripped.startswith(keyword + " "):
+                        yield Token("step", number, keyword, stripped[len(keyword):].strip(), indent)
+                        break
+                elif stripped.startswith(keyword + ":"):
+                    yield Token(kind, number, keyword, stripped[len(keyword) + 1:].strip(), indent)
+                    break
+            else:
+                yield Token("other", number, "", stripped, indent)
+
+    if doc_string is not None:
+        raise GherkinSyntaxError(doc_string[3], "unterminated doc string")
+
+
+def _step_kind(keyword: str, language: str) -> Optional[str]:
+    for kind in STEP_TYPES:
+        if keyword in KEYWORDS[language][kind]:
+            return kind
+    return None
+
+
+class _Builder:
+    """Builds the AST from tokens, keeping only what step generation and validation need"""
+
+    def __init__(self):
+        self.language = "en"
+        self.feature: Optional[dict] = None
+        self.rule: Optional[dict] = None
+        self.container: Optional[dict] = None  # background or scenario receiving steps
+        self.examples: Optional[dict] = None
+        self.step: Optional[dict] = None
+        self.tags: List[str] = []
+        self.step_type = "given"
+        # Free text is a description while it directly follows a Feature, Rule, Scenario... line
+        self.in_description = False
+        self.description: List[str] = []
+
+    def _close_step(self) -> None:
+        if self.step is not None:
+            self.container["steps"].append(self.step)
+            self.step = None
+
+    def _close_container(self) -> None:
+        self._close_step()
+        self.examples = None
+        self.container = None
+
+    def _take_tags(self) -> Tuple[str, ...]:
+        tags, self.tags = tuple(self.tags), []
+        return tags
+
+    def feed(self, token: Token) -> None:
+        kind = token.kind
+        if kind == "language":
+            if self.feature is not None:
+                raise GherkinSyntaxError(token.line, "# language must come before the Feature line")
+            self.language = token.text
+        elif kind == "empty":
+            pass
+        elif kind == "tags":
+            self._close_step()
+            self.tags.extend(token.text.split())
+        elif kind == "feature":
+            if self.feature is not None:
+                raise GherkinSyntaxError(token.line, "only one Feature is allowed per file")
+            self.feature = {"name": token.text, "tags": self._take_tags(), "line": token.line, "background": None, "scenarios": [], "rules": []}
+            self.in_description = True
+        elif self.feature is None:
+            if kind != "other" or token.text:
+                raise GherkinSyntaxError(token.line, f"expected a Feature line, got {token.keyword or token.text!r}")
+        elif kind == "rule":
+            self._close_container()
+            self.rule = {"name": token.text, "tags": self._take_tags(), "line": token.line, "background": None, "scenarios": []}
+            self.feature["rules"].append(self.rule)
+            self.in_description = True
+        elif kind == "background":
+            self._close_container()
+            owner = self.rule if self.rule is not None else self.feature
+            if owner["background"] is not None or owner["scenarios"]:
+                raise GherkinSyntaxError(token.line, "Background must come before the scenarios and only once")
+            self.container = owner["background"] = {"name": token.text, "line": token.line, "steps": []}
+            self.step_type = "given"
+            self.in_description = True
+        elif kind in ("scenario", "scenario_outline"):
+            self._close_container()
+            owner = self.rule if self.rule is not None else self.feature
+            self.container = {
+                "keyword": token.keyword, "name": token.text, "tags": self._take_tags(), "line": token.line,
+                "steps": [], "examples": []
+            }
+            owner["scenarios"].append(self.container)
+            self.step_type = "given"
+            self.in_description = True
+        elif kind == "examples":
+            self._close_step()
+            if self.container is None or "examples" not in self.container:
+                raise GherkinSyntaxError(token.line, "Examples must belong to a Scenario Outline")
+            self.examples = {"name": token.text, "tags": self._take_tags(), "line": token.line, "header": None, "rows": []}
+            self.container["examples"].append(self.examples)
+            self.in_description = True
+        elif kind == "step":
+            self._close_step()
+            if self.container is None:
+                raise GherkinSyntaxError(token.line, "steps must belong to a Scenario or Background")
+            if self.examples is not None:
+                raise GherkinSyntaxError(token.line, "steps cannot follow Examples")
+            step_type = _step_kind(token.keyword, self.language)
+            if step_type is not None:
+                self.step_type = step_type
+            self.step = {"keyword": token.keyword, "step_type": self.step_type, "text": token.text, "line": token.line, "argument": None}
+            self.in_description = False
+        elif kind == "doc_string":
+            if self.step is None or self.step["argument"] is not None:
+                raise GherkinSyntaxError(token.line, "a doc string must follow a step")
+            self.step["argument"] = DocString(token.text, token.keyword)
+        elif kind == "table_row":
+            self.in_description = False
+            cells = _split_row(token.text, token.line)
+            if self.examples is not None:
+                if self.examples["header"] is None:
+                    self.examples["header"] = cells
+                else:
+                    self._check_width(cells, self.examples["header"], token.line)
+                    self.examples["rows"].append(cells)
+            elif self.step is not None and not isinstance(self.step["argument"], DocString):
+                rows = self.step["argument"].rows if self.step["argument"] else ()
+                if rows:
+                    self._check_width(cells, rows[0], token.line)
+                self.step["argument"] = DataTable(rows + (cells,))
+            else:
+                raise GherkinSyntaxError(token.line, "a table must follow a step or Examples")
+        elif kind == "other":
+            if not self.in_description:
+                raise GherkinSyntaxError(token.line, f"unexpected text {token.text!r}")
+            if self.container is None and self.rule is None:
+                self.description.append(token.text)
+
+    @staticmethod
+    def _check_width(cells: Tuple[str, ...], header: Tuple[str, ...], line: int) -> None:
+        if len(cells) != len(header):
+            raise GherkinSyntaxError(line, f"table row has {len(cells)} cells, expected {len(header)}")
+
+    def build(self) -> Feature:
+        self._close_container()
+        if self.feature is None:
+            raise GherkinSyntaxError(1, "no Feature line found")
+        if self.tags:
+            raise GherkinSyntaxError(1, "tags must precede a Feature, Rule, Scenario or Examples")
+
+        def background(data: Optional[dict]) -> Optional[Background]:
+            if data is None:
+                return None
+            return Background(data["name"], data["line"], tuple(Step(**step) for step in data["steps"]))
+
+        def scenarios(items: List[dict]) -> Tuple[Scenario, ...]:
+            return tuple(
+                Scenario(
+                    item["keyword"], item["name"], item["tags"], item["line"],
+                    tuple(Step(**step) for step in item["steps"]),
+                    tuple(Examples(e["name"], e["tags"], e["line"], e["header"] or (), tuple(e["rows"])) for e in item["examples"])
+                )
+                for item in items
+            )
+
+        feature = self.feature
+        return Feature(
+            feature["name"], feature["tags"], feature["line"], self.language,
+            "\n".join(self.description),
+            background(feature["background"]),
+            scenarios(feature["scenarios"]),
+            tuple(
+                Rule(rule["name"], rule["tags"], rule["line"], background(rule["background"]), scenarios(rule["scenarios"]))
+                for rule in feature["rules"]
+            )
+        )
+
+
+def parse_feature(content: Union[str, Iterable[str]]) -> Feature:
+    """Parse one feature file, given as text or as an iterable of lines"""
+    lines = io.StringIO(content) if isinstance(content, str) else content
+    builder = _Builder()
+    for token in tokenize(lines):
+        builder.feed(token)
+    return builder.build()
+
+
+def expand_steps(feature: Feature) -> Iterator[Step]:
+    """
+    The steps a runner would execute, in order: backgrounds, scenario steps and, for outlines,
+    the steps of every Examples row with its <placeholders> filled in. Outlines without rows
+    keep their placeholders.
+    """
+    def scenario_steps(scenario: Scenario) -> Iterator[Step]:
+        rows = [(examples.header, row) for examples in scenario.examples for row in examples.rows]
+        if not rows:
+            yield from scenario.steps
+            return
+        for header, row in rows:
+            values = dict(zip(header, row))
+            for step in scenario.steps:
+                text = re.sub(r"<([^<>]+)>", lambda name: values.get(name.group(1), name.group(0)), step.text)
+                yield step._replace(text=text)
+
+    def section(backgrounds: Tuple[Optional[Background], ...], scenarios: Tuple[Scenario, ...]) -> Iterator[Step]:
+        for background in backgrounds:
+            if background is not None:
+                yield from background.steps
+        for scenario in scenarios:
+            yield from scenario_steps(scenario)
+
+    yield from section((feature.background,), feature.scenarios)
+    for rule in feature.rules:
+        # A rule's scenarios run the feature's background, then the rule's own
+        yield from section((feature.background, rule.background), rule.scenarios)
+
+
+class FeatureCache:
+    """LRU of parsed features keyed by a hash of their text, so resubmitted features are not parsed again"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Feature]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(content: str) -> str:
+        return hashlib.blake2b(content.encode("utf-8"), digest_size=16).hexdigest()
+
+    def parse(self, content: str) -> Tuple[Feature, bool]:
+        """Return the AST of a feature file and whether it came from the cache"""
+        key = self.make_key(content)
+        with self._lock:
+            feature = self._entries.get(key)
+            if feature is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return feature, True
+
+        # Parse outside the lock; the AST is immutable, so a concurrent duplicate parse is harmless
+        feature = parse_feature(content)
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = feature
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return feature, False
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+feature_cache = FeatureCache(settings.gherkin_cache_size)
@@ -0,0 +1,42 @@
+from typing import Dict, Any
+import json
+from sqlalchemy import Column, String, Text, Integer, Float
+from sqlalchemy.orm import declarative_base
+
+Base = declarative_base()
+
+
+class Job(Base):
+    """A background conversion job and, once finished, its result"""
+    __tablename__ = "jobs"
+
+    id = Column(String(32), primary_key=True)
+    status = Column(String(16), nullable=False)  # queued, running, succeeded, failed
+    stage = Column(String(16))
+    stages = Column(Text, nullable=False)  # JSON {stage: pending|running|done|skipped|failed}
+    filename = Column(String(255))
+    doc_type = Column(String(32))
+    result = Column(Text)  # JSON, once succeeded
+    error = Column(Text)
+    status_code = Column(Integer)
+    created_at = Column(Float, nullable=False)
+    updated_at = Column(Float, nullable=False)
+    expires_at = Column(Float, nullable=False, index=True)
+
+    def to_dict(self, include_result: bool = False) -> Dict[str, Any]:
+        job = {
+            "job_id": self.id,
+            "status": self.status,
+            "stage": self.stage,
+            "stages": json.loads(self.stages),
+            "filename": self.filename,
+            "doc_type": self.doc_type,
+            "error": self.error,
+            "status_code": self.status_code,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "expires_at": self.expires_at
+        }
+        if include_result:
+            job["result"] = json.loads(self.result) if self.result else None
+        return job
@@ -0,0 +1,132 @@
+from typing import Dict, Any, Awaitable, Callable, Optional
+import asyncio
+import logging
+from .job_store import JobStore, JOB_STAGES, job_store
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Reports the stage a job has entered
+ProgressCallback = Callable[[str], Awaitable[None]]
+
+
+class JobQueueFullError(Exception):
+    """Raised when the job queue cannot take another job"""
+
+    def __init__(self, retry_after: int):
+        super().__init__("The job queue is full")
+        self.retry_after = retry_after
+
+
+class JobRunner:
+    """
+    Runs background jobs on the event loop, at most `concurrency` at a time with up to
+    `queue_size` more waiting. Job state and progress are written to the job store from a
+    thread, so database writes never block the loop, and in-process listeners are woken up
+    on every change. While jobs are queued or running, they are touched in the store a few
+    times per stale_after, so other processes can tell them from jobs left behind by a crash.
+    """
+
+    def __init__(self, store: JobStore, concurrency: int, queue_size: int, retry_after: int):
+        self.store = store
+        self.concurrency = max(concurrency, 1)
+        self.queue_size = queue_size
+        self.retry_after = retry_after
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._submitting = 0
+        self._changed: Dict[str, asyncio.Event] = {}
+        self._heartbeat: Optional[asyncio.Task] = None
+
+    async def submit(
+        self,
+        work: Callable[[ProgressCallback], Awaitable[Dict[str, Any]]],
+        filename: Optional[str] = None,
+        doc_type: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Queue a job; work receives a progress callback and returns the job result"""
+        # Jobs still being recorded count too, or concurrent submissions could overfill the queue
+        if len(self._tasks) + self._submitting >= self.concurrency + self.queue_size:
+            raise JobQueueFullError(self.retry_after)
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.concurrency)
+
+        self._submitting += 1
+        try:
+            job = await asyncio.to_thread(self.store.create, filename, doc_type)
+        finally:
+            self._submitting -= 1
+        job_id = job["job_id"]
+        task = asyncio.create_task(self._run(job_id, work))
+        self._tasks[job_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job_id, None))
+        if self._heartbeat is None or self._heartbeat.done():
+            self._heartbeat = asyncio.create_task(self._touch_jobs())
+        return job
+
+    async def wait(self, job_id: str, timeout: float) -> bool:
+        """Wait until the job changes; False if it did not within timeout"""
+        changed = self._changed.setdefault(job_id, asyncio.Event())
+        try:
+            await asyncio.wait_for(changed.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def shutdown(self) -> None:
+        """Cancel all queued and running jobs"""
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+        for task in list(self._tasks.values()):
+            task.cancel()
+
+    async def _touch_jobs(self) -> None:
+        while self._tasks:
+            await asyncio.sleep(self.store.stale_after / 4)
+            await asyncio.to_thread(self.store.touch, list(self._tasks))
+
+    async def _run(self, job_id: str, work: Callable[[ProgressCallback], Awaitable[Dict[str, Any]]]) -> None:
+        stages = {stage: "pending" for stage in JOB_STAGES}
+
+        async def progress(stage: str) -> None:
+            for name, state in stages.items():
+                if state == "running":
+                    stages[name] = "done"
+            stages[stage] = "running"
+            await self._update(job_id, stage=stage, stages=dict(stages))
+
+        def failure(status_code: int, error: str) -> Dict[str, Any]:
+            for name, state in stages.items():
+                if state == "running":
+                    stages[name] = "failed"
+            return {"status": "failed", "stages": stages, "status_code": status_code, "error": error}
+
+        try:
+            async with self._slots:
+                await self._update(job_id, status="running")
+                result = await work(progress)
+        except asyncio.CancelledError:
+            # The loop is shutting down and will not run another write; record the failure right away
+            self.store.update(job_id, **failure(503, "The server shut down before the job finished"))
+            raise
+        except Exception as e:
+            # HTTPException-style errors keep their status code and detail
+            status_code = getattr(e, "status_code", 500)
+            error = getattr(e, "detail", None) or str(e)
+            if status_code >= 500:
+                logger.error(f"Job {job_id} failed: {error}")
+            await self._update(job_id, **failure(status_code, str(error)))
+            return
+
+        for name, state in stages.items():
+            stages[name] = "done" if state in ("running", "done") else "skipped"
+        await self._update(job_id, status="succeeded", stage=None, stages=stages, status_code=200, result=result)
+
+    async def _update(self, job_id: str, **fields: Any) -> None:
+        await asyncio.to_thread(self.store.update, job_id, **fields)
+        changed = self._changed.pop(job_id, None)
+        if changed is not None:
+            changed.set()
+
+
+job_runner = JobRunner(job_store, settings.job_concurrency, settings.job_queue_size, settings.executor_retry_after)
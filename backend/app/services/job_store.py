@@ -0,0 +1,152 @@
+from typing import Dict, Any, List, Optional
+import json
+import threading
+import time
+import uuid
+from ..core.config import settings
+
+# Progress stages of a conversion job, in pipeline order
+JOB_STAGES = ("extract", "segment", "parse", "generate")
+
+TERMINAL_STATUSES = ("succeeded", "failed")
+
+
+# Recorded for unfinished jobs whose server stopped updating them
+ABANDONED_ERROR = "The server running the job stopped before it finished"
+
+
+class JobStore:
+    """
+    SQL-backed job store. Finished jobs expire ttl seconds after they finished; expired jobs are
+    invisible and purged on the next write. Queued and running jobs do not expire while the process
+    running them keeps touching them; one not updated for stale_after seconds was left behind by a
+    crash or restart and is failed. The methods block on the database, so async code calls them in
+    a thread.
+    """
+
+    def __init__(self, url: str, ttl: float, stale_after: float):
+        self.url = url
+        self.ttl = ttl
+        self.stale_after = stale_after
+        self._sessions = None
+        self._lock = threading.Lock()
+
+    def create(self, filename: Optional[str], doc_type: Optional[str]) -> Dict[str, Any]:
+        """Record a new queued job"""
+        from .job_model import Job
+
+        self.purge_expired()
+        now = time.time()
+        job = Job(
+            id=uuid.uuid4().hex,
+            status="queued",
+            stages=json.dumps({stage: "pending" for stage in JOB_STAGES}),
+            filename=filename,
+            doc_type=doc_type,
+            created_at=now,
+            updated_at=now,
+            expires_at=now + self.ttl
+        )
+        with self._session() as session:
+            session.add(job)
+            session.commit()
+        return job.to_dict()
+
+    def get(self, job_id: str, include_result: bool = False) -> Optional[Dict[str, Any]]:
+        """Return a job, or None if it is unknown or expired"""
+        from .job_model import Job
+
+        with self._session() as session:
+            job = session.get(Job, job_id)
+            now = time.time()
+            if job is not None and job.status not in TERMINAL_STATUSES and job.updated_at <= now - self.stale_after:
+                self._abandon(job, now)
+                session.commit()
+            if job is None or (job.status in TERMINAL_STATUSES and job.expires_at <= now):
+                return None
+            return job.to_dict(include_result)
+
+    def update(self, job_id: str, **fields: Any) -> Optional[Dict[str, Any]]:
+        """Update the fields of a job; finishing it restarts its time to live"""
+        from .job_model import Job
+
+        with self._session() as session:
+            job = session.get(Job, job_id)
+            if job is None:
+                return None
+            for name, value in fields.items():
+                if name in ("stages", "result"):
+                    value = json.dumps(value)
+                setattr(job, name, value)
+            job.updated_at = time.time()
+            if job.status in TERMINAL_STATUSES:
+                job.expires_at = job.updated_at + self.ttl
+            session.commit()
+            return job.to_dict()
+
+    def touch(self, job_ids: List[str]) -> None:
+        """Record that the unfinished jobs among job_ids are still queued or running"""
+        from .job_model import Job
+
+        if not job_ids:
+            return
+        with self._session() as session:
+            session.query(Job).filter(
+                Job.id.in_(job_ids), Job.status.notin_(TERMINAL_STATUSES)
+            ).update({Job.updated_at: time.time()}, synchronize_session=False)
+            session.commit()
+
+    def purge_expired(self) -> int:
+        """Fail abandoned jobs, delete expired finished jobs and return how many were removed"""
+        from .job_model import Job
+
+        now = time.time()
+        with self._session() as session:
+            for job in session.query(Job).filter(
+                Job.status.notin_(TERMINAL_STATUSES), Job.updated_at <= now - self.stale_after
+            ):
+                self._abandon(job, now)
+            removed = session.query(Job).filter(
+                Job.status.in_(TERMINAL_STATUSES), Job.expires_at <= now
+            ).delete(synchronize_session=False)
+            session.commit()
+            return removed
+
+    def _abandon(self, job, now: float) -> None:
+        stages = json.loads(job.stages)
+        job.stages = json.dumps({stage: "failed" if state == "running" else state for stage, state in stages.items()})
+        job.status = "failed"
+        job.status_code = 503
+        job.error = ABANDONED_ERROR
+        job.updated_at = now
+        job.expires_at = now + self.ttl
+
+    def _session(self):
+        if self._sessions is None:
+            with self._lock:
+                if self._sessions is None:
+                    self._sessions = self._connect()
+        return self._sessions()
+
+    def _connect(self):
+        """Create the engine and the schema on first use; SQLAlchemy is imported then, not with the app"""
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        from sqlalchemy.pool import StaticPool
+        from .job_model import Base
+
+        if self.url.startswith("sqlite"):
+            in_memory = self.url in ("sqlite://", "sqlite:///:memory:")
+            engine = create_engine(
+                self.url,
+                connect_args={"check_same_thread": False},
+                # An in-memory database only lives as long as its one connection
+                poolclass=StaticPool if in_memory else None
+            )
+        else:
+            engine = create_engine(self.url)
+        Base.metadata.create_all(engine)
+        return sessionmaker(bind=engine, expire_on_commit=False)
+
+
+job_store = JobStore(settings.job_store_url, settings.job_ttl, settings.job_stale_after)
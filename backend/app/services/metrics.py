@@ -0,0 +1,170 @@
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from contextlib import contextmanager
+from contextvars import ContextVar
+import bisect
+import threading
+import time
+
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+BYTES_BUCKETS = tuple(1024 * 4 ** power for power in range(10))  # 1 KiB .. 256 MiB
+COUNT_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000, 10000, 100000, 1000000)
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus exposition format, keyed by one label"""
+
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float], label: str = "stage"):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self.label = label
+        self._series: Dict[str, List[float]] = {}  # label value -> bucket counts + [sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, label_value: str) -> None:
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                series = self._series[label_value] = [0.0] * (len(self.buckets) + 2)
+            for index in range(bisect.bisect_left(self.buckets, value), len(self.buckets)):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for label_value, series in sorted(self._series.items()):
+                label = f'{self.label}="{label_value}"'
+                for bound, count in zip(self.buckets, series):
+                    lines.append(f'{self.name}_bucket{{{label},le="{bound:g}"}} {count:g}')
+                lines.append(f'{self.name}_bucket{{{label},le="+Inf"}} {series[-1]:g}')
+                lines.append(f"{self.name}_sum{{{label}}} {series[-2]:g}")
+                lines.append(f"{self.name}_count{{{label}}} {series[-1]:g}")
+        return lines
+
+
+class Counter:
+    """Monotonic counter keyed by one label"""
+
+    def __init__(self, name: str, help_text: str, label: str = "stage"):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self._values: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label_value: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[label_value] = self._values.get(label_value, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for label_value, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{{{self.label}="{label_value}"}} {value:g}')
+        return lines
+
+
+class Gauge:
+    """Current value keyed by one label"""
+
+    def __init__(self, name: str, help_text: str, label: str = "stage"):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self._values: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def set(self, value: float, label_value: str) -> None:
+        with self._lock:
+            self._values[label_value] = value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} gauge"]
+        with self._lock:
+            for label_value, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{{{self.label}="{label_value}"}} {value:g}')
+        return lines
+
+
+class PipelineMetrics:
+    """
+    Per-stage metrics of the conversion pipeline. Stage durations are also collected per request,
+    for the Server-Timing header, while a request is being tracked with track_request().
+    """
+
+    def __init__(self):
+        self.stage_seconds = Histogram(
+            "bdd_stage_duration_seconds", "Wall-clock time of a pipeline stage, including executor queueing", DURATION_BUCKETS
+        )
+        self.stage_bytes = Histogram("bdd_stage_input_bytes", "Size of the input of a pipeline stage", BYTES_BUCKETS)
+        self.stage_errors = Counter("bdd_stage_errors_total", "Pipeline stages that raised an error")
+        self.document_counts = Histogram(
+            "bdd_document_items", "Pages extracted, sentences segmented and scenarios generated per document",
+            COUNT_BUCKETS, label="item"
+        )
+        # Priority lanes of the stage scheduler
+        self.lane_waiting = Gauge("bdd_scheduler_waiting_tasks", "Stage tasks waiting for a worker", label="lane")
+        self.lane_running = Gauge("bdd_scheduler_running_tasks", "Stage tasks running on a worker", label="lane")
+        self.lane_wait_seconds = Histogram(
+            "bdd_scheduler_wait_seconds", "Time a stage task waited for a worker", DURATION_BUCKETS, label="lane"
+        )
+        self.lane_rejections = Counter(
+            "bdd_scheduler_rejected_total", "Stage tasks refused because their lane's queue was full", label="lane"
+        )
+        self._request_timings: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("request_timings", default=None)
+
+    @contextmanager
+    def stage(self, name: str, size: Optional[int] = None) -> Iterator[None]:
+        """Time a pipeline stage and record its input size"""
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.stage_errors.inc(name)
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            self.stage_seconds.observe(duration, name)
+            if size is not None:
+                self.stage_bytes.observe(size, name)
+            timings = self._request_timings.get()
+            if timings is not None:
+                timings.append((name, duration))
+
+    def count(self, item: str, value: int) -> None:
+        """Record the number of pages, sentences or scenarios of a document"""
+        self.document_counts.observe(value, item)
+
+    @contextmanager
+    def track_request(self) -> Iterator[List[Tuple[str, float]]]:
+        """Collect the stage timings of the current request"""
+        timings: List[Tuple[str, float]] = []
+        token = self._request_timings.set(timings)
+        try:
+            yield timings
+        finally:
+            self._request_timings.reset(token)
+
+    @staticmethod
+    def server_timing(timings: List[Tuple[str, float]], total: float) -> str:
+        """Format stage timings as a Server-Timing header; repeated stages (e.g. PDF page runs) are summed"""
+        durations: Dict[str, float] = {}
+        for name, duration in list(timings):
+            durations[name] = durations.get(name, 0.0) + duration
+        entries = [f"{name};dur={duration * 1000:.1f}" for name, duration in durations.items()]
+        entries.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(entries)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in (
+            self.stage_seconds, self.stage_bytes, self.stage_errors, self.document_counts,
+            self.lane_waiting, self.lane_running, self.lane_wait_seconds, self.lane_rejections
+        ):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+pipeline_metrics = PipelineMetrics()
@@ -0,0 +1,146 @@
+from typing import Dict, Any, List, Optional, Tuple
+from collections import Counter
+import math
+import re
+from .step_normalizer import VALUE_KINDS, tokenize, tokens_fold_together
+
+# Non-alphanumeric runs collapse to one space before shingling
+NON_WORD = re.compile(r"[\W_]+")
+
+# Length of the character shingles texts are compared by
+SHINGLE_SIZE = 4
+
+
+def normalize(text: str) -> str:
+    return NON_WORD.sub(" ", text.lower()).strip()
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> set:
+    """The character shingles of normalized text; a text shorter than size is its own shingle"""
+    if len(text) <= size:
+        return {text}
+    return {text[position:position + size] for position in range(len(text) - size + 1)}
+
+
+def jaccard(first: set, second: set) -> float:
+    common = len(first & second)
+    return common / (len(first) + len(second) - common) if common else 0.0
+
+
+def _prefix_length(size: int, threshold: float) -> int:
+    # Two sets with Jaccard >= threshold share one of the first size - ceil(threshold * size) + 1
+    # elements of each, under any common order of the elements
+    return size - math.ceil(threshold * size - 1e-9) + 1
+
+
+class NearDuplicateIndex:
+    """
+    Texts added one at a time, each matched against the representatives added before it: a text
+    whose shingle set has a Jaccard similarity of at least threshold with a representative joins
+    its group, otherwise it becomes the representative of a new group. Exact duplicates after
+    normalization join the group of their first occurrence. Texts with different values (numbers,
+    quoted strings), or differing in the few words an outline would turn into a column, never join
+    each other's group: they are variants for outline folding to keep, not duplicates.
+
+    Representatives are indexed by the rarest shingles of their sets (prefix filtering), so a text
+    is only compared with the representatives it shares one of those shingles with rather than with
+    all of them. No similar representative is missed: texts similar enough always share one.
+    Shingles are ranked by first appearance, latest first; common shingles appear early, so the
+    prefixes are made of rare ones without knowing the texts to come.
+    """
+
+    def __init__(self, threshold: float = 0.7, size: int = SHINGLE_SIZE):
+        if not 0 < threshold <= 1:
+            raise ValueError("threshold must be in (0, 1]")
+        self.threshold = threshold
+        self.size = size
+        self.representatives: List[str] = []
+        self._groups: Dict[Tuple[Tuple[str, ...], str], int] = {}
+        self._ranks: Dict[str, int] = {}
+        self._sets: List[frozenset] = []
+        self._tokens: List[List[Tuple[str, str]]] = []
+        self._postings: Dict[Tuple[Tuple[str, ...], int], List[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.representatives)
+
+    def add(self, text: str) -> Optional[int]:
+        """Add a text; returns the number of the group it joined, or None when it starts a group"""
+        tokens = tokenize(text)
+        # Representatives are only posted under shingles of their own values, so texts with
+        # other values are never even compared
+        values = tuple(token for kind, token in tokens if kind in VALUE_KINDS)
+        normalized = normalize(text)
+        key = (values, normalized)
+        if key in self._groups:
+            return self._groups[key]
+
+        ranks = self._ranks
+        ordered = sorted((ranks.setdefault(shingle, len(ranks)) for shingle in shingles(normalized, self.size)), reverse=True)
+        ranked = frozenset(ordered)
+        count = len(ordered)
+        prefix = ordered[:_prefix_length(count, self.threshold)]
+
+        candidates: Counter = Counter()
+        for token in prefix:
+            candidates.update(self._postings.get((values, token), ()))
+
+        # Representatives sharing the most rare shingles are the likeliest matches; the first that
+        # reaches the threshold, and is not a variant of the text, represents it
+        for group, _ in candidates.most_common():
+            other = len(self._sets[group])
+            # Sets of too different sizes cannot reach the threshold
+            if other < self.threshold * count or count < self.threshold * other:
+                continue
+            if jaccard(ranked, self._sets[group]) >= self.threshold and not tokens_fold_together(tokens, self._tokens[group]):
+                self._groups[key] = group
+                return group
+
+        group = len(self.representatives)
+        self._groups[key] = group
+        self.representatives.append(text)
+        self._sets.append(ranked)
+        self._tokens.append(tokens)
+        for token in prefix:
+            self._postings.setdefault((values, token), []).append(group)
+        return None
+
+    def similarity(self, text: str, group: int) -> float:
+        """Jaccard similarity of a text with the representative of a group"""
+        return round(jaccard(shingles(normalize(text), self.size), shingles(normalize(self.representatives[group]), self.size)), 3)
+
+
+def group_near_duplicates(texts: List[str], threshold: float = 0.7, size: int = SHINGLE_SIZE) -> List[List[int]]:
+    """
+    Group the indexes of texts whose shingle sets have a Jaccard similarity of at least threshold
+    with the first text of their group, which represents it. Groups are in the order of their
+    first text; a text joins the group of an earlier representative similar enough to it, or
+    starts a group of its own when there is none (see NearDuplicateIndex).
+    """
+    index = NearDuplicateIndex(threshold, size)
+    groups: List[List[int]] = []
+    for position, text in enumerate(texts):
+        group = index.add(text)
+        if group is None:
+            groups.append([position])
+        else:
+            groups[group].append(position)
+    return groups
+
+
+def collapse_near_duplicates(texts: List[str], threshold: float = 0.7) -> Tuple[List[str], List[Dict[str, Any]]]:
+    """
+    Keep the first text of every group of near-duplicates. Returns the kept texts, in order,
+    and {"kept", "merged": [{"text", "similarity"}]} for each group that lost members.
+    """
+    index = NearDuplicateIndex(threshold)
+    kept: List[str] = []
+    merged: Dict[int, List[Dict[str, Any]]] = {}
+    for text in texts:
+        group = index.add(text)
+        if group is None:
+            kept.append(text)
+        else:
+            merged.setdefault(group, []).append({"text": text, "similarity": index.similarity(text, group)})
+    duplicates = [{"kept": index.representatives[group], "merged": merged[group]} for group in sorted(merged)]
+    return kept, duplicates
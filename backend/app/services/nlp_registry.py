@@ -0,0 +1,82 @@
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
+import logging
+import threading
+from ..core.config import settings
+
+if TYPE_CHECKING:
+    from spacy.language import Language
+
+logger = logging.getLogger(__name__)
+
+# Components dropped from the model for the sentence-only profile
+SENTENCE_PROFILE_EXCLUDE = ["tok2vec", "tagger", "morphologizer", "parser", "senter", "attribute_ruler", "lemmatizer", "ner"]
+
+SENTENCE_PROFILE_MAX_LENGTH = 100_000_000
+
+PROFILES = ("sentences", "full")
+
+
+class NLPRegistry:
+    """
+    Process-wide registry of spaCy pipelines, loaded lazily on first use. spaCy itself is
+    only imported then, so importing the app stays cheap.
+
+    Profiles:
+      - "sentences": tokenizer + rule-based sentencizer only, for the regex-driven
+        paths that just iterate doc.sents
+      - "full": the complete model pipeline, for NER/dependency based features
+    """
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self._pipelines: Dict[str, "Language"] = {}
+        self._lock = threading.Lock()
+
+    def get(self, profile: str = "sentences") -> "Language":
+        """Return the pipeline for a profile, loading it on first use"""
+        nlp = self._pipelines.get(profile)
+        if nlp is not None:
+            return nlp
+
+        with self._lock:
+            nlp = self._pipelines.get(profile)
+            if nlp is None:
+                nlp = self._load(profile)
+                self._pipelines[profile] = nlp
+            return nlp
+
+    def warm_up(self, profiles: Optional[Iterable[str]] = None) -> None:
+        """Load the given profiles (all by default) ahead of the first request"""
+        for profile in profiles or PROFILES:
+            self.get(profile)
+
+    def is_loaded(self, profile: str) -> bool:
+        return profile in self._pipelines
+
+    def loaded_profiles(self) -> List[str]:
+        return sorted(self._pipelines)
+
+    def _load(self, profile: str) -> "Language":
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown NLP profile: {profile}. Valid profiles are: {', '.join(PROFILES)}")
+
+        import spacy
+
+        logger.info(f"Loading spaCy model {self.model_name} with profile '{profile}'")
+        try:
+            if profile == "full":
+                return spacy.load(self.model_name)
+
+            nlp = spacy.load(self.model_name, exclude=SENTENCE_PROFILE_EXCLUDE)
+            nlp.add_pipe("sentencizer")
+            # The length limit guards parser/NER memory use; the rule-based sentencizer is linear
+            nlp.max_length = SENTENCE_PROFILE_MAX_LENGTH
+            return nlp
+        except OSError as e:
+            logger.error(f"Failed to load spaCy model: {str(e)}")
+            raise RuntimeError(
+                f"Failed to load spaCy model {self.model_name}. Please ensure the spaCy model is installed."
+            )
+
+
+nlp_registry = NLPRegistry(settings.spacy_model)
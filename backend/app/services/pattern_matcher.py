@@ -0,0 +1,145 @@
+from typing import Dict, Any, List, Optional, Pattern, Set
+from pathlib import Path
+import json
+import re
+
+try:
+    import re._parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+
+
+class PatternMatcher:
+    """
+    Compiles a table of {category: [regex, ...]} into combined alternations, so a sentence
+    or line is classified with one regex scan per category instead of one re.search per pattern.
+
+    Categories keep their table order: match() returns the first category whose patterns
+    match at the start of the text, mirroring an if/elif chain over the categories.
+    """
+
+    def __init__(self, table: Dict[str, List[str]], flags: int = re.IGNORECASE):
+        self.categories = [category for category, patterns in table.items() if patterns]
+        # Category names are not necessarily identifiers, so groups get positional names
+        self._groups = {f"c{index}": category for index, category in enumerate(self.categories)}
+
+        try:
+            # Patterns with backreferences or named groups cannot share an alternation: their group
+            # numbers would shift and their names could clash, so they keep a regex of their own
+            self._standalone: Dict[str, List[Pattern]] = {}
+            alternations = {}
+            for category in self.categories:
+                combined = []
+                for pattern in table[category]:
+                    if needs_own_regex(pattern, flags):
+                        self._standalone.setdefault(category, []).append(re.compile(pattern, flags))
+                    else:
+                        combined.append(f"(?:{pattern})")
+                if combined:
+                    alternations[category] = "|".join(combined)
+
+            self._per_category = {
+                category: re.compile(alternation, flags) for category, alternation in alternations.items()
+            }
+            # Anchored alternation: the first category to match at position 0 wins
+            self._first = re.compile(
+                "|".join(
+                    f"(?P<{group}>{alternations[category]})"
+                    for group, category in self._groups.items() if category in alternations
+                ),
+                flags
+            ) if alternations else None
+        except re.error as e:
+            raise ValueError(f"Invalid pattern: {str(e)}")
+
+    def match(self, text: str) -> Optional[str]:
+        """Return the first category with a pattern matching at the start of the text"""
+        matches = self._first.match(text) if self._first is not None else None
+        found = self._groups[matches.lastgroup] if matches else None
+        if self._standalone:
+            # A category before the one the alternation found may still match through its own regexes
+            for category in self.categories:
+                if category == found:
+                    break
+                if any(pattern.match(text) for pattern in self._standalone.get(category, ())):
+                    return category
+        return found
+
+    def classify(self, text: str) -> Set[str]:
+        """Return all categories with a pattern matching anywhere in the text"""
+        # One search per category alternation; a single regex with a lookahead per category
+        # would lose the literal-prefix scanning re.search gets and measures slower
+        found = {category for category, pattern in self._per_category.items() if pattern.search(text)}
+        for category, patterns in self._standalone.items():
+            if category not in found and any(pattern.search(text) for pattern in patterns):
+                found.add(category)
+        return found
+
+    def findall(self, text: str, category: str) -> List[str]:
+        """Return every non-overlapping match of a category's patterns"""
+        patterns = list(self._standalone.get(category, ()))
+        if category in self._per_category:
+            patterns.insert(0, self._per_category[category])
+        return [matches.group(0) for pattern in patterns for matches in pattern.finditer(text)]
+
+
+def _has_backreference(node: Any) -> bool:
+    if isinstance(node, sre_parse.SubPattern):
+        return any(
+            op in (sre_parse.GROUPREF, sre_parse.GROUPREF_EXISTS) or _has_backreference(argument)
+            for op, argument in node
+        )
+    if isinstance(node, (tuple, list)):
+        return any(_has_backreference(item) for item in node)
+    return False
+
+
+def needs_own_regex(pattern: str, flags: int = 0) -> bool:
+    """Whether a pattern uses named groups or backreferences, which break when it is embedded in an alternation"""
+    return bool(re.compile(pattern, flags).groupindex) or _has_backreference(sre_parse.parse(pattern, flags))
+
+
+def load_pattern_pack(path: str) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Load a custom pattern pack from a JSON or YAML file. Packs use the same layout as
+    DocumentParser._load_patterns: {doc_type: {category: [regex, ...]}}.
+    """
+    pack_path = Path(path)
+    text = pack_path.read_text(encoding="utf-8")
+
+    if pack_path.suffix.lower() in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError:
+            raise RuntimeError(f"PyYAML is required to load the YAML pattern pack {path}")
+        pack = yaml.safe_load(text)
+    else:
+        pack = json.loads(text)
+
+    if not isinstance(pack, dict) or not all(
+        isinstance(categories, dict) and all(isinstance(patterns, list) for patterns in categories.values())
+        for categories in pack.values()
+    ):
+        raise ValueError(f"Invalid pattern pack {path}: expected {{doc_type: {{category: [patterns]}}}}")
+
+    for doc_type, categories in pack.items():
+        for category, patterns in categories.items():
+            for pattern in patterns:
+                try:
+                    re.compile(pattern)
+                except re.error as e:
+                    raise ValueError(f"Invalid pattern in {path} ({doc_type}/{category}): {pattern!r}: {str(e)}")
+    return pack
+
+
+def merge_patterns(base: Dict[str, Dict[str, List[str]]], pack: Dict[str, Any]) -> Dict[str, Dict[str, List[str]]]:
+    """Append the patterns of a pack to a pattern table, adding new doc types and categories as needed"""
+    merged = {doc_type: {category: list(patterns) for category, patterns in categories.items()}
+              for doc_type, categories in base.items()}
+    for doc_type, categories in pack.items():
+        target = merged.setdefault(doc_type, {})
+        for category, patterns in categories.items():
+            target.setdefault(category, []).extend(
+                pattern for pattern in patterns if pattern not in target[category]
+            )
+    return merged
@@ -0,0 +1,102 @@
+from typing import Dict, Any, List, Optional, Tuple
+from .document_ir import Record
+from .document_parser import DocumentParser
+from .document_type_identifier import DocumentTypeIdentifier
+from .gherkin_generator import FeatureWriter, GherkinGenerator
+from .section_detector import detect_sections
+from .text_extractor import (
+    file_format, select_pages, pdf_page_count, pdf_outline, locate_headings,
+    iter_pdf_pages, extract_text_from_pdf, extract_document
+)
+
+__all__ = [
+    # Extraction and section stages, re-exported so endpoints ship them to workers from one module
+    "file_format", "select_pages", "pdf_page_count", "pdf_outline", "locate_headings",
+    "iter_pdf_pages", "extract_text_from_pdf", "extract_document", "detect_sections",
+    "document_parser", "doc_identifier", "gherkin_generator",
+    "sentence_spans", "classify_document", "parse_document", "segment_sections", "convert_pdf_pages",
+    "parse_documents", "convert_sections", "parse_records",
+]
+
+# Stage functions run either inline or inside executor worker processes,
+# so they are plain module-level functions over picklable arguments.
+document_parser = DocumentParser()
+doc_identifier = DocumentTypeIdentifier()
+gherkin_generator = GherkinGenerator()
+
+
+def sentence_spans(text: str) -> List[Tuple[int, int]]:
+    return document_parser.sentence_spans(text)
+
+
+def classify_document(text: str, max_chars: Optional[int] = None) -> Dict[str, Any]:
+    """Return the confidence scores and the suggested type of a document, optionally from a sample"""
+    return doc_identifier.classify(text, max_chars)
+
+
+def parse_document(
+    text: str,
+    doc_type: str,
+    sentences: Optional[List[Tuple[int, int]]] = None,
+    tables: Optional[List[Dict[str, Any]]] = None
+) -> Dict[str, Any]:
+    return document_parser.parse_document(text, doc_type, sentences, tables)
+
+
+def segment_sections(text: str, doc_type: str, max_chars: Optional[int] = None) -> List[str]:
+    """Split a document into the sections incremental conversion fingerprints and parses separately"""
+    return document_parser.segment_sections(text, doc_type, max_chars)
+
+
+def convert_pdf_pages(content: Any, feature_name: str, doc_type: str, outlines: bool = False) -> Tuple[str, Dict[str, Any]]:
+    """
+    Render the feature file of a BRD/FRD PDF while its pages are extracted: each page's complete
+    paragraphs are parsed and rendered before the next page is read, so the document text is
+    never held in full. Returns the feature file, which equals parsing the extracted text of the
+    whole PDF, and the near-duplicates merged, as listed in a parse result.
+    """
+    sections = document_parser.iter_page_sections(iter_pdf_pages(content), doc_type)
+    deduplicate = document_parser.duplicate_filter()
+    records = deduplicate(document_parser.iter_records(sections, doc_type))
+    writer = FeatureWriter(gherkin_generator, feature_name, doc_type, outlines)
+    return "".join([*writer.header(), *writer.write(records), *writer.close()]), deduplicate.duplicates
+
+
+def parse_documents(
+    texts: List[str],
+    doc_type: str,
+    sentences: List[Optional[List[Tuple[int, int]]]],
+    tables: List[Optional[List[Dict[str, Any]]]]
+) -> List[Dict[str, Any]]:
+    """Parse a batch of documents with their NLP work batched through nlp.pipe"""
+    return document_parser.parse_documents(texts, doc_type, sentences, tables)
+
+
+def convert_sections(texts: List[str], names: List[str], doc_type: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Parse document sections and render each as its own feature file. Without a doc_type each
+    section is classified on its own; sections of an unknown type yield no feature.
+    Returns {"doc_type", "feature_content", "scenarios"} per section; scenarios counts those with steps.
+    """
+    doc_types = [doc_type or doc_identifier.get_document_type(text) for text in texts]
+    results: List[Dict[str, Any]] = [{"doc_type": section_type, "feature_content": None, "scenarios": 0}
+                                     for section_type in doc_types]
+
+    for section_type in set(filter(None, doc_types)):
+        indices = [index for index, candidate in enumerate(doc_types) if candidate == section_type]
+        parsed = document_parser.parse_documents([texts[index] for index in indices], section_type)
+        for index, parsed_content in zip(indices, parsed):
+            groups = gherkin_generator.build_scenario_groups(parsed_content, section_type)
+            scenarios = [gherkin_generator.render_scenario(scenario) for group in groups for scenario in group]
+            # A test case without any steps still renders an empty scenario
+            results[index]["scenarios"] = sum(1 for group in groups for scenario in group if scenario.steps)
+            results[index]["feature_content"] = gherkin_generator.render_feature(names[index], section_type, scenarios)
+    return results
+
+
+def parse_records(texts: List[str], doc_type: str, tables: Optional[List[Optional[List[Dict[str, Any]]]]] = None) -> List[Record]:
+    """
+    Parse consecutive sections of a document into records (see DocumentParser.iter_records).
+    Near-duplicates are not collapsed here: that takes the records of the whole document.
+    """
+    return list(document_parser.iter_records(texts, doc_type, tables))
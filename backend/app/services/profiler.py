@@ -0,0 +1,97 @@
+from typing import List, Optional
+from pathlib import Path
+import cProfile
+import hmac
+import io
+import ipaddress
+import logging
+import pstats
+import threading
+import uuid
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def profiling_allowed(token: Optional[str], client_host: Optional[str]) -> bool:
+    """
+    Whether a client may profile requests and read profiles: with the configured token, or
+    without one configured, only from a loopback address
+    """
+    if settings.profiling_token:
+        return hmac.compare_digest(token or "", settings.profiling_token)
+    try:
+        return ipaddress.ip_address(client_host or "").is_loopback
+    except ValueError:
+        return client_host == "localhost"
+
+
+class RequestProfiler:
+    """
+    Captures cProfile profiles of single requests and keeps the most recent ones on disk.
+
+    cProfile follows the event loop thread, so a profile also contains whatever other requests
+    ran concurrently, and stages run in executor worker processes only show up as waiting.
+    Only one request is profiled at a time.
+    """
+
+    def __init__(self, directory: str, keep: int):
+        self.directory = Path(directory)
+        self.keep = keep
+        self._lock = threading.Lock()
+
+    def start(self) -> Optional[cProfile.Profile]:
+        """Start profiling, or return None if another request is being profiled"""
+        if not self._lock.acquire(blocking=False):
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler (e.g. a debugger) is already active
+            self._lock.release()
+            return None
+        return profile
+
+    def stop(self, profile: cProfile.Profile) -> str:
+        """Stop profiling, save the profile and return its id"""
+        try:
+            profile.disable()
+        finally:
+            self._lock.release()
+
+        profile_id = uuid.uuid4().hex
+        self.directory.mkdir(parents=True, exist_ok=True)
+        profile.dump_stats(str(self.path(profile_id)))
+        self._prune()
+        return profile_id
+
+    def path(self, profile_id: str) -> Path:
+        return self.directory / f"{profile_id}.prof"
+
+    def exists(self, profile_id: str) -> bool:
+        # Ids are uuid hex strings; anything else could escape the directory
+        return len(profile_id) == 32 and all(c in "0123456789abcdef" for c in profile_id) and self.path(profile_id).is_file()
+
+    def summary(self, profile_id: str, limit: int = 50, sort: str = "cumulative") -> str:
+        """Human-readable pstats report of a saved profile"""
+        output = io.StringIO()
+        stats = pstats.Stats(str(self.path(profile_id)), stream=output)
+        stats.strip_dirs().sort_stats(sort).print_stats(limit)
+        return output.getvalue()
+
+    def list(self) -> List[str]:
+        if not self.directory.is_dir():
+            return []
+        files = sorted(self.directory.glob("*.prof"), key=lambda path: path.stat().st_mtime, reverse=True)
+        return [path.stem for path in files]
+
+    def _prune(self) -> None:
+        for profile_id in self.list()[self.keep:]:
+            try:
+                self.path(profile_id).unlink()
+            except OSError as e:
+                logger.warning(f"Could not remove old profile {profile_id}: {str(e)}")
+
+
+request_profiler = RequestProfiler(settings.profile_dir, settings.profile_keep)
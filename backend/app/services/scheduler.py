@@ -0,0 +1,131 @@
+from typing import Dict, Iterator, List, Tuple
+from contextlib import contextmanager
+from contextvars import ContextVar
+import asyncio
+import heapq
+import itertools
+import time
+from .metrics import pipeline_metrics
+from ..core.config import settings
+
+# Priority lanes, highest first: a free worker goes to the first lane with a task waiting
+LANES = ("interactive", "bulk")
+
+
+class Lane:
+    """The tasks of one priority lane: the number running, and those waiting ordered by their start tag"""
+
+    def __init__(self, name: str, limit: int):
+        self.name = name
+        self.limit = max(limit, 1)
+        self.running = 0
+        self.waiting = 0
+        self.virtual_time = 0.0
+        # (start tag, sequence, ticket, enqueue time); cancelled tickets are dropped when they come up
+        self.queue: List[Tuple[float, int, asyncio.Future, float]] = []
+        self.finish_tags: Dict[str, float] = {}  # client -> finish tag of its latest task
+
+
+class StageScheduler:
+    """
+    Decides which stage task gets the next free executor slot. Tasks wait in priority lanes; a free
+    slot goes to the interactive lane first, and each lane runs at most its concurrency limit, so
+    bulk work can be kept off some of the workers. Within a lane, clients share the slots by
+    start-time fair queuing: every task of a client is tagged 1/weight after the client's previous
+    one, and the task with the lowest tag runs first. A client sending hundreds of documents
+    therefore takes turns with one sending a single document instead of going first.
+
+    The lane and client of a task come from the request being served, set with priority().
+    All methods run on the event loop.
+    """
+
+    def __init__(self, slots: int, lane_limits: Dict[str, int], queue_size: int, client_weights: Dict[str, float]):
+        self.slots = max(slots, 1)
+        self.queue_size = queue_size
+        self.client_weights = client_weights
+        self.lanes = {name: Lane(name, lane_limits.get(name, self.slots)) for name in LANES}
+        self.running = 0
+        self._sequence = itertools.count()
+        self._priority: ContextVar[Tuple[str, str]] = ContextVar("stage_priority", default=(LANES[0], ""))
+
+    @contextmanager
+    def priority(self, lane: str, client: str) -> Iterator[None]:
+        """Schedule the stage tasks of the current request (and the tasks it starts) in this lane, for this client"""
+        token = self._priority.set((lane if lane in self.lanes else LANES[0], client))
+        try:
+            yield
+        finally:
+            self._priority.reset(token)
+
+    def current(self) -> Tuple[str, str]:
+        return self._priority.get()
+
+    async def acquire(self, lane_name: str, client: str) -> bool:
+        """
+        Wait until a task of this lane and client may start, and take its slot; release() gives it
+        back. False, without waiting, when the lane already has queue_size tasks waiting.
+        """
+        lane = self.lanes[lane_name]
+        if lane.waiting >= self.queue_size and not self._can_start(lane):
+            pipeline_metrics.lane_rejections.inc(lane.name)
+            return False
+
+        start = max(lane.virtual_time, lane.finish_tags.get(client, 0.0))
+        lane.finish_tags[client] = start + 1.0 / self.client_weights.get(client, 1.0)
+        ticket = asyncio.get_running_loop().create_future()
+        heapq.heappush(lane.queue, (start, next(self._sequence), ticket, time.perf_counter()))
+        lane.waiting += 1
+        self._dispatch()
+        try:
+            await ticket
+        except asyncio.CancelledError:
+            if ticket.done() and not ticket.cancelled():
+                # The slot was granted just as the caller gave up
+                self.release(lane_name)
+            else:
+                ticket.cancel()
+                lane.waiting -= 1
+                self._update_gauges(lane)
+            raise
+        return True
+
+    def release(self, lane_name: str) -> None:
+        lane = self.lanes[lane_name]
+        lane.running -= 1
+        self.running -= 1
+        self._dispatch()
+        self._update_gauges(lane)
+
+    def _can_start(self, lane: Lane) -> bool:
+        return self.running < self.slots and lane.running < lane.limit
+
+    def _dispatch(self) -> None:
+        for lane in self.lanes.values():
+            while lane.queue and self._can_start(lane):
+                start, _, ticket, enqueued = heapq.heappop(lane.queue)
+                if ticket.cancelled():
+                    continue
+                lane.virtual_time = start
+                lane.waiting -= 1
+                lane.running += 1
+                self.running += 1
+                ticket.set_result(None)
+                pipeline_metrics.lane_wait_seconds.observe(time.perf_counter() - enqueued, lane.name)
+            if not lane.queue:
+                # Nobody is waiting, so no client is owed a turn
+                lane.virtual_time = 0.0
+                lane.finish_tags.clear()
+            self._update_gauges(lane)
+
+    @staticmethod
+    def _update_gauges(lane: Lane) -> None:
+        pipeline_metrics.lane_waiting.set(lane.waiting, lane.name)
+        pipeline_metrics.lane_running.set(lane.running, lane.name)
+
+
+stage_scheduler = StageScheduler(
+    slots=settings.executor_workers,
+    lane_limits=settings.lane_concurrency,
+    queue_size=settings.executor_queue_size,
+    client_weights=settings.client_weights
+)
@@ -0,0 +1,101 @@
+from typing import Dict, Any, List, Optional
+import re
+
+# Markdown headings and labelled module headings such as "Module: Checkout"
+LABELLED_HEADING = re.compile(
+    r"^(?:(?P<hashes>#{1,6})\s+|(?:epic|feature|module|section|chapter)\s*[:\-–]\s*)(?P<title>\S.*)$",
+    re.IGNORECASE
+)
+
+# Multi-level numbered headings such as "2.1 Search Results"; single-level numbers are list items
+NUMBERED_HEADING = re.compile(r"^(?P<number>\d+(?:\.\d+)+)\.?\s+(?P<title>[A-Z].*)$")
+
+# Headings behind a bullet glyph, e.g. the Wingdings square PDF extraction turns into "n"
+GLYPH_HEADING = re.compile(r"^[n■▪◆❖§]{1,2}\s+(?P<title>[A-Z].*)$")
+
+BULLET = re.compile(r"^[•\-*–·o]\s")
+
+WORD = re.compile(r"[A-Za-z][\w'’]*")
+
+# Longest line still taken for a heading
+MAX_HEADING_CHARS = 80
+
+
+def _is_title(text: str) -> bool:
+    """Short line without closing punctuation whose significant words are mostly capitalized"""
+    if not text or len(text) > MAX_HEADING_CHARS or text[-1] in ".,;:!?":
+        return False
+    if text.isupper():
+        return True
+    words = [word for word in WORD.findall(text) if len(word) > 3]
+    if not words:
+        return False
+    return sum(word[0].isupper() for word in words) / len(words) >= 0.6
+
+
+def _heading_of(line: str, previous_blank: bool, next_line: str) -> Optional[Dict[str, Any]]:
+    """Return {"title", "level"} if a line of plain text reads as a heading"""
+    stripped = line.strip()
+    if not stripped or BULLET.match(stripped):
+        return None
+
+    labelled = LABELLED_HEADING.match(stripped)
+    if labelled:
+        hashes = labelled.group("hashes")
+        return {"title": labelled.group("title").strip(), "level": len(hashes) if hashes else 1}
+
+    numbered = NUMBERED_HEADING.match(stripped)
+    if numbered and _is_title(numbered.group("title")):
+        return {"title": stripped, "level": numbered.group("number").count(".") + 1}
+
+    glyph = GLYPH_HEADING.match(stripped)
+    if glyph and _is_title(glyph.group("title")):
+        return {"title": glyph.group("title").strip(), "level": 1}
+
+    # An unmarked title only counts when it stands apart or introduces a list
+    if _is_title(stripped) and len(stripped.split()) <= 10 and (previous_blank or BULLET.match(next_line.strip())):
+        return {"title": stripped, "level": 1}
+    return None
+
+
+def detect_headings(text: str) -> List[Dict[str, Any]]:
+    """Find heading lines in plain text as {"title", "level", "start"} entries"""
+    headings = []
+    lines = text.split("\n")
+    position = 0
+    previous_blank = True
+    for index, line in enumerate(lines):
+        next_line = lines[index + 1] if index + 1 < len(lines) else ""
+        heading = _heading_of(line, previous_blank, next_line)
+        if heading:
+            headings.append({**heading, "start": position})
+        previous_blank = not line.strip()
+        position += len(line) + 1
+    return headings
+
+
+def detect_sections(text: str, headings: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+    """
+    Split a document into sections at its headings. headings comes from the document structure
+    (DOCX heading styles, PDF bookmarks) when it has any; plain text is scanned for heading lines.
+    Returns {"title", "level", "start", "end"} sections whose span covers the body after the heading
+    line; text before the first heading is a section with title None, and empty sections are dropped.
+    """
+    headings = sorted(headings or detect_headings(text), key=lambda heading: heading["start"])
+
+    bounds = [{"title": None, "level": 0, "start": 0}]
+    for heading in headings:
+        line_end = text.find("\n", heading["start"])
+        bounds.append({
+            "title": heading["title"],
+            "level": heading["level"],
+            "heading_start": heading["start"],
+            "start": len(text) if line_end == -1 else line_end + 1
+        })
+
+    sections = []
+    for bound, following in zip(bounds, bounds[1:] + [None]):
+        end = following["heading_start"] if following else len(text)
+        if bound["start"] < end and text[bound["start"]:end].strip():
+            sections.append({"title": bound["title"], "level": bound["level"], "start": bound["start"], "end": end})
+    return sections
@@ -1,105 +1,125 @@
-from typing import Dict, Any, List
-import jinja2
-from pathlib import Path
+from typing import Dict, Any, List, Optional
+from .step_library import StepIndex
+from .step_normalizer import cluster_steps, parameter_names
+from .gherkin_parser import Feature, expand_steps, feature_cache
+from .template_packs import StepStub, TemplatePack, get_pack
 
 class StepDefinitionGenerator:
-    def __init__(self):
-        self.templates_dir = Path(__file__).parent / "templates"
-        self.env = jinja2.Environment(
-            loader=jinja2.FileSystemLoader(str(self.templates_dir)),
-            trim_blocks=True,
-            lstrip_blocks=True
-        )
-
     def generate_step_definitions(
         self,
         feature_content: str,
         programming_language: str,
-        framework: str = None
+        framework: str = None,
+        step_index: Optional[StepIndex] = None,
+        pattern_kind: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Generate step definitions for the given feature file content."""
-        # Extract steps from feature content
-        steps = self._extract_steps(feature_content)
-        
-        # Generate step definitions based on language and framework
-        if programming_language.lower() == "python":
-            return self._generate_python_steps(steps, framework or "behave")
-        elif programming_language.lower() == "javascript":
-            return self._generate_javascript_steps(steps, framework or "cucumber")
-        else:
-            raise ValueError(f"Unsupported programming language: {programming_language}")
+        """
+        Generate step definitions for the given feature file content. Steps matching a
+        definition of the step library are reported with that binding instead of a new stub;
+        the others are bound as regexes, cucumber expressions or behave parse patterns.
+        """
+        feature, _ = feature_cache.parse(feature_content)
+        return self.generate_for_features([feature], programming_language, framework, step_index, pattern_kind)
 
-    def _extract_steps(self, feature_content: str) -> List[Dict[str, str]]:
-        """Extract steps from feature file content."""
-        steps = []
-        lines = feature_content.split("\n")
-        
-        for line in lines:
-            line = line.strip()
-            if line.startswith(("Given ", "When ", "Then ", "And ", "But ")):
-                keyword = line.split()[0]
-                step_text = " ".join(line.split()[1:])
-                steps.append({
-                    "keyword": keyword,
-                    "text": step_text
-                })
-        
-        return steps
+    def generate_for_features(
+        self,
+        features: List[Feature],
+        programming_language: str,
+        framework: str = None,
+        step_index: Optional[StepIndex] = None,
+        pattern_kind: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Generate one set of step definitions covering the steps of several parsed features."""
+        pack = get_pack(programming_language, framework)
+        pattern_kind = pattern_kind or pack.pattern_kinds[0]
+        if pattern_kind not in pack.pattern_kinds:
+            raise ValueError(f"Unsupported pattern kind for {programming_language} ({pack.framework}): {pattern_kind}")
 
-    def _generate_python_steps(self, steps: List[Dict[str, str]], framework: str) -> Dict[str, Any]:
-        """Generate Python step definitions."""
-        template = self.env.get_template("python_steps.py.jinja")
-        
-        # Convert step text to function names and patterns
-        step_implementations = {}
-        for step in steps:
-            func_name = self._create_function_name(step["text"])
-            pattern = self._create_step_pattern(step["text"])
-            step_implementations[pattern] = func_name
+        # Outline steps are expanded per Examples row, the way the runner will match them
+        steps = [
+            {
+                "keyword": step.keyword,
+                "step_type": step.step_type,
+                "text": step.text,
+                "argument": type(step.argument).__name__ if step.argument is not None else None
+            }
+            for feature in features
+            for step in expand_steps(feature)
+        ]
+        matched_steps, missing_steps = self._match_steps(steps, step_index)
 
-        return {
-            "step_definitions": template.render(
-                steps=step_implementations,
-                framework=framework
-            ),
-            "imports": [
-                "from behave import given, when, then",
-                "from hamcrest import assert_that, equal_to"
-            ]
+        result = {
+            "step_definitions": self._step_definitions(missing_steps, pack, pattern_kind),
+            "imports": list(pack.imports),
+            "setup_code": pack.setup_code.get(pattern_kind),
+            "footer": pack.footer
         }
+        result["matched_steps"] = matched_steps
+        result["unmatched_steps"] = [step["text"] for step in missing_steps]
+        return result
 
-    def _generate_javascript_steps(self, steps: List[Dict[str, str]], framework: str) -> Dict[str, Any]:
-        """Generate JavaScript step definitions."""
-        template = self.env.get_template("javascript_steps.js.jinja")
-        
-        # Convert step text to function names and patterns
-        step_implementations = {}
+    def _match_steps(self, steps: List[Dict[str, str]], step_index: Optional[StepIndex]):
+        """Split steps into those bound by the step library and those still needing a definition"""
+        matched, missing = [], []
+        seen = set()
         for step in steps:
-            func_name = self._create_function_name(step["text"])
-            pattern = self._create_step_pattern(step["text"])
-            step_implementations[pattern] = func_name
+            key = (step["step_type"], step["text"])
+            if key in seen:
+                continue
+            seen.add(key)
 
-        return {
-            "step_definitions": template.render(
-                steps=step_implementations,
-                framework=framework
-            ),
-            "imports": [
-                "const { Given, When, Then } = require('@cucumber/cucumber');",
-                "const { expect } = require('chai');"
-            ]
-        }
+            matches = step_index.match(step["text"], step["step_type"]) if step_index is not None else []
+            if not matches:
+                missing.append(step)
+                continue
+            binding, arguments = matches[0]
+            matched.append({
+                "step": f"{step['keyword']} {step['text']}",
+                "arguments": list(arguments),
+                "binding": binding.to_dict(),
+                # Cucumber rejects a step matched by several definitions
+                "ambiguous": [other.to_dict() for other, _ in matches[1:]]
+            })
+        return matched, missing
 
-    def _create_function_name(self, step_text: str) -> str:
-        """Convert step text to a valid function name."""
-        # Remove special characters and convert to snake_case
-        name = "".join(c.lower() if c.isalnum() else "_" for c in step_text)
-        return "_".join(word for word in name.split("_") if word)
+    def _step_definitions(self, steps: List[Dict[str, str]], pack: TemplatePack, pattern_kind: str) -> Dict[str, str]:
+        """
+        Render one stub per cluster of steps: steps of a type that differ only in numbers or
+        quoted strings (and BDD_STEP_VARYING_WORDS words) share one parameterized binding. A pattern used by several
+        step types gets one stub, bound with the pack's any_keyword where given/when/then only
+        match their own type.
+        """
+        texts_by_type: Dict[str, List[str]] = {}
+        arguments_of: Dict[str, Optional[str]] = {}
+        for step in steps:
+            texts_by_type.setdefault(step["step_type"], []).append(step["text"])
+            arguments_of.setdefault(step["text"], step["argument"])
 
-    def _create_step_pattern(self, step_text: str) -> str:
-        """Convert step text to a regex pattern."""
-        # Replace numbers and quoted strings with capture groups
-        pattern = step_text
-        pattern = re.sub(r'\d+', r'(\d+)', pattern)
-        pattern = re.sub(r'"([^"]*)"', r'"([^"]*)"', pattern)
-        return f"^{pattern}$"
\ No newline at end of file
+        stubs: Dict[str, StepStub] = {}
+        func_names = set()
+        for step_type, texts in texts_by_type.items():
+            keyword = pack.keyword(step_type)
+            for cluster in cluster_steps(texts):
+                pattern = cluster.pattern(pattern_kind)
+                if pattern in stubs:
+                    if pack.any_keyword and stubs[pattern].keyword != keyword:
+                        stubs[pattern] = stubs[pattern]._replace(keyword=pack.any_keyword)
+                    continue
+                func_name = base_name = pack.function_name(cluster.literal_text()) or "step"
+                suffix = 2
+                while func_name in func_names:
+                    func_name = f"{base_name}_{suffix}"
+                    suffix += 1
+                func_names.add(func_name)
+                kinds = cluster.parameters
+                similar = len(cluster.texts) - 1
+                text = cluster.texts[0] + (f" (and {similar} similar step{'s' if similar > 1 else ''})" if similar else "")
+                # Every value is computed here; the pack's template only interpolates them
+                stubs[pattern] = StepStub(
+                    keyword,
+                    pack.literal(pattern, pattern_kind),
+                    func_name,
+                    pack.parameters(parameter_names(kinds), kinds, arguments_of[cluster.texts[0]], pattern_kind),
+                    text
+                )
+        return {pattern: pack.render(stub) + "\n" for pattern, stub in stubs.items()}
@@ -0,0 +1,364 @@
+from typing import Dict, Any, List, Optional, Pattern, Set, Tuple
+from dataclasses import dataclass, field
+from functools import cached_property
+import ast
+import hashlib
+import json
+import re
+import threading
+
+try:
+    import re._parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+
+PATTERN_KINDS = ("regex", "cucumber", "parse")
+STEP_TYPES = ("given", "when", "then")
+
+# Regexes of the built-in cucumber expression parameter types; custom types match anything
+CUCUMBER_PARAMETERS = {
+    "int": r"(-?\d+)",
+    "float": r"(-?\d*\.?\d+)",
+    "word": r"([^\s]+)",
+    "string": r"(\"[^\"]*\"|'[^']*')",
+    "": r"(.*)",
+    "bigdecimal": r"(-?\d*\.?\d+)",
+    "double": r"(-?\d*\.?\d+)",
+    "biginteger": r"(-?\d+)",
+    "byte": r"(-?\d+)",
+    "short": r"(-?\d+)",
+    "long": r"(-?\d+)",
+}
+
+# Regexes of the parse module format types used by behave's default step matcher
+PARSE_TYPES = {
+    "d": r"(-?\d+)",
+    "n": r"(-?[\d,]+)",
+    "f": r"(-?\d*\.\d+)",
+    "g": r"(-?\d*\.?\d+(?:[eE][-+]?\d+)?)",
+    "w": r"(\w+)",
+    "W": r"(\W+)",
+    "S": r"(\S+)",
+}
+
+REGEX_SPECIAL = re.compile(r"([.^$*+?{}\[\]\\|()])")
+WORD = re.compile(r"\w+")
+
+
+def escape_literal(text: str) -> str:
+    """re.escape for step text, leaving spaces and punctuation readable"""
+    return REGEX_SPECIAL.sub(r"\\\1", text)
+
+
+def _cucumber_alternative(text: str) -> str:
+    parts = []
+    index = 0
+    while index < len(text):
+        char = text[index]
+        if char == "\\" and index + 1 < len(text):
+            parts.append(escape_literal(text[index + 1]))
+            index += 2
+        elif char in "({":
+            end = text.find(")" if char == "(" else "}", index)
+            if end < 0:
+                raise ValueError(f"Unbalanced '{char}' in cucumber expression")
+            inner = text[index + 1:end]
+            if char == "(":
+                parts.append(f"(?:{escape_literal(inner)})?")
+            else:
+                parts.append(CUCUMBER_PARAMETERS.get(inner, r"(.*)"))
+            index = end + 1
+        else:
+            parts.append(escape_literal(char))
+            index += 1
+    return "".join(parts)
+
+
+def cucumber_to_regex(expression: str) -> str:
+    """Translate a cucumber expression into an anchored regex"""
+    parts = []
+    # Alternation (a/b) binds within a whitespace-delimited word
+    for chunk in re.split(r"(\s+)", expression):
+        if not chunk or chunk.isspace():
+            parts.append(chunk)
+            continue
+        alternatives = re.split(r"(?<!\\)/", chunk)
+        if len(alternatives) == 1:
+            parts.append(_cucumber_alternative(chunk))
+        else:
+            parts.append("(?:" + "|".join(_cucumber_alternative(alternative) for alternative in alternatives) + ")")
+    return "^" + "".join(parts) + "$"
+
+
+def parse_to_regex(pattern: str) -> str:
+    """Translate a parse module format (behave's default matcher) into an anchored regex"""
+    parts = []
+    for token in re.split(r"(\{\{|\}\}|\{[^{}]*\})", pattern):
+        if token in ("{{", "}}"):
+            parts.append(escape_literal(token[0]))
+        elif token.startswith("{") and token.endswith("}"):
+            format_type = token[1:-1].partition(":")[2]
+            parts.append(PARSE_TYPES.get(format_type, r"(.+?)"))
+        else:
+            parts.append(escape_literal(token))
+    return "^" + "".join(parts) + "$"
+
+
+def required_tokens(regex: str, flags: int = 0) -> Set[str]:
+    """
+    Lower-cased words every text matched by the regex contains as a whole \\w+ token.
+
+    Only top-level literal runs count, and a word at the edge of a run only counts when an
+    anchor bounds it: next to a group or a repeat it could be part of a longer word.
+    """
+    tokens: Set[str] = set()
+    run: List[str] = []
+    left_bounded = False
+
+    def close(right_bounded: bool) -> None:
+        text = "".join(run)
+        for word in WORD.finditer(text):
+            if (word.start() > 0 or left_bounded) and (word.end() < len(text) or right_bounded):
+                tokens.add(word.group().lower())
+        run.clear()
+
+    for op, argument in sre_parse.parse(regex, flags):
+        if op is sre_parse.LITERAL:
+            run.append(chr(argument))
+        elif op is sre_parse.AT and argument in (sre_parse.AT_BEGINNING, sre_parse.AT_BEGINNING_STRING):
+            close(False)
+            left_bounded = True
+        elif op is sre_parse.AT and argument in (sre_parse.AT_END, sre_parse.AT_END_STRING):
+            close(True)
+            left_bounded = False
+        else:
+            close(False)
+            left_bounded = False
+    close(False)
+    return tokens
+
+
+@dataclass
+class StepBinding:
+    """An existing step definition: its pattern and where it is implemented"""
+    pattern: str
+    kind: str = "regex"
+    step_type: Optional[str] = None  # given/when/then; None matches any keyword
+    source: Optional[str] = None
+    line: Optional[int] = None
+    function: Optional[str] = None
+    flags: int = 0
+    regex: Pattern = field(init=False, repr=False)
+    tokens: Set[str] = field(init=False, repr=False)
+
+    def __post_init__(self):
+        if self.kind not in PATTERN_KINDS:
+            raise ValueError(f"Unknown pattern kind: {self.kind}. Valid kinds are: {', '.join(PATTERN_KINDS)}")
+        if self.step_type is not None:
+            self.step_type = self.step_type.lower()
+            if self.step_type == "step":
+                self.step_type = None
+            elif self.step_type not in STEP_TYPES:
+                raise ValueError(f"Unknown step type: {self.step_type}")
+
+        if self.kind == "cucumber":
+            regex = cucumber_to_regex(self.pattern)
+        elif self.kind == "parse":
+            regex = parse_to_regex(self.pattern)
+        else:
+            regex = self.pattern
+        try:
+            self.regex = re.compile(regex, self.flags)
+            self.tokens = required_tokens(regex, self.flags)
+        except re.error as e:
+            raise ValueError(f"Invalid step pattern {self.pattern!r}: {str(e)}")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "pattern": self.pattern,
+            "kind": self.kind,
+            "step_type": self.step_type,
+            "source": self.source,
+            "line": self.line,
+            "function": self.function
+        }
+
+
+class StepIndex:
+    """
+    Immutable index of a step library for matching step text.
+
+    Each binding is filed under one of the words its pattern requires, the one fewest other
+    bindings require, so a lookup only tries the bindings filed under the words of the step
+    plus the few patterns without any required word. Like cucumber, bindings are tried in
+    registration order and searched, not fully matched, so patterns need their own anchors.
+    """
+
+    def __init__(self, bindings: List[StepBinding]):
+        self.bindings = bindings
+        frequency: Dict[str, int] = {}
+        for binding in bindings:
+            for token in binding.tokens:
+                frequency[token] = frequency.get(token, 0) + 1
+
+        self._buckets: Dict[str, List[int]] = {}
+        self._unindexed: List[int] = []
+        for position, binding in enumerate(bindings):
+            if binding.tokens:
+                token = min(binding.tokens, key=lambda token: (frequency[token], token))
+                self._buckets.setdefault(token, []).append(position)
+            else:
+                self._unindexed.append(position)
+
+    def __len__(self) -> int:
+        return len(self.bindings)
+
+    @cached_property
+    def fingerprint(self) -> str:
+        """Hash of the bindings in order, which decides every match"""
+        bindings = [{**binding.to_dict(), "flags": binding.flags} for binding in self.bindings]
+        return hashlib.sha256(json.dumps(bindings, sort_keys=True).encode()).hexdigest()
+
+    @property
+    def unindexed_count(self) -> int:
+        return len(self._unindexed)
+
+    def candidates(self, text: str) -> List[int]:
+        """Positions of the bindings that can match the text, in registration order"""
+        positions = list(self._unindexed)
+        for token in set(WORD.findall(text.lower())):
+            positions.extend(self._buckets.get(token, ()))
+        return sorted(set(positions))
+
+    def match(self, text: str, step_type: Optional[str] = None) -> List[Tuple[StepBinding, Tuple[Any, ...]]]:
+        """All bindings matching the step text, with their captured arguments; the first one wins"""
+        matches = []
+        for position in self.candidates(text):
+            binding = self.bindings[position]
+            if step_type and binding.step_type and binding.step_type != step_type:
+                continue
+            found = binding.regex.search(text)
+            if found:
+                matches.append((binding, found.groups()))
+        return matches
+
+
+# Step definitions in source files: behave decorators, cucumber-js calls, cucumber-jvm annotations
+PYTHON_STEP = re.compile(
+    r"^[ \t]*@(?P<keyword>given|when|then|step)\(\s*(?P<literal>[rRuU]{0,2}(?:'(?:\\.|[^'\\\n])*'|\"(?:\\.|[^\"\\\n])*\"))",
+    re.MULTILINE
+)
+PYTHON_MATCHER = re.compile(r"^[ \t]*(?:behave\.)?use_step_matcher\(\s*['\"](?P<matcher>\w+)['\"]", re.MULTILINE)
+PYTHON_FUNCTION = re.compile(r"^[ \t]*(?:async\s+)?def\s+(\w+)", re.MULTILINE)
+JS_STEP = re.compile(
+    r"\b(?P<keyword>Given|When|Then|defineStep)\(\s*(?:"
+    r"/(?P<regex>(?:\\.|[^/\\\n])+)/(?P<flags>[a-z]*)"
+    r"|(?P<quote>['\"`])(?P<expression>(?:\\.|(?!(?P=quote))[^\\\n])*)(?P=quote))"
+)
+JAVA_STEP = re.compile(r"@(?P<keyword>Given|When|Then|And|But)\(\s*\"(?P<expression>(?:\\.|[^\"\\\n])*)\"")
+JAVA_METHOD = re.compile(r"\bvoid\s+(\w+)\s*\(")
+SOURCE_FORMATS = {"py": "python", "js": "javascript", "mjs": "javascript", "cjs": "javascript", "ts": "javascript", "java": "java", "kt": "java"}
+
+
+def _unescape(literal: str) -> str:
+    return re.sub(r"\\(.)", lambda escaped: escaped.group(1) if escaped.group(1) in "\\'\"`" else escaped.group(0), literal)
+
+
+def _line_of(text: str, offset: int) -> int:
+    return text.count("\n", 0, offset) + 1
+
+
+def _next_name(pattern: Pattern, text: str, offset: int) -> Optional[str]:
+    found = pattern.search(text, offset)
+    return found.group(1) if found else None
+
+
+def scan_step_sources(text: str, path: str) -> Tuple[List[StepBinding], List[Dict[str, Any]]]:
+    """
+    Find the step definitions of a behave, cucumber-js or cucumber-jvm source file.
+    Returns the bindings and the definitions that could not be compiled.
+    """
+    language = SOURCE_FORMATS.get(path.rsplit(".", 1)[-1].lower())
+    if language is None:
+        raise ValueError(f"Unsupported step source: {path}. Supported extensions are: {', '.join(sorted(SOURCE_FORMATS))}")
+
+    found: List[Dict[str, Any]] = []
+    if language == "python":
+        # behave's matcher is module state: each use_step_matcher() applies to the steps after it
+        matchers = [(matcher.start(), matcher.group("matcher")) for matcher in PYTHON_MATCHER.finditer(text)]
+        for step in PYTHON_STEP.finditer(text):
+            matcher = "parse"
+            for offset, name in matchers:
+                if offset < step.start():
+                    matcher = name
+            found.append({
+                "pattern": ast.literal_eval(step.group("literal")),
+                "kind": "regex" if matcher == "re" else "parse",
+                "step_type": step.group("keyword"),
+                "line": _line_of(text, step.start()),
+                "function": _next_name(PYTHON_FUNCTION, text, step.end())
+            })
+    elif language == "javascript":
+        for step in JS_STEP.finditer(text):
+            regex = step.group("regex") is not None
+            found.append({
+                "pattern": step.group("regex") if regex else _unescape(step.group("expression")),
+                "kind": "regex" if regex else "cucumber",
+                "flags": re.IGNORECASE if regex and "i" in step.group("flags") else 0,
+                "line": _line_of(text, step.start())
+            })
+    else:
+        for step in JAVA_STEP.finditer(text):
+            pattern = _unescape(step.group("expression"))
+            # cucumber-jvm treats anchored strings as regexes and everything else as expressions
+            regex = pattern.startswith("^") or pattern.endswith("$")
+            found.append({
+                "pattern": pattern,
+                "kind": "regex" if regex else "cucumber",
+                "line": _line_of(text, step.start()),
+                "function": _next_name(JAVA_METHOD, text, step.end())
+            })
+
+    bindings, errors = [], []
+    for definition in found:
+        try:
+            bindings.append(StepBinding(source=path, **definition))
+        except ValueError as e:
+            errors.append({"pattern": definition["pattern"], "source": path, "line": definition["line"], "error": str(e)})
+    return bindings, errors
+
+
+class StepLibraryStore:
+    """In-process registry of named step libraries; extending a library rebuilds its index"""
+
+    def __init__(self):
+        self._libraries: Dict[str, StepIndex] = {}
+        self._lock = threading.Lock()
+
+    def put(self, name: str, bindings: List[StepBinding]) -> StepIndex:
+        index = StepIndex(bindings)
+        with self._lock:
+            self._libraries[name] = index
+        return index
+
+    def extend(self, name: str, bindings: List[StepBinding]) -> StepIndex:
+        with self._lock:
+            previous = self._libraries.get(name)
+            index = StepIndex((previous.bindings if previous else []) + bindings)
+            self._libraries[name] = index
+        return index
+
+    def get(self, name: str) -> Optional[StepIndex]:
+        with self._lock:
+            return self._libraries.get(name)
+
+    def remove(self, name: str) -> bool:
+        with self._lock:
+            return self._libraries.pop(name, None) is not None
+
+    def names(self) -> List[str]:
+        with self._lock:
+            return sorted(self._libraries)
+
+
+step_libraries = StepLibraryStore()
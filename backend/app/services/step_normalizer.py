@@ -0,0 +1,288 @@
+from typing import Dict, Any, List, Optional, Tuple
+from dataclasses import dataclass, field
+import re
+from .document_ir import OutlineExamples, Scenario
+from .step_library import escape_literal
+from ..core.config import settings
+
+# Quoted strings, outline placeholders, numbers, words, then whitespace and single punctuation
+STEP_TOKEN = re.compile(r'(?P<string>"[^"]*")|(?P<any><[^<>\s]+>)|(?P<float>\d+\.\d+)|(?P<int>\d+)|(?P<word>\w+)|(?P<other>\s+|.)')
+
+# Token kinds always turned into parameters; words only become one where clustered steps differ
+VALUE_KINDS = ("string", "any", "float", "int")
+
+# Clusters whose texts differ in word positions (up to BDD_STEP_VARYING_WORDS of them) must keep this many literal words
+MIN_LITERAL_WORDS = 2
+
+PARAMETER_PATTERNS = {
+    "regex": {"string": r'"([^"]*)"', "any": r"(.*)", "float": r"(-?\d*\.\d+)", "int": r"(-?\d+)", "word": r"(\w+)"},
+    "cucumber": {"string": "{string}", "any": "{}", "float": "{float}", "int": "{int}", "word": "{word}"},
+    # Named fields, so behave passes the values as keyword arguments of the step function
+    "parse": {"string": '"{%s}"', "any": "{%s}", "float": "{%s:f}", "int": "{%s:d}", "word": "{%s:w}"},
+}
+EXAMPLE_COLUMNS = {"string": "text", "float": "number", "int": "number", "word": "value"}
+
+
+def tokenize(text: str) -> List[Tuple[str, str]]:
+    """Split step text into (kind, text) tokens"""
+    return [(token.lastgroup, token.group()) for token in STEP_TOKEN.finditer(text)]
+
+
+@dataclass(frozen=True)
+class Parameter:
+    kind: str
+
+
+@dataclass
+class StepCluster:
+    """
+    Steps that differ only in their values. segments are literal strings and parameter kinds,
+    in order; values holds, per member text, the value of each parameter.
+    """
+    segments: List[Any]
+    texts: List[str] = field(default_factory=list)
+    values: List[List[str]] = field(default_factory=list)
+
+    @property
+    def parameters(self) -> List[str]:
+        return [segment.kind for segment in self.segments if isinstance(segment, Parameter)]
+
+    def literal_text(self) -> str:
+        return "".join(segment for segment in self.segments if isinstance(segment, str))
+
+    def pattern(self, kind: str = "regex") -> str:
+        """The cluster as an anchored regex, a cucumber expression or a behave parse pattern"""
+        names = iter(parameter_names(self.parameters))
+        parts = []
+        for segment in self.segments:
+            if isinstance(segment, Parameter):
+                parameter = PARAMETER_PATTERNS[kind][segment.kind]
+                parts.append(parameter % next(names) if kind == "parse" else parameter)
+            elif kind == "regex":
+                parts.append(escape_literal(segment))
+            elif kind == "cucumber":
+                parts.append(re.sub(r"([\\(){}/])", r"\\\1", segment))
+            else:
+                parts.append(segment.replace("{", "{{").replace("}", "}}"))
+        pattern = "".join(parts)
+        return f"^{pattern}$" if kind == "regex" else pattern
+
+
+def _split(tokens: List[Tuple[str, str]], varying: Tuple[int, ...]) -> Tuple[List[Any], List[str]]:
+    """Segments and parameter values of a token list, with values and the varying word positions as parameters"""
+    segments: List[Any] = []
+    values: List[str] = []
+    for position, (kind, text) in enumerate(tokens):
+        if kind in VALUE_KINDS or position in varying:
+            segments.append(Parameter(kind))
+            values.append(text[1:-1] if kind in ("string", "any") else text)
+        elif segments and isinstance(segments[-1], str):
+            segments[-1] += text
+        else:
+            segments.append(text)
+    return segments, values
+
+
+def _skeleton(tokens: List[Tuple[str, str]]) -> Tuple[str, ...]:
+    return tuple(kind if kind in VALUE_KINDS else text for kind, text in tokens)
+
+
+def _varying_candidates(tokens: List[Tuple[str, str]]) -> List[int]:
+    """Word positions that may become parameters: not the first word of a line"""
+    candidates = []
+    line_start = True
+    for position, (kind, text) in enumerate(tokens):
+        if kind == "word":
+            if not line_start:
+                candidates.append(position)
+            line_start = False
+        elif "\n" in text:
+            line_start = True
+    return candidates
+
+
+def _varying_words(max_varying_words: Optional[int]) -> int:
+    return settings.step_varying_words if max_varying_words is None else max_varying_words
+
+
+def fold_together(first: str, second: str, max_varying_words: Optional[int] = None) -> bool:
+    """
+    Whether two different texts are variants cluster_steps would fold into one outline: the same
+    shape, differing only in their values and at most max_varying_words words (BDD_STEP_VARYING_WORDS
+    by default), with at least MIN_LITERAL_WORDS words in common
+    """
+    return first != second and tokens_fold_together(tokenize(first), tokenize(second), max_varying_words)
+
+
+def tokens_fold_together(
+    tokens: List[Tuple[str, str]],
+    other: List[Tuple[str, str]],
+    max_varying_words: Optional[int] = None
+) -> bool:
+    """fold_together for tokenized texts, which must differ"""
+    max_varying_words = _varying_words(max_varying_words)
+    if len(tokens) != len(other):
+        return False
+    candidates = set(_varying_candidates(tokens))
+    varying = literal_words = 0
+    for position, ((kind, text), (other_kind, other_text)) in enumerate(zip(tokens, other)):
+        if kind in VALUE_KINDS or other_kind in VALUE_KINDS:
+            if kind != other_kind:
+                return False
+        elif text == other_text:
+            literal_words += kind == "word"
+        elif kind == other_kind == "word" and position in candidates:
+            varying += 1
+        else:
+            return False
+    # Texts of the same skeleton differ only in their values and fold whatever their words
+    return varying == 0 or varying <= max_varying_words and literal_words >= MIN_LITERAL_WORDS
+
+
+def cluster_steps(texts: List[str], max_varying_words: Optional[int] = None) -> List[StepCluster]:
+    """
+    Group texts that differ only in numbers, quoted strings and outline placeholders. With
+    max_varying_words (BDD_STEP_VARYING_WORDS by default, 0 unless configured), texts of the same
+    shape may also differ in that many word positions. Clusters keep the order of their first
+    text; duplicate texts are dropped.
+    """
+    max_varying_words = _varying_words(max_varying_words)
+    unique = list(dict.fromkeys(texts))
+    tokenized = [tokenize(text) for text in unique]
+
+    # Texts with the same skeleton already differ only in their values
+    by_skeleton: Dict[Tuple[str, ...], List[int]] = {}
+    for index, tokens in enumerate(tokenized):
+        by_skeleton.setdefault(_skeleton(tokens), []).append(index)
+    skeletons = list(by_skeleton)
+
+    # Skeletons equal but for one word position are joined, transitively, when words may vary
+    parent = list(range(len(skeletons)))
+
+    def find(node: int) -> int:
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    wildcards: Dict[Tuple[Any, ...], int] = {}
+    for number, skeleton in enumerate(skeletons if max_varying_words else ()):
+        for position in _varying_candidates(tokenized[by_skeleton[skeleton][0]]):
+            key = (position,) + skeleton[:position] + (None,) + skeleton[position + 1:]
+            if key in wildcards:
+                parent[find(number)] = find(wildcards[key])
+            else:
+                wildcards[key] = number
+
+    components: Dict[int, List[int]] = {}
+    for number in range(len(skeletons)):
+        components.setdefault(find(number), []).append(number)
+
+    clusters = []
+    for members in components.values():
+        groups = [members]
+        if len(members) > 1:
+            varying = tuple(
+                position for position in range(len(skeletons[members[0]]))
+                if len({skeletons[member][position] for member in members}) > 1
+            )
+            literal_words = sum(
+                1 for position, (kind, _) in enumerate(tokenized[by_skeleton[skeletons[members[0]]][0]])
+                if kind == "word" and position not in varying
+            )
+            if len(varying) > max_varying_words or literal_words < MIN_LITERAL_WORDS:
+                # Too little in common: keep the skeletons apart
+                groups = [[member] for member in members]
+        else:
+            varying = ()
+
+        for group in groups:
+            indexes = sorted(index for member in group for index in by_skeleton[skeletons[member]])
+            cluster_varying = varying if len(group) > 1 else ()
+            segments, _ = _split(tokenized[indexes[0]], cluster_varying)
+            cluster = StepCluster(segments)
+            for index in indexes:
+                cluster.texts.append(unique[index])
+                cluster.values.append(_split(tokenized[index], cluster_varying)[1])
+            clusters.append(cluster)
+
+    order = {text: index for index, text in enumerate(unique)}
+    clusters.sort(key=lambda cluster: order[cluster.texts[0]])
+    return clusters
+
+
+def parameter_names(parameters: List[str]) -> List[str]:
+    """Distinct names for parameters of the given kinds: number, number_2, text, ..."""
+    columns = []
+    for kind in parameters:
+        name = EXAMPLE_COLUMNS.get(kind, "value")
+        column, suffix = name, 2
+        while column in columns:
+            column = f"{name}_{suffix}"
+            suffix += 1
+        columns.append(column)
+    return columns
+
+
+def _outline_name(names: List[str], columns: List[str], rows: List[List[str]]) -> str:
+    """The scenario name with the example values it contains replaced by their placeholders"""
+    tokenized = [tokenize(name) for name in names]
+    if len({len(tokens) for tokens in tokenized}) != 1:
+        return names[0]
+    parts = []
+    for position, (kind, text) in enumerate(tokenized[0]):
+        placeholder = None
+        if len({tokens[position][1] for tokens in tokenized}) > 1:
+            for column, _ in enumerate(columns):
+                if all(tokens[position][1].strip('"') == row[column] for tokens, row in zip(tokenized, rows)):
+                    placeholder = f'"<{columns[column]}>"' if kind == "string" else f"<{columns[column]}>"
+                    break
+            if placeholder is None:
+                return names[0]
+        parts.append(placeholder or text)
+    return "".join(parts)
+
+
+def fold_outlines(scenarios: List[Scenario], max_varying_words: Optional[int] = None) -> List[Scenario]:
+    """
+    Fold scenarios whose steps differ only in their values (and max_varying_words words, as in
+    cluster_steps) into Scenario Outlines. An outline is a scenario with an examples table; its
+    steps use <column> placeholders, and every member scenario is a row, including those with the
+    same steps as another. Scenarios that fold with no other keep their place unchanged.
+    """
+    if len(scenarios) < 2:
+        return scenarios
+    texts = ["\n".join(scenario.steps) for scenario in scenarios]
+    clusters = cluster_steps(texts, max_varying_words)
+    members_of = {text: cluster for cluster in clusters for text in cluster.texts}
+    values_of = {text: values for cluster in clusters for text, values in zip(cluster.texts, cluster.values)}
+    rows_of: Dict[int, List[Tuple[str, List[str]]]] = {}
+    for scenario, text in zip(scenarios, texts):
+        rows_of.setdefault(id(members_of[text]), []).append((scenario.name, values_of[text]))
+
+    folded = []
+    emitted = set()
+    for scenario, text in zip(scenarios, texts):
+        cluster = members_of[text]
+        if len(cluster.texts) < 2 or not cluster.parameters:
+            folded.append(scenario)
+            continue
+        if id(cluster) in emitted:
+            continue  # folded into the outline at the first member
+        emitted.add(id(cluster))
+
+        columns = parameter_names(cluster.parameters)
+        placeholders = iter(columns)
+        template = "".join(
+            (f'"<{next(placeholders)}>"' if segment.kind == "string" else f"<{next(placeholders)}>")
+            if isinstance(segment, Parameter) else segment
+            for segment in cluster.segments
+        )
+        names = [name for name, _ in rows_of[id(cluster)]]
+        rows = [values for _, values in rows_of[id(cluster)]]
+        folded.append(Scenario(
+            name=_outline_name(names, columns, rows),
+            steps=tuple(template.split("\n")),
+            examples=OutlineExamples(columns, rows)
+        ))
+    return folded
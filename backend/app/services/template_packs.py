@@ -0,0 +1,369 @@
+"""
+Template packs: the templates that render feature files and step definition stubs, and the
+language/framework packs built on them.
+
+Templates are loaded through one shared jinja2 environment that never stat-checks its sources.
+It loads templates compiled ahead of time into Python modules when BDD_TEMPLATE_MODULES points
+at them, recompiling them there first if they are missing or stale, and can keep compiled
+bytecode in BDD_TEMPLATE_CACHE_DIR across processes. Compile them with
+
+    python -m app.services.template_packs DIR
+
+Stub templates only interpolate the fields of a StepStub, whose values the pack computes in
+Python. Each pack renders its template once, with markers in place of the fields, and renders
+every stub after that by joining the pieces around the markers with the stub's values.
+"""
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+from dataclasses import dataclass, field
+from functools import cached_property
+from pathlib import Path
+import argparse
+import hashlib
+import json
+import logging
+import re
+import sys
+import threading
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+TEMPLATES_DIR = Path(__file__).parent / "templates"
+# Written next to the compiled modules: the source hash of every template they were compiled from
+COMPILED_MANIFEST = "templates.json"
+
+# Runs of characters that cannot appear in an identifier
+NON_WORD = re.compile(r"[\W_]+")
+
+
+class StepStub(NamedTuple):
+    """The values of one step definition stub, ready to be interpolated"""
+    keyword: str  # decorator, function or annotation binding the step, e.g. given or Given
+    literal: str  # the step pattern as a literal of the language
+    function: str  # name of the step function or method
+    parameters: str  # the parameter list, joined
+    text: str  # the step text, shown in the stub's comment
+
+
+@dataclass
+class TemplatePack:
+    """
+    Renders the step definitions of one language and framework. The template defines a
+    step_definition(step) macro that interpolates the StepStub fields unchanged; the hooks
+    compute those fields.
+    """
+    language: str
+    framework: str
+    template: str  # file in the templates directory
+    pattern_kinds: List[str]  # pattern kinds the framework binds; the first is the default
+    keyword: Callable[[str], str]  # step type -> keyword
+    literal: Callable[[str, str], str]  # pattern, pattern kind -> literal
+    function_name: Callable[[str], str]  # literal words of the step -> function name, "" if none
+    # parameter names, parameter kinds, doc string/data table argument, pattern kind -> parameter list
+    parameters: Callable[[List[str], List[str], Optional[str], str], str]
+    steps_file: str  # where app.cli writes the step definition module
+    imports: List[str] = field(default_factory=list)
+    setup_code: Dict[str, str] = field(default_factory=dict)  # per pattern kind
+    footer: Optional[str] = None  # closes what the setup code opened
+    # Keyword binding a step of any type, for frameworks whose given/when/then only match their own type;
+    # None where any keyword already matches every step type
+    any_keyword: Optional[str] = None
+
+    @cached_property
+    def _pieces(self) -> Tuple[List[str], List[Tuple[int, int]]]:
+        """The template rendered with markers for the fields, split at them: literal pieces, and (piece, field) slots"""
+        macro = get_template(self.template).module.step_definition
+        rendered = str(macro(StepStub(*(f"\0{name}\0" for name in StepStub._fields)))).strip("\n")
+        pieces = rendered.split("\0")
+        slots = []
+        for position in range(1, len(pieces), 2):
+            if pieces[position] not in StepStub._fields:
+                raise ValueError(f"Template {self.template} must interpolate the step fields unchanged")
+            slots.append((position, StepStub._fields.index(pieces[position])))
+        return pieces, slots
+
+    def render(self, stub: StepStub) -> str:
+        pieces, slots = self._pieces
+        pieces = pieces.copy()
+        for position, index in slots:
+            pieces[position] = stub[index]
+        return "".join(pieces)
+
+
+# Packs by (language, framework); FRAMEWORKS and PATTERN_KINDS list what they offer, in registration order
+PACKS: Dict[Tuple[str, str], TemplatePack] = {}
+FRAMEWORKS: Dict[str, List[str]] = {}
+PATTERN_KINDS: Dict[str, List[str]] = {}
+
+
+def register(pack: TemplatePack) -> TemplatePack:
+    """Add a pack; the first pack of a language is its default framework"""
+    PACKS[(pack.language, pack.framework)] = pack
+    frameworks = FRAMEWORKS.setdefault(pack.language, [])
+    if pack.framework not in frameworks:
+        frameworks.append(pack.framework)
+    kinds = PATTERN_KINDS.setdefault(pack.language, [])
+    kinds.extend(kind for kind in pack.pattern_kinds if kind not in kinds)
+    return pack
+
+
+def get_pack(programming_language: str, framework: Optional[str] = None) -> TemplatePack:
+    language = programming_language.lower()
+    if language not in FRAMEWORKS:
+        raise ValueError(f"Unsupported programming language: {programming_language}")
+    framework = framework or FRAMEWORKS[language][0]
+    if framework not in FRAMEWORKS[language]:
+        raise ValueError(f"Unsupported framework for {programming_language}: {framework}")
+    return PACKS[(language, framework)]
+
+
+_environment = None
+_environment_lock = threading.Lock()
+
+
+def _create_environment(loader):
+    import jinja2
+
+    return jinja2.Environment(
+        loader=loader,
+        # Templates only change with a deploy, so they are never checked for changes
+        auto_reload=False,
+        cache_size=-1,
+        bytecode_cache=jinja2.FileSystemBytecodeCache(settings.template_cache_dir) if settings.template_cache_dir else None
+    )
+
+
+def source_hashes() -> Dict[str, str]:
+    return {
+        path.name: hashlib.sha256(path.read_bytes()).hexdigest()
+        for path in sorted(TEMPLATES_DIR.glob("*.jinja"))
+    }
+
+
+def _loader():
+    import jinja2
+
+    source_loader = jinja2.FileSystemLoader(str(TEMPLATES_DIR))
+    compiled = settings.template_modules
+    if not compiled:
+        return source_loader
+    try:
+        manifest = json.loads((Path(compiled) / COMPILED_MANIFEST).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        manifest = None
+    if manifest != source_hashes():
+        # Missing, or compiled from other sources: compile them again from these
+        try:
+            compile_templates(Path(compiled))
+        except OSError as e:
+            logger.warning(f"Ignoring compiled templates in {compiled}: they are stale and could not be rebuilt ({str(e)})")
+            return source_loader
+        logger.info(f"Recompiled the stale templates in {compiled}")
+    return jinja2.ChoiceLoader([jinja2.ModuleLoader(compiled), source_loader])
+
+
+def environment():
+    """The template environment shared by all renderers, created (and jinja2 imported) on first use"""
+    global _environment
+    if _environment is None:
+        with _environment_lock:
+            if _environment is None:
+                _environment = _create_environment(_loader())
+    return _environment
+
+
+def get_template(name: str):
+    return environment().get_template(name)
+
+
+def warm_up():
+    """Load every template and prepare the registered packs, so the first request does not"""
+    for name in source_hashes():
+        get_template(name)
+    for pack in PACKS.values():
+        pack._pieces
+
+
+def compile_templates(target: Path) -> List[str]:
+    """Compile the templates into Python modules in target, for BDD_TEMPLATE_MODULES"""
+    import jinja2
+
+    target.mkdir(parents=True, exist_ok=True)
+    hashes = source_hashes()
+    _create_environment(jinja2.FileSystemLoader(str(TEMPLATES_DIR))).compile_templates(
+        str(target), zip=None, filter_func=lambda name: name in hashes
+    )
+    (target / COMPILED_MANIFEST).write_text(json.dumps(hashes, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    return list(hashes)
+
+
+def snake_case(text: str) -> str:
+    name = NON_WORD.sub("_", text).strip("_").lower()
+    return f"step_{name}" if name[:1].isdigit() else name
+
+
+def camel_case(text: str) -> str:
+    words = [word for word in NON_WORD.split(text) if word]
+    name = "".join([words[0].lower()] + [word[:1].upper() + word[1:].lower() for word in words[1:]]) if words else ""
+    return f"step{name[:1].upper()}{name[1:]}" if name[:1].isdigit() else name
+
+
+def _python_literal(pattern: str, pattern_kind: str) -> str:
+    return repr(pattern)
+
+
+def _quoted_literal(pattern: str, pattern_kind: str) -> str:
+    # Java and JavaScript string literals; JavaScript regexes are written as regex literals
+    return '"' + pattern.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def _javascript_literal(pattern: str, pattern_kind: str) -> str:
+    if pattern_kind == "regex":
+        return "/" + pattern.replace("/", "\\/") + "/"
+    return "'" + pattern.replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+
+# Arguments carrying a step's doc string or data table, where the framework passes them as parameters
+# (behave uses context.text/table)
+JS_STEP_ARGUMENTS = {"DocString": ["docString"], "DataTable": ["dataTable"]}
+PYTEST_BDD_STEP_ARGUMENTS = {"DocString": ["docstring"], "DataTable": ["datatable"]}
+
+# Types of cucumber expression parameters; regex captures are always strings
+TS_TYPES = {"int": "number", "float": "number"}
+JAVA_TYPES = {"int": "int", "float": "float"}
+JAVA_STEP_ARGUMENTS = {"DocString": ["String docString"], "DataTable": ["DataTable dataTable"]}
+
+
+def _behave_parameters(names, kinds, argument, pattern_kind) -> str:
+    return ", ".join(["context"] + names)
+
+
+def _pytest_bdd_parameters(names, kinds, argument, pattern_kind) -> str:
+    return ", ".join(names + PYTEST_BDD_STEP_ARGUMENTS.get(argument, []))
+
+
+def _javascript_parameters(names, kinds, argument, pattern_kind) -> str:
+    return ", ".join(names + JS_STEP_ARGUMENTS.get(argument, []))
+
+
+def _typescript_parameters(names, kinds, argument, pattern_kind) -> str:
+    typed = [
+        f"{name}: {TS_TYPES.get(kind, 'string') if pattern_kind == 'cucumber' else 'string'}"
+        for name, kind in zip(names, kinds)
+    ]
+    return ", ".join(typed + [f"{name}: {'string' if name == 'docString' else 'DataTable'}" for name in JS_STEP_ARGUMENTS.get(argument, [])])
+
+
+def _java_parameters(names, kinds, argument, pattern_kind) -> str:
+    typed = [
+        f"{JAVA_TYPES.get(kind, 'String') if pattern_kind == 'cucumber' else 'String'} {camel_case(name)}"
+        for name, kind in zip(names, kinds)
+    ]
+    return ", ".join(typed + JAVA_STEP_ARGUMENTS.get(argument, []))
+
+
+register(TemplatePack(
+    language="python",
+    framework="behave",
+    template="python_steps.py.jinja",
+    pattern_kinds=["regex", "parse"],
+    keyword=str,
+    literal=_python_literal,
+    function_name=snake_case,
+    parameters=_behave_parameters,
+    imports=[
+        "from behave import given, when, then, step, use_step_matcher",
+        "from hamcrest import assert_that, equal_to"
+    ],
+    # Regex patterns need behave's re matcher instead of the default parse matcher
+    setup_code={"regex": 'use_step_matcher("re")'},
+    steps_file="steps/generated_steps.py",
+    any_keyword="step"
+))
+
+register(TemplatePack(
+    language="python",
+    framework="pytest-bdd",
+    template="python_steps.py.jinja",
+    # pytest-bdd passes named fields only; the regexes' groups are unnamed
+    pattern_kinds=["parse"],
+    keyword=str,
+    literal=lambda pattern, pattern_kind: f"parsers.parse({pattern!r})",
+    function_name=snake_case,
+    parameters=_pytest_bdd_parameters,
+    imports=["from pytest_bdd import given, when, then, step, parsers"],
+    # Shared steps go in a conftest.py, where the test modules binding the feature files find them
+    steps_file="tests/conftest.py",
+    any_keyword="step"
+))
+
+register(TemplatePack(
+    language="javascript",
+    framework="cucumber",
+    template="javascript_steps.js.jinja",
+    pattern_kinds=["regex", "cucumber"],
+    keyword=str.capitalize,
+    literal=_javascript_literal,
+    function_name=snake_case,
+    parameters=_javascript_parameters,
+    imports=[
+        "const { Given, When, Then } = require('@cucumber/cucumber');",
+        "const { expect } = require('chai');"
+    ],
+    steps_file="step_definitions/generated_steps.js"
+))
+
+register(TemplatePack(
+    language="typescript",
+    framework="cucumber",
+    template="javascript_steps.js.jinja",
+    pattern_kinds=["regex", "cucumber"],
+    keyword=str.capitalize,
+    literal=_javascript_literal,
+    function_name=snake_case,
+    parameters=_typescript_parameters,
+    imports=[
+        "import { Given, When, Then, DataTable } from '@cucumber/cucumber';",
+        "import { expect } from 'chai';"
+    ],
+    steps_file="step_definitions/generated_steps.ts"
+))
+
+# cucumber-jvm step definitions with JUnit assertions, as the methods of one class
+register(TemplatePack(
+    language="java",
+    framework="junit",
+    template="java_steps.java.jinja",
+    pattern_kinds=["regex", "cucumber"],
+    keyword=str.capitalize,
+    literal=_quoted_literal,
+    function_name=camel_case,
+    parameters=_java_parameters,
+    imports=[
+        "import io.cucumber.datatable.DataTable;",
+        "import io.cucumber.java.PendingException;",
+        "import io.cucumber.java.en.Given;",
+        "import io.cucumber.java.en.Then;",
+        "import io.cucumber.java.en.When;",
+        "import static org.junit.jupiter.api.Assertions.*;"
+    ],
+    setup_code={"regex": "public class GeneratedSteps {", "cucumber": "public class GeneratedSteps {"},
+    footer="}",
+    steps_file="src/test/java/GeneratedSteps.java"
+))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    arg_parser = argparse.ArgumentParser(
+        prog="python -m app.services.template_packs",
+        description="Compile the templates into Python modules, loaded when BDD_TEMPLATE_MODULES names the directory"
+    )
+    arg_parser.add_argument("target", type=Path, help="Directory the compiled modules are written to")
+    args = arg_parser.parse_args(argv)
+    names = compile_templates(args.target)
+    print(f"compiled {len(names)} templates into {args.target}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
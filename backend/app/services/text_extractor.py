@@ -0,0 +1,305 @@
+from typing import Dict, Any, BinaryIO, Iterator, List, Optional, Sequence, Tuple, Union
+from contextlib import contextmanager
+from io import BytesIO
+from xml.etree import ElementTree
+import mmap
+import os
+import re
+import zipfile
+from .section_detector import detect_headings
+
+# Uploaded bytes, or the path of an upload spooled to disk
+Source = Union[bytes, str]
+
+# WordprocessingML element names
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+W_BODY, W_P, W_T, W_TAB, W_BR, W_CR = W + "body", W + "p", W + "t", W + "tab", W + "br", W + "cr"
+W_TBL, W_TR, W_TC = W + "tbl", W + "tr", W + "tc"
+W_PSTYLE, W_OUTLINE_LVL, W_VAL = W + "pStyle", W + "outlineLvl", W + "val"
+
+# Paragraph style ids of headings: Title, Heading1, Heading2, ...
+HEADING_STYLE = re.compile(r"^(?:title|heading\s?(\d))$", re.IGNORECASE)
+
+# Separator between cells when a table row is rendered as a text line
+CELL_SEPARATOR = " | "
+
+
+def file_format(filename: str) -> str:
+    return filename.lower().split('.')[-1] if '.' in filename else ''
+
+
+def select_pages(page_count: int, pages: Optional[str] = None, max_pages: Optional[int] = None) -> List[int]:
+    """
+    Resolve a page selection such as "1-5,8,12-" (1-based, inclusive, open-ended ranges allowed)
+    into sorted 0-based page indices, capped at max_pages
+    """
+    if not pages:
+        selected = list(range(page_count))
+    else:
+        chosen = set()
+        for part in pages.split(","):
+            part = part.strip()
+            if not part:
+                continue
+            try:
+                if "-" in part:
+                    first, _, last = part.partition("-")
+                    start = int(first) if first.strip() else 1
+                    end = int(last) if last.strip() else max(page_count, start)
+                else:
+                    start = end = int(part)
+            except ValueError:
+                raise ValueError(f"Invalid page selection: {pages!r}. Use a list like 1-5,8,12-")
+            if start < 1 or end < start:
+                raise ValueError(f"Invalid page range: {part!r}")
+            chosen.update(range(start - 1, min(end, page_count)))
+        selected = sorted(chosen)
+
+    if max_pages is not None:
+        if max_pages < 1:
+            raise ValueError("max_pages must be at least 1")
+        selected = selected[:max_pages]
+    return selected
+
+
+@contextmanager
+def open_source(source: Source, mapped: bool = True) -> Iterator[BinaryIO]:
+    """
+    A binary stream over a source: a BytesIO sharing the buffer of uploaded bytes, or a read-only
+    memory map of a spooled file, so large uploads are paged in from disk rather than copied.
+    Without mapped the spooled file itself is returned, for readers that need a seekable file.
+    """
+    if isinstance(source, bytes):
+        yield BytesIO(source)
+        return
+    with open(source, "rb") as spooled:
+        if not mapped or os.fstat(spooled.fileno()).st_size == 0:
+            yield spooled  # an empty file cannot be mapped
+            return
+        with mmap.mmap(spooled.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+            yield mapped_file
+
+
+def read_source(source: Source) -> bytes:
+    if isinstance(source, bytes):
+        return source
+    with open(source, "rb") as spooled:
+        return spooled.read()
+
+
+def pdf_reader(stream: BinaryIO):
+    """A PyPDF2 reader over a stream; PyPDF2 is imported on the first PDF, not with the app"""
+    import PyPDF2
+
+    return PyPDF2.PdfReader(stream)
+
+
+def pdf_page_count(content: Source) -> int:
+    with open_source(content) as stream:
+        return len(pdf_reader(stream).pages)
+
+
+def pdf_outline(content: Source) -> Optional[List[Dict[str, Any]]]:
+    """
+    Return the bookmarks of a PDF as [{"title", "level"}] in document order (level 1 is top-level),
+    or None when the outline is malformed (dangling references, cycles)
+    """
+    outline: List[Dict[str, Any]] = []
+
+    def walk(items: List[Any], level: int) -> None:
+        for item in items:
+            if isinstance(item, list):
+                walk(item, level + 1)
+            elif getattr(item, "title", None):
+                outline.append({"title": item.title.strip(), "level": level})
+
+    with open_source(content) as stream:
+        reader = pdf_reader(stream)
+        from PyPDF2.errors import PyPdfError
+        try:
+            walk(reader.outline, 1)
+        except (PyPdfError, KeyError, RecursionError):
+            return None
+    return outline
+
+
+def locate_headings(text: str, outline: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    Find outline titles in extracted text, in order, as {"title", "level", "start"} headings.
+    A title only counts where it makes up a whole line; titles not found are skipped.
+    Without an outline (None) the headings are detected in the text instead.
+    """
+    if outline is None:
+        return detect_headings(text)
+    headings = []
+    position = 0
+    for entry in outline:
+        pattern = re.compile(r"^[ \t]*" + re.escape(entry["title"]) + r"[ \t]*$", re.MULTILINE)
+        match = pattern.search(text, position)
+        if match:
+            headings.append({**entry, "start": match.start()})
+            position = match.end()
+    return headings
+
+
+def iter_pdf_pages(content: Source, pages: Optional[Sequence[int]] = None) -> Iterator[str]:
+    """Yield the text of the selected pages (all by default) one at a time"""
+    with open_source(content) as stream:
+        reader = pdf_reader(stream)
+        for index in range(len(reader.pages)) if pages is None else pages:
+            yield reader.pages[index].extract_text() or ""
+
+
+def extract_text_from_pdf(content: Source, pages: Optional[Sequence[int]] = None) -> str:
+    """
+    Extract text from the selected pages of a PDF file. Pages are consumed one at a time;
+    a run of pages is also the unit of work when a large PDF is split across workers.
+    """
+    return "".join(f"{text}\n" for text in iter_pdf_pages(content, pages))
+
+
+def iter_docx_records(content: Source) -> Iterator[Dict[str, Any]]:
+    """
+    Stream word/document.xml with an incremental XML parser and yield, in document order,
+    {"type": "paragraph", "text": ..., "level": n} and {"type": "table_row", "table": n, "cells": [...]}
+    records. level is the heading level of heading paragraphs and None otherwise.
+    Nested tables are flattened into the text of the enclosing cell.
+    """
+    # zipfile seeks to each member it reads, so it gets the file rather than a memory map
+    with open_source(content, mapped=False) as stream, zipfile.ZipFile(stream) as archive:
+        with archive.open("word/document.xml") as xml_stream:
+            body = None
+            level = 0
+            body_level = None
+            table_depth = 0
+            table_index = -1
+            paragraphs: List[List[str]] = []  # stack: text boxes nest paragraphs inside paragraphs
+            heading_level: Optional[int] = None  # of the current top-level paragraph
+            row: Optional[List[str]] = None
+            cell: Optional[List[str]] = None
+
+            for event, elem in ElementTree.iterparse(xml_stream, events=("start", "end")):
+                tag = elem.tag
+                if event == "start":
+                    level += 1
+                    if tag == W_BODY:
+                        body, body_level = elem, level
+                    elif tag == W_P:
+                        paragraphs.append([])
+                    elif tag == W_TBL:
+                        table_depth += 1
+                        if table_depth == 1:
+                            table_index += 1
+                    elif tag == W_TR and table_depth == 1:
+                        row = []
+                    elif tag == W_TC and table_depth == 1:
+                        cell = []
+                    continue
+
+                level -= 1
+                if tag == W_T and paragraphs:
+                    paragraphs[-1].append(elem.text or "")
+                elif tag == W_TAB and paragraphs:
+                    paragraphs[-1].append("\t")
+                elif tag in (W_BR, W_CR) and paragraphs:
+                    paragraphs[-1].append("\n")
+                elif tag in (W_PSTYLE, W_OUTLINE_LVL) and len(paragraphs) == 1 and cell is None:
+                    value = elem.get(W_VAL) or ""
+                    # Outline level 9 is body text
+                    if tag == W_OUTLINE_LVL and value.isdigit() and int(value) < 9:
+                        heading_level = int(value) + 1
+                    elif tag == W_PSTYLE and heading_level is None:
+                        style = HEADING_STYLE.match(value)
+                        if style:
+                            heading_level = int(style.group(1) or 0) or 1
+                elif tag == W_P and paragraphs:
+                    text = "".join(paragraphs.pop())
+                    if paragraphs:
+                        paragraphs[-1].append(text)
+                    elif cell is not None:
+                        cell.append(text)
+                    else:
+                        yield {"type": "paragraph", "text": text, "level": heading_level}
+                        heading_level = None
+                elif tag == W_TC and table_depth == 1 and row is not None:
+                    row.append("\n".join(cell or []))
+                    cell = None
+                elif tag == W_TR and table_depth == 1 and row is not None:
+                    yield {"type": "table_row", "table": table_index, "cells": row}
+                    row = None
+                elif tag == W_TBL:
+                    table_depth -= 1
+
+                # Drop processed top-level elements so memory stays bounded by the largest paragraph/table
+                if body is not None and level == body_level:
+                    body.clear()
+
+
+def extract_docx(content: Source) -> Tuple[str, List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Extract the text of a DOCX file with table rows rendered as "cell | cell" lines, plus each
+    table's rows and character span within that text, and the {"title", "level", "start"} headings
+    """
+    lines: List[str] = []
+    tables: List[Dict[str, Any]] = []
+    headings: List[Dict[str, Any]] = []
+    position = 0
+
+    for record in iter_docx_records(content):
+        if record["type"] == "paragraph":
+            line = record["text"]
+            if record["level"] is not None and line.strip():
+                headings.append({"title": line.strip(), "level": record["level"], "start": position})
+        else:
+            if not tables or tables[-1]["index"] != record["table"]:
+                tables.append({"index": record["table"], "start": position, "end": position, "rows": []})
+            line = CELL_SEPARATOR.join(cell.replace("\n", " ") for cell in record["cells"])
+            tables[-1]["rows"].append(record["cells"])
+            tables[-1]["end"] = position + len(line)
+        lines.append(line)
+        position += len(line) + 1
+
+    for table in tables:
+        del table["index"]
+    return "\n".join(lines), tables, headings
+
+
+def extract_text_from_docx(content: Source) -> str:
+    """Extract paragraph and table text from a DOCX file"""
+    return extract_docx(content)[0]
+
+
+def extract_document(
+    content: Source,
+    filename: str,
+    pages: Optional[Sequence[int]] = None
+) -> Tuple[str, Optional[List[Dict[str, Any]]], Optional[List[Dict[str, Any]]]]:
+    """
+    Extract the text of a file plus its structure: the table structure of DOCX files, and the
+    headings of DOCX files (from heading styles) and PDF files (from bookmarks)
+    """
+    file_ext = file_format(filename)
+    if file_ext == 'docx':
+        return extract_docx(content)
+    text = extract_text(content, filename, pages)
+    if file_ext == 'pdf':
+        return text, None, locate_headings(text, pdf_outline(content))
+    return text, None, None
+
+
+def extract_text(content: Source, filename: str, pages: Optional[Sequence[int]] = None) -> str:
+    """Extract text content from file based on its format. Page selection only applies to PDFs."""
+    file_ext = file_format(filename)
+
+    if file_ext == 'pdf':
+        return extract_text_from_pdf(content, pages)
+    elif file_ext == 'docx':
+        return extract_text_from_docx(content)
+    elif file_ext == 'txt':
+        content = read_source(content)
+        try:
+            return content.decode('utf-8')
+        except UnicodeDecodeError:
+            return content.decode('latin-1')  # fallback encoding
+    else:
+        raise ValueError(f"Unsupported file format: .{file_ext}. Please upload PDF, DOCX, or TXT files.")
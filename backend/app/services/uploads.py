@@ -0,0 +1,126 @@
+from typing import Any, BinaryIO, Optional, Union
+from dataclasses import dataclass
+import hashlib
+import os
+import tempfile
+
+# Bytes copied per read while spooling an upload
+CHUNK_SIZE = 1024 * 1024
+
+# Open descriptors of this process; other processes of the same user reopen a file through /proc/PID/fd
+PROC_FDS = "/proc/self/fd"
+
+
+class UploadTooLargeError(ValueError):
+    """Raised when an upload exceeds the configured maximum size"""
+
+    def __init__(self, filename: str, max_bytes: int):
+        super().__init__(f"{filename} is larger than the {max_bytes} byte upload limit")
+        self.max_bytes = max_bytes
+
+
+@dataclass
+class SpooledUpload:
+    """
+    An uploaded file and the sha256 of its content. Uploads up to the spool threshold are kept
+    in memory as content; larger ones are in a temporary file at path, which extraction workers
+    read from (or memory-map) instead of receiving a copy of the bytes. When the web framework
+    already spooled the upload to disk, path reopens that file through a descriptor held here.
+    """
+    filename: str
+    size: int
+    sha256: Any
+    content: Optional[bytes] = None
+    path: Optional[str] = None
+    descriptor: Optional[int] = None
+
+    @property
+    def source(self) -> Union[bytes, str]:
+        """What the text extractors take: the bytes, or the path of the spooled file"""
+        return self.content if self.path is None else self.path
+
+    def read(self) -> bytes:
+        if self.path is None:
+            return self.content
+        with open(self.path, "rb") as spooled:
+            return spooled.read()
+
+    def close(self) -> None:
+        """Delete the spooled file, or release the reused one; safe to call more than once"""
+        if self.descriptor is not None:
+            descriptor, self.descriptor, self.path = self.descriptor, None, None
+            os.close(descriptor)
+        elif self.path is not None:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+
+
+def spool(
+    stream: BinaryIO,
+    filename: str,
+    max_bytes: int,
+    spool_max_bytes: int,
+    directory: Optional[str] = None
+) -> SpooledUpload:
+    """
+    Copy an upload stream chunk by chunk, hashing as it goes, into memory or, once it outgrows
+    spool_max_bytes, a temporary file. A stream already spooled to disk (Starlette's uploads past
+    its own threshold) is only read and hashed, and its file reused. Raises UploadTooLargeError as
+    soon as max_bytes is exceeded.
+    """
+    sha256 = hashlib.sha256()
+    buffer = bytearray()
+    spooled = None
+    reused = _rolled_over(stream)
+    size = 0
+    try:
+        while True:
+            chunk = stream.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if max_bytes and size > max_bytes:
+                raise UploadTooLargeError(filename, max_bytes)
+            sha256.update(chunk)
+            if spooled is not None:
+                spooled.write(chunk)
+            elif buffer is not None:
+                buffer += chunk
+                if len(buffer) <= spool_max_bytes:
+                    continue
+                if reused is not None:
+                    # The stream's own file holds the upload; only the hash is still needed
+                    buffer = None
+                    continue
+                suffix = os.path.splitext(filename or "")[1]
+                spooled = tempfile.NamedTemporaryFile(prefix="bdd-upload-", suffix=suffix, dir=directory, delete=False)
+                spooled.write(buffer)
+                buffer = bytearray()
+    except BaseException:
+        if spooled is not None:
+            spooled.close()
+            os.unlink(spooled.name)
+        if reused is not None:
+            os.close(reused)
+        raise
+
+    if buffer is None:
+        return SpooledUpload(filename, size, sha256, path=f"/proc/{os.getpid()}/fd/{reused}", descriptor=reused)
+    if reused is not None:
+        os.close(reused)
+    if spooled is None:
+        return SpooledUpload(filename, size, sha256, content=bytes(buffer))
+    spooled.close()
+    return SpooledUpload(filename, size, sha256, path=spooled.name)
+
+
+def _rolled_over(stream: BinaryIO) -> Optional[int]:
+    """
+    A duplicate descriptor of the file of a SpooledTemporaryFile that rolled over to disk, if read
+    from its start and reachable through /proc; its file has no name to hand to other processes
+    """
+    if not getattr(stream, "_rolled", False) or not os.path.isdir(PROC_FDS) or stream.tell() != 0:
+        return None
+    return os.dup(stream.fileno())
@@ -0,0 +1,194 @@
+"""
+End-to-end load benchmark: starts the API with uvicorn and drives it with concurrent local clients.
+
+Each request uploads a document of the synthetic corpus to /api/convert-to-feature. Reports
+throughput, p50/p99 latency, errors and the peak RSS of the server process tree as JSON.
+The document cache is effectively disabled so every request extracts and parses its upload;
+pass --cache to measure repeat conversions instead. With --stream the feature files are requested
+as streamed text, and the time to first byte is reported next to the latency. Requires httpx.
+
+    cd backend
+    python -m benchmarks.bench_e2e --requests 200 --concurrency 16 --sizes 20000
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import httpx
+from benchmarks.corpus import DOC_TYPES, FORMATS, make_corpus
+from benchmarks.stats import process_tree_rss_mb, summarize_ms
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+# Seconds to wait for the server to load its models and report ready
+STARTUP_TIMEOUT = 180.0
+
+RSS_SAMPLE_INTERVAL = 0.1
+
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def start_server(port: int, env_overrides: Dict[str, str]) -> subprocess.Popen:
+    env = {**os.environ, **env_overrides}
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=str(BACKEND_DIR),
+        env=env
+    )
+
+
+async def wait_until_ready(client: httpx.AsyncClient, server: subprocess.Popen) -> float:
+    """Poll the readiness probe and return the seconds it took the server to become ready"""
+    start = time.perf_counter()
+    while time.perf_counter() - start < STARTUP_TIMEOUT:
+        if server.poll() is not None:
+            raise RuntimeError(f"The server exited with status {server.returncode} during startup")
+        try:
+            response = await client.get("/api/health/ready")
+            if response.status_code == 200:
+                return time.perf_counter() - start
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError(f"The server did not become ready within {STARTUP_TIMEOUT} seconds")
+
+
+async def sample_rss(pid: int, samples: List[float], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        rss = process_tree_rss_mb(pid)
+        if rss is not None:
+            samples.append(rss)
+        try:
+            await asyncio.wait_for(stop.wait(), RSS_SAMPLE_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def drive(
+    base_url: str,
+    server: subprocess.Popen,
+    corpus: List[Dict[str, Any]],
+    requests: int,
+    concurrency: int,
+    endpoint: str,
+    stream: bool = False
+) -> Dict[str, Any]:
+    timeout = httpx.Timeout(600.0)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout) as client:
+        ready_seconds = await wait_until_ready(client, server)
+
+        latencies: List[float] = []
+        first_bytes: List[float] = []
+        errors: Dict[str, int] = {}
+        next_request = iter(range(requests))
+
+        async def worker() -> None:
+            for index in next_request:
+                document = corpus[index % len(corpus)]
+                start = time.perf_counter()
+                first_byte = None
+                try:
+                    async with client.stream(
+                        "POST",
+                        endpoint,
+                        params={"stream": "true"} if stream else None,
+                        files={"file": (document["filename"], document["content"])},
+                        data={"doc_type": document["doc_type"]}
+                    ) as response:
+                        async for _ in response.aiter_raw():
+                            if first_byte is None:
+                                first_byte = time.perf_counter() - start
+                    status = str(response.status_code)
+                except httpx.HTTPError as e:
+                    status = type(e).__name__
+                latencies.append(time.perf_counter() - start)
+                if first_byte is not None:
+                    first_bytes.append(first_byte)
+                if status != "200":
+                    errors[status] = errors.get(status, 0) + 1
+
+        rss_samples: List[float] = []
+        stop = asyncio.Event()
+        sampler = asyncio.create_task(sample_rss(server.pid, rss_samples, stop))
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        duration = time.perf_counter() - start
+        stop.set()
+        await sampler
+
+    return {
+        "endpoint": endpoint,
+        "requests": requests,
+        "concurrency": concurrency,
+        "startup_s": round(ready_seconds, 3),
+        "duration_s": round(duration, 3),
+        "throughput_rps": round(requests / duration, 3) if duration else 0.0,
+        **summarize_ms(latencies),
+        "first_byte": summarize_ms(first_bytes),
+        "errors": errors,
+        "peak_rss_mb": max(rss_samples) if rss_samples else None
+    }
+
+
+def run(
+    doc_types: List[str],
+    sizes: List[int],
+    formats: List[str],
+    requests: int,
+    concurrency: int,
+    cache: bool = False,
+    endpoint: str = "/api/convert-to-feature",
+    seed: int = 0,
+    env: Optional[Dict[str, str]] = None,
+    stream: bool = False
+) -> Dict[str, Any]:
+    corpus = make_corpus(doc_types, sizes, formats, seed)
+    port = free_port()
+    overrides = {"BDD_JOB_STORE_URL": "sqlite://", **(env or {})}
+    if not cache:
+        # The cache always keeps its most recent entry, but evicts everything else
+        overrides.setdefault("BDD_DOCUMENT_CACHE_MAX_BYTES", "1")
+
+    server = start_server(port, overrides)
+    try:
+        result = asyncio.run(drive(f"http://127.0.0.1:{port}", server, corpus, requests, concurrency, endpoint, stream))
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+    return {**result, "documents": len(corpus), "cache": cache, "stream": stream}
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--types", nargs="+", default=DOC_TYPES, choices=DOC_TYPES)
+    arg_parser.add_argument("--sizes", type=int, nargs="+", default=[20_000])
+    arg_parser.add_argument("--formats", nargs="+", default=FORMATS, choices=FORMATS)
+    arg_parser.add_argument("--requests", type=int, default=100)
+    arg_parser.add_argument("--concurrency", type=int, default=8)
+    arg_parser.add_argument("--cache", action="store_true", help="Keep the document cache enabled")
+    arg_parser.add_argument("--endpoint", default="/api/convert-to-feature")
+    arg_parser.add_argument("--stream", action="store_true", help="Request streamed feature files (stream=true)")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args()
+    result = run(
+        args.types, args.sizes, args.formats, args.requests, args.concurrency,
+        cache=args.cache, endpoint=args.endpoint, seed=args.seed, stream=args.stream
+    )
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Priority-lane benchmark: interactive latency on an idle server and under a saturating bulk load.
+
+Interactive clients upload documents to /api/conversion/analyze one request at a time, first on an
+idle server and then while bulk clients keep sending batches to /api/conversion/convert. Reports
+p50/p99 of the interactive requests in both phases, the bulk documents converted per second and
+the mean time tasks of each lane waited for a worker. The document cache is effectively disabled
+so every request extracts its upload. Requires httpx.
+
+    cd backend
+    python -m benchmarks.bench_lanes --workers 4 --bulk-clients 4 --batch-size 8
+"""
+import argparse
+import asyncio
+import json
+import re
+import subprocess
+import time
+from typing import Any, Dict, List
+import httpx
+from benchmarks.bench_e2e import free_port, start_server, wait_until_ready
+from benchmarks.corpus import make_document
+from benchmarks.stats import summarize_ms
+
+WAIT_METRIC = re.compile(r'^bdd_scheduler_wait_seconds_(sum|count)\{lane="(\w+)"\} (\S+)$', re.MULTILINE)
+
+
+async def interactive_phase(client: httpx.AsyncClient, documents: List[Any], requests: int, concurrency: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    next_request = iter(range(requests))
+
+    async def worker() -> None:
+        for index in next_request:
+            name, content = documents[index % len(documents)]
+            start = time.perf_counter()
+            try:
+                response = await client.post("/api/conversion/analyze", files={"file": (name, content)})
+                status = str(response.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - start)
+            if status != "200":
+                errors[status] = errors.get(status, 0) + 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return {**summarize_ms(latencies), "errors": errors}
+
+
+async def bulk_load(client: httpx.AsyncClient, documents: List[Any], batch_size: int, stop: asyncio.Event, converted: List[int], errors: Dict[str, int]) -> None:
+    batch = 0
+    while not stop.is_set():
+        files = [("files", documents[(batch * batch_size + index) % len(documents)]) for index in range(batch_size)]
+        batch += 1
+        try:
+            response = await client.post("/api/conversion/convert", params={"doc_type": "BRD"}, files=files)
+            status = str(response.status_code)
+            if response.status_code == 200:
+                records = response.json()["results"]
+                converted[0] += sum(record["status"] == "success" for record in records)
+                for record in records:
+                    if record["status"] != "success":
+                        errors[str(record["status_code"])] = errors.get(str(record["status_code"]), 0) + 1
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        if status != "200":
+            errors[status] = errors.get(status, 0) + 1
+
+
+def lane_waits(metrics: str) -> Dict[str, float]:
+    """Mean scheduler wait per lane, in milliseconds, from the /metrics text"""
+    totals: Dict[str, Dict[str, float]] = {}
+    for kind, lane, value in WAIT_METRIC.findall(metrics):
+        totals.setdefault(lane, {})[kind] = float(value)
+    return {
+        lane: round(values.get("sum", 0.0) / values["count"] * 1000, 3) if values.get("count") else 0.0
+        for lane, values in sorted(totals.items())
+    }
+
+
+async def drive(base_url: str, server: subprocess.Popen, args: argparse.Namespace) -> Dict[str, Any]:
+    interactive_documents = [make_document(doc_type, args.interactive_size, "txt") for doc_type in ("User Story", "BRD", "Test Case")]
+    bulk_documents = [make_document("BRD", args.bulk_size, fmt) for fmt in ("txt", "docx", "pdf")]
+    async with httpx.AsyncClient(base_url=base_url, timeout=httpx.Timeout(600.0)) as client:
+        await wait_until_ready(client, server)
+        # Start the worker processes before anything is measured
+        await interactive_phase(client, interactive_documents, 2 * args.workers, args.workers)
+        idle = await interactive_phase(client, interactive_documents, args.requests, args.interactive_clients)
+
+        stop = asyncio.Event()
+        converted, bulk_errors = [0], {}
+        # Separate connections per bulk client, identified as one automation client
+        bulk_clients = [
+            httpx.AsyncClient(base_url=base_url, timeout=httpx.Timeout(600.0), headers={"X-API-Key": "bulk-bench"})
+            for _ in range(args.bulk_clients)
+        ]
+        bulk = [asyncio.create_task(bulk_load(bulk_client, bulk_documents, args.batch_size, stop, converted, bulk_errors)) for bulk_client in bulk_clients]
+        await asyncio.sleep(args.ramp_up)
+        start = time.perf_counter()
+        loaded = await interactive_phase(client, interactive_documents, args.requests, args.interactive_clients)
+        duration = time.perf_counter() - start
+        stop.set()
+        await asyncio.gather(*bulk)
+        for bulk_client in bulk_clients:
+            await bulk_client.aclose()
+        metrics = (await client.get("/metrics")).text
+
+    return {
+        "workers": args.workers,
+        "interactive_idle": idle,
+        "interactive_loaded": loaded,
+        "bulk_documents_per_s": round(converted[0] / duration, 3) if duration else 0.0,
+        "bulk_errors": bulk_errors,
+        "lane_wait_mean_ms": lane_waits(metrics)
+    }
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--workers", type=int, default=4)
+    arg_parser.add_argument("--requests", type=int, default=60, help="Interactive requests per phase")
+    arg_parser.add_argument("--interactive-clients", type=int, default=2)
+    arg_parser.add_argument("--interactive-size", type=int, default=100_000, help="Characters per interactive document")
+    arg_parser.add_argument("--bulk-clients", type=int, default=4)
+    arg_parser.add_argument("--batch-size", type=int, default=8)
+    arg_parser.add_argument("--bulk-size", type=int, default=200_000, help="Characters per bulk document")
+    arg_parser.add_argument("--ramp-up", type=float, default=2.0, help="Seconds of bulk load before the loaded phase starts")
+    args = arg_parser.parse_args()
+
+    port = free_port()
+    server = start_server(port, {
+        "BDD_JOB_STORE_URL": "sqlite://",
+        "BDD_DOCUMENT_CACHE_MAX_BYTES": "1",
+        "BDD_EXECUTOR_WORKERS": str(args.workers),
+        # Enough queue for every bulk client's batch, so the load is shed by scheduling rather than 503s
+        "BDD_EXECUTOR_QUEUE_SIZE": str(max(args.bulk_clients * args.batch_size, 2 * args.workers))
+    })
+    try:
+        result = asyncio.run(drive(f"http://127.0.0.1:{port}", server, args))
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
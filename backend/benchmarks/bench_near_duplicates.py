@@ -0,0 +1,69 @@
+"""
+Scaling benchmark for near-duplicate requirement detection.
+
+Takes the requirement and scenario sentences of synthetic BRDs of increasing size and reports
+the time to group them by similarity through the shingle index, next to comparing every pair
+of sentences (measured on a sample and extrapolated). The indexed time should grow roughly
+linearly with the number of sentences, the all-pairs time quadratically.
+
+    cd backend
+    python -m benchmarks.bench_near_duplicates --sentences 1000 10000 50000
+"""
+import argparse
+import json
+import time
+from app.services.near_duplicates import group_near_duplicates, jaccard, normalize, shingles
+from benchmarks.corpus import make_text
+
+# Sentences compared pairwise to estimate the all-pairs time
+ALL_PAIRS_SAMPLE = 1000
+
+
+def make_sentences(count: int, seed: int):
+    """Requirement and scenario sentences of a synthetic BRD"""
+    size = 200
+    while True:
+        lines = [line for line in make_text("BRD", size, seed).splitlines() if line.startswith(("The system", "When the"))]
+        if len(lines) >= count:
+            return lines[:count]
+        size *= 2
+
+
+def run(counts, threshold: float, seed: int):
+    results = []
+    for count in counts:
+        sentences = make_sentences(count, seed)
+        start = time.perf_counter()
+        groups = group_near_duplicates(sentences, threshold)
+        indexed = time.perf_counter() - start
+
+        sample = [shingles(normalize(sentence)) for sentence in sentences[:ALL_PAIRS_SAMPLE]]
+        start = time.perf_counter()
+        for position, first in enumerate(sample):
+            for second in sample[position + 1:]:
+                jaccard(first, second)
+        pairs = len(sample) * (len(sample) - 1) / 2
+        all_pairs = (time.perf_counter() - start) / pairs * count * (count - 1) / 2
+
+        results.append({
+            "sentences": count,
+            "groups": len(groups),
+            "merged": count - len(groups),
+            "indexed_ms": round(indexed * 1000, 1),
+            "all_pairs_ms": round(all_pairs * 1000, 1),
+            "speedup": round(all_pairs / indexed, 1)
+        })
+    return results
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--sentences", type=int, nargs="+", default=[1000, 10000, 50000])
+    arg_parser.add_argument("--threshold", type=float, default=0.7)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args()
+    print(json.dumps(run(args.sentences, args.threshold, args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
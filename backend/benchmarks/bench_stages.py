@@ -0,0 +1,100 @@
+"""
+Per-stage benchmark of the conversion pipeline on the synthetic corpus.
+
+Times each stage on its own, in-process: extraction, DocumentTypeIdentifier.identify_document_type,
+DocumentParser.parse_document, GherkinGenerator.generate_feature and
+StepDefinitionGenerator.generate_step_definitions. Prints JSON with p50/p99 per document and stage.
+
+    cd backend
+    python -m benchmarks.bench_stages --sizes 20000 200000 --formats txt docx pdf --repeat 5
+"""
+import argparse
+import json
+import time
+from typing import Any, Callable, Dict, List
+from app.services.document_parser import DocumentParser
+from app.services.document_type_identifier import DocumentTypeIdentifier
+from app.services.gherkin_generator import GherkinGenerator
+from app.services.step_definition_generator import StepDefinitionGenerator
+from app.services.nlp_registry import nlp_registry
+from app.services.text_extractor import extract_document
+from benchmarks.corpus import DOC_TYPES, FORMATS, make_corpus
+from benchmarks.stats import peak_rss_mb, summarize_ms
+
+STAGES = ["extract", "identify", "parse", "generate", "steps"]
+
+
+def time_stage(fn: Callable[[], Any], repeat: int) -> Dict[str, Any]:
+    """Run fn repeat times and return its last result with the timing summary"""
+    durations = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        durations.append(time.perf_counter() - start)
+    return {"result": result, **summarize_ms(durations)}
+
+
+def bench_document(document: Dict[str, Any], repeat: int, tools: Dict[str, Any]) -> Dict[str, Any]:
+    doc_type = document["doc_type"]
+    timings = {}
+
+    extracted = time_stage(lambda: extract_document(document["content"], document["filename"]), repeat)
+    text = extracted.pop("result")[0]
+    timings["extract"] = extracted
+
+    identified = time_stage(lambda: tools["identifier"].identify_document_type(text), repeat)
+    identified.pop("result")
+    timings["identify"] = identified
+
+    parsed = time_stage(lambda: tools["parser"].parse_document(text, doc_type), repeat)
+    parsed_content = parsed.pop("result")
+    timings["parse"] = parsed
+
+    feature_name = document["filename"].rsplit(".", 1)[0]
+    generated = time_stage(lambda: tools["generator"].generate_feature(parsed_content, feature_name, doc_type), repeat)
+    feature_content = generated.pop("result")
+    timings["generate"] = generated
+
+    steps = time_stage(lambda: tools["steps"].generate_step_definitions(feature_content, "python"), repeat)
+    steps.pop("result")
+    timings["steps"] = steps
+
+    return {
+        "doc_type": doc_type,
+        "format": document["format"],
+        "size": document["size"],
+        "bytes": len(document["content"]),
+        "chars": len(text),
+        "stages": timings
+    }
+
+
+def run(doc_types: List[str], sizes: List[int], formats: List[str], repeat: int, seed: int = 0) -> Dict[str, Any]:
+    nlp_registry.warm_up(["sentences"])
+    tools = {
+        "identifier": DocumentTypeIdentifier(),
+        "parser": DocumentParser(),
+        "generator": GherkinGenerator(),
+        "steps": StepDefinitionGenerator()
+    }
+    documents = [
+        bench_document(document, repeat, tools)
+        for document in make_corpus(doc_types, sizes, formats, seed)
+    ]
+    return {"repeat": repeat, "documents": documents, "peak_rss_mb": peak_rss_mb()}
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--types", nargs="+", default=DOC_TYPES, choices=DOC_TYPES)
+    arg_parser.add_argument("--sizes", type=int, nargs="+", default=[20_000, 200_000])
+    arg_parser.add_argument("--formats", nargs="+", default=FORMATS, choices=FORMATS)
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args()
+    print(json.dumps(run(args.types, args.sizes, args.formats, args.repeat, args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Cold start benchmark: import time of the app and time to first response of a fresh server.
+
+Runs `python -X importtime -c "import app.main"` in fresh interpreters and reports the
+cumulative import time of app.main with its heaviest top-level imports. Libraries the routes
+load on first use (spaCy, PyPDF2, jinja2, SQLAlchemy) must not be imported with the app.
+Then starts uvicorn and times how long the first /api/health request takes to get a 200,
+and how long the first conversion takes after that, which pays for the libraries it loads.
+Exits with status 1 when a budget is exceeded or a deferred library is imported at startup.
+
+    cd backend
+    python -m benchmarks.bench_startup --runs 5 --import-budget-ms 1500 --ttfr-budget-ms 3000
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+import httpx
+from benchmarks.bench_e2e import BACKEND_DIR, free_port, start_server
+from benchmarks.corpus import make_document
+
+# Libraries loaded by the first request that needs them (or the background warm-up), never on import
+DEFERRED_MODULES = ("spacy", "PyPDF2", "jinja2", "sqlalchemy")
+
+# Seconds to wait for the first response of a fresh server
+FIRST_RESPONSE_TIMEOUT = 60.0
+
+POLL_INTERVAL = 0.005
+
+
+def measure_import(env: Dict[str, str]) -> Dict[str, Any]:
+    """Import app.main in a fresh interpreter and parse its -X importtime report"""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=str(BACKEND_DIR),
+        env=env,
+        capture_output=True,
+        text=True
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Importing app.main failed:\n{completed.stderr[-2000:]}")
+
+    # Lines read "import time: <self us> | <cumulative us> | <module indented by depth>",
+    # a module after everything it imported
+    cumulative: Dict[str, int] = {}
+    direct: Dict[str, int] = {}
+    children: Dict[str, int] = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, total, name = line[len("import time:"):].split("|", 2)
+        if not total.strip().isdigit():
+            continue  # the header line
+        module, depth = name.strip(), (len(name) - len(name.lstrip()) - 1) // 2
+        cumulative[module] = int(total)
+        if depth == 1:
+            children[module] = int(total)
+        elif depth == 0:
+            if module == "app.main":
+                direct = children
+            children = {}
+
+    if "app.main" not in cumulative:
+        raise RuntimeError("app.main missing from the -X importtime report")
+    return {
+        "import_ms": cumulative["app.main"] / 1000,
+        "heaviest": sorted(direct.items(), key=lambda item: -item[1])[:5],
+        "deferred_imported": [module for module in DEFERRED_MODULES if module in cumulative]
+    }
+
+
+def measure_first_response(env: Dict[str, str]) -> Dict[str, Any]:
+    """Start a server and time its first /api/health response, then its first conversion"""
+    port = free_port()
+    start = time.perf_counter()
+    server = start_server(port, env)
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=600.0) as client:
+            while True:
+                if server.poll() is not None:
+                    raise RuntimeError(f"The server exited with status {server.returncode} during startup")
+                if time.perf_counter() - start > FIRST_RESPONSE_TIMEOUT:
+                    raise RuntimeError(f"The server did not respond within {FIRST_RESPONSE_TIMEOUT} seconds")
+                try:
+                    if client.get("/api/health").status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                time.sleep(POLL_INTERVAL)
+            first_response = time.perf_counter() - start
+
+            filename, content = make_document("User Story", 2_000, "pdf")
+            conversion_start = time.perf_counter()
+            response = client.post(
+                "/api/convert-to-feature",
+                files={"file": (filename, content)},
+                data={"doc_type": "User Story"}
+            )
+            first_conversion = time.perf_counter() - conversion_start
+            if response.status_code != 200:
+                raise RuntimeError(f"The first conversion failed with status {response.status_code}")
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+    return {"first_response_ms": first_response * 1000, "first_conversion_ms": first_conversion * 1000}
+
+
+def run(runs: int, env: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    env = {**os.environ, "BDD_JOB_STORE_URL": "sqlite://", **(env or {})}
+    imports = [measure_import(env) for _ in range(runs)]
+    responses = [measure_first_response(env) for _ in range(runs)]
+
+    def median(samples: List[Dict[str, Any]], name: str) -> float:
+        return round(statistics.median(sample[name] for sample in samples), 1)
+
+    return {
+        "runs": runs,
+        "import_ms": median(imports, "import_ms"),
+        "first_response_ms": median(responses, "first_response_ms"),
+        "first_conversion_ms": median(responses, "first_conversion_ms"),
+        "heaviest_imports_ms": {module: round(us / 1000, 1) for module, us in imports[-1]["heaviest"]},
+        "deferred_imported": sorted({module for sample in imports for module in sample["deferred_imported"]})
+    }
+
+
+def check_budgets(result: Dict[str, Any], import_budget_ms: Optional[float], ttfr_budget_ms: Optional[float]) -> List[str]:
+    failures = []
+    if import_budget_ms is not None and result["import_ms"] > import_budget_ms:
+        failures.append(f"import of app.main took {result['import_ms']} ms, over the {import_budget_ms} ms budget")
+    if ttfr_budget_ms is not None and result["first_response_ms"] > ttfr_budget_ms:
+        failures.append(f"first response took {result['first_response_ms']} ms, over the {ttfr_budget_ms} ms budget")
+    if result["deferred_imported"]:
+        failures.append(f"imported at startup instead of on first use: {', '.join(result['deferred_imported'])}")
+    return failures
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--runs", type=int, default=5)
+    arg_parser.add_argument("--import-budget-ms", type=float, default=1500.0)
+    arg_parser.add_argument("--ttfr-budget-ms", type=float, default=3000.0)
+    args = arg_parser.parse_args()
+    result = run(args.runs)
+    failures = check_budgets(result, args.import_budget_ms, args.ttfr_budget_ms)
+    print(json.dumps({**result, "failures": failures}, indent=2))
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Scaling benchmark for step library matching.
+
+Registers synthetic libraries of regexes, cucumber expressions and behave parse patterns
+of increasing size and reports the index build time and the time to match a step, next to
+trying every pattern in turn. Matching through the index should stay flat as the library grows.
+
+    cd backend
+    python -m benchmarks.bench_step_library --sizes 100 1000 10000 50000
+"""
+import argparse
+import json
+import random
+import time
+from app.services.step_library import StepBinding, StepIndex
+
+ROLES = ["shopper", "guest user", "store manager", "administrator", "customer"]
+VERBS = ["opens", "submits", "cancels", "exports", "approves", "filters", "searches", "deletes"]
+OBJECTS = ["order", "invoice", "cart", "wishlist", "report", "coupon", "profile", "catalogue"]
+
+
+def make_library(size: int, seed: int = 0):
+    """Synthetic step definitions plus one matching step text per definition"""
+    rng = random.Random(seed)
+    bindings, steps = [], []
+    for i in range(size):
+        role, verb, item = rng.choice(ROLES), rng.choice(VERBS), rng.choice(OBJECTS)
+        kind = ("regex", "cucumber", "parse")[i % 3]
+        if kind == "regex":
+            pattern = rf'^the {role} {verb} the {item} "([^"]*)" in module{i}$'
+        elif kind == "cucumber":
+            pattern = f"the {role} {verb} {{int}} {item}(s) in module{i}"
+        else:
+            pattern = f"the {role} {verb} the {item} {{name}} in module{i}"
+        bindings.append(StepBinding(pattern, kind=kind))
+        steps.append(f'the {role} {verb} the {item} "X-{i}" in module{i}' if kind == "regex" else
+                     f"the {role} {verb} 3 {item}s in module{i}" if kind == "cucumber" else
+                     f"the {role} {verb} the {item} Q{i} in module{i}")
+    return bindings, steps
+
+
+def run(sizes, lookups: int, seed: int):
+    results = []
+    for size in sizes:
+        bindings, steps = make_library(size, seed)
+        start = time.perf_counter()
+        index = StepIndex(bindings)
+        build = time.perf_counter() - start
+
+        rng = random.Random(seed)
+        sample = [rng.randrange(size) for _ in range(lookups)]
+        start = time.perf_counter()
+        for position in sample:
+            matches = index.match(steps[position])
+            assert matches and matches[0][0] is bindings[position]
+        indexed = (time.perf_counter() - start) / lookups
+
+        # The linear scan is what matching without an index costs: every pattern, every step
+        linear_lookups = max(1, min(lookups, 200_000 // size))
+        start = time.perf_counter()
+        for position in sample[:linear_lookups]:
+            [binding for binding in bindings if binding.regex.search(steps[position])]
+        linear = (time.perf_counter() - start) / linear_lookups
+
+        results.append({
+            "patterns": size,
+            "index_build_ms": round(build * 1000, 2),
+            "match_us": round(indexed * 1e6, 2),
+            "linear_scan_us": round(linear * 1e6, 2),
+            "speedup": round(linear / indexed, 1),
+            "unindexed": index.unindexed_count
+        })
+    return results
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 50000])
+    arg_parser.add_argument("--lookups", type=int, default=2000)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args()
+    print(json.dumps(run(args.sizes, args.lookups, args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
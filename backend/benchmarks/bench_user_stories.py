@@ -0,0 +1,73 @@
+"""
+Scaling benchmark for DocumentParser user story parsing.
+
+Generates backlog exports with an increasing number of stories and reports the
+parse time per story, which should stay flat (linear total time) as N grows.
+
+    cd backend
+    python -m benchmarks.bench_user_stories --sizes 10 100 1000 5000
+"""
+import argparse
+import json
+import time
+from app.services.document_parser import DocumentParser
+from app.services.nlp_registry import nlp_registry
+
+ROLES = ["shopper", "store manager", "guest user", "administrator"]
+ACTIONS = ["search for products", "add items to the cart", "apply a coupon", "track my order"]
+
+
+def make_backlog(stories: int) -> str:
+    """Build a synthetic backlog export with three acceptance criteria per story"""
+    lines = []
+    for i in range(stories):
+        role = ROLES[i % len(ROLES)]
+        action = ACTIONS[i % len(ACTIONS)]
+        lines.extend([
+            f"Story {i + 1}",
+            f"As a {role} I want to {action} number {i} so that I can finish my task {i}",
+            "Acceptance Criteria:",
+            f"Given I am signed in as a {role}.",
+            f"When I {action} number {i}.",
+            f"Then I should see confirmation {i}.",
+            ""
+        ])
+    return "\n".join(lines)
+
+
+def run(sizes, repeat: int):
+    parser = DocumentParser()
+    nlp_registry.warm_up(["sentences"])
+
+    results = []
+    for size in sizes:
+        content = make_backlog(size)
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            parsed = parser.parse_document(content, "User Story")
+            best = min(best, time.perf_counter() - start)
+        assert len(parsed["stories"]) == size
+        results.append({
+            "stories": size,
+            "seconds": round(best, 4),
+            "ms_per_story": round(best * 1000 / size, 4)
+        })
+
+    # Linear scaling keeps the per-story cost of the largest size close to the smallest
+    baseline = results[0]["ms_per_story"]
+    for result in results:
+        result["per_story_ratio"] = round(result["ms_per_story"] / baseline, 2)
+    return results
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 5000])
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+    print(json.dumps(run(args.sizes, args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Compare two benchmark reports from benchmarks.run and flag regressions.
+
+Stage p50 times, end-to-end p50/p99 latency, throughput and peak RSS of the candidate are
+compared with the baseline; the exit status is 1 if any got worse by more than --threshold.
+
+    cd backend
+    python -m benchmarks.compare bench-base.json bench-new.json --threshold 0.15
+"""
+import argparse
+import json
+import sys
+from typing import Any, Dict, List, Tuple
+
+# Stage timings below this are too noisy to compare
+MIN_COMPARABLE_MS = 1.0
+
+
+def stage_metrics(report: Dict[str, Any]) -> Dict[str, float]:
+    metrics = {}
+    for document in report["stages"]["documents"]:
+        key = f"{document['doc_type']}/{document['format']}/{document['size']}"
+        for stage, timing in document["stages"].items():
+            metrics[f"stage {key} {stage} p50_ms"] = timing["p50_ms"]
+    metrics["stage peak_rss_mb"] = report["stages"]["peak_rss_mb"]
+    return metrics
+
+
+def e2e_metrics(report: Dict[str, Any]) -> Dict[str, float]:
+    e2e = report.get("e2e")
+    if not e2e:
+        return {}
+    metrics = {f"e2e {name}": e2e[name] for name in ("p50_ms", "p99_ms", "throughput_rps")}
+    if e2e.get("peak_rss_mb") is not None:
+        metrics["e2e peak_rss_mb"] = e2e["peak_rss_mb"]
+    return metrics
+
+
+def startup_metrics(report: Dict[str, Any]) -> Dict[str, float]:
+    startup = report.get("startup")
+    if not startup:
+        return {}
+    return {f"startup {name}": startup[name] for name in ("import_ms", "first_response_ms", "first_conversion_ms")}
+
+
+def compare(baseline: Dict[str, Any], candidate: Dict[str, Any], threshold: float) -> List[Tuple[str, float, float, float, bool]]:
+    """Return (metric, baseline, candidate, relative change, regressed) for the metrics in both reports"""
+    before = {**stage_metrics(baseline), **e2e_metrics(baseline), **startup_metrics(baseline)}
+    after = {**stage_metrics(candidate), **e2e_metrics(candidate), **startup_metrics(candidate)}
+
+    rows = []
+    for metric in sorted(before.keys() & after.keys()):
+        old, new = before[metric], after[metric]
+        if not old:
+            continue
+        change = (new - old) / old
+        # Throughput regresses when it drops, everything else when it grows
+        worse = -change if metric.endswith("throughput_rps") else change
+        noisy = metric.endswith("_ms") and metric.startswith("stage") and max(old, new) < MIN_COMPARABLE_MS
+        rows.append((metric, old, new, change, worse > threshold and not noisy))
+    return rows
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("baseline")
+    arg_parser.add_argument("candidate")
+    arg_parser.add_argument("--threshold", type=float, default=0.15, help="Relative change that counts as a regression")
+    args = arg_parser.parse_args()
+
+    with open(args.baseline) as baseline_file, open(args.candidate) as candidate_file:
+        baseline, candidate = json.load(baseline_file), json.load(candidate_file)
+
+    rows = compare(baseline, candidate, args.threshold)
+    print(f"{baseline['meta']['commit']} -> {candidate['meta']['commit']}")
+    for metric, old, new, change, regressed in rows:
+        marker = "REGRESSION" if regressed else ""
+        print(f"{metric:60} {old:>12.3f} {new:>12.3f} {change:>+8.1%} {marker}")
+
+    regressions = [row for row in rows if row[4]]
+    if regressions:
+        print(f"{len(regressions)} regression(s) above {args.threshold:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+Synthetic corpus generator for the conversion pipeline benchmarks.
+
+Builds BRD, FRD, User Story and Test Case documents of a configurable size in txt, docx
+and pdf. Module names and feature phrases are seeded from `Fab India.txt`, and the
+requirement/scenario/test case wording from the keywords of DocumentParser's pattern table,
+so the documents exercise the same paths real uploads do. Generation is deterministic for a seed.
+
+    cd backend
+    python -m benchmarks.corpus --out /tmp/corpus --sizes 20000 200000 --formats txt docx pdf
+"""
+import argparse
+import random
+import re
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+SEED_DOCUMENT = Path(__file__).resolve().parents[2] / "Fab India.txt"
+
+DOC_TYPES = ["BRD", "FRD", "User Story", "Test Case"]
+FORMATS = ["txt", "docx", "pdf"]
+
+# Stand-ins used when the seed document is not available
+FALLBACK_MODULES = ["Homepage & Global Navigation", "Search Functionality", "Cart Management", "Checkout Workflow"]
+FALLBACK_PHRASES = ["load the homepage banner", "filter products by category", "apply a coupon code", "pay with a saved card"]
+
+ROLES = ["shopper", "guest user", "store manager", "administrator", "customer"]
+
+
+def load_seeds() -> Tuple[List[str], List[str]]:
+    """Return the module names and the lower-cased feature phrases of the seed document"""
+    if not SEED_DOCUMENT.exists():
+        return FALLBACK_MODULES, FALLBACK_PHRASES
+
+    modules, phrases = [], []
+    for line in SEED_DOCUMENT.read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if re.match(r"^n{1,2}\s+[A-Z]", line):
+            modules.append(line.split(None, 1)[1])
+        elif line.startswith("•") and "–" not in line:
+            phrase = line.lstrip("• ").strip()
+            phrases.append(phrase[0].lower() + phrase[1:])
+    return modules or FALLBACK_MODULES, phrases or FALLBACK_PHRASES
+
+
+def pattern_keywords() -> Dict[str, List[str]]:
+    """Literal lead-ins of the parser's requirement patterns, e.g. "must be able to", "needs to" """
+    from app.services.document_parser import DocumentParser
+
+    keywords = []
+    for pattern in DocumentParser()._load_patterns()["BRD"]["requirements"]:
+        verb = re.match(r"([a-z]+)", pattern).group(1)
+        alternatives = re.search(r"\(\?:([^)]*)\)", pattern)
+        if alternatives:
+            keywords.extend(f"{verb} {option}" for option in alternatives.group(1).split("|"))
+        else:
+            keywords.append(re.sub(r"[^a-z ]", "", pattern.replace(r"\s+", " ").replace("s?", "s")))
+    return {"requirements": keywords}
+
+
+def make_text(doc_type: str, size: int, seed: int = 0) -> str:
+    """Generate a document of the given type with at least size characters"""
+    rng = random.Random(f"{doc_type}:{size}:{seed}")
+    modules, phrases = load_seeds()
+    requirement_keywords = pattern_keywords()["requirements"]
+
+    lines: List[str] = []
+    length = 0
+    module_index = 0
+    while length < size:
+        module = modules[module_index % len(modules)]
+        section = [f"## {module}" if module_index < len(modules) else f"## {module} {module_index // len(modules) + 1}"]
+        for _ in range(8):
+            phrase = rng.choice(phrases)
+            role = rng.choice(ROLES)
+            number = rng.randrange(1000)
+            if doc_type in ("BRD", "FRD"):
+                section.append(f"The system {rng.choice(requirement_keywords)} {phrase} for order {number}.")
+                if doc_type == "FRD" or rng.random() < 0.5:
+                    section.append(f"When the {role} opens {module} then the page should {phrase}.")
+                section.append(f"This supports the {module.lower()} goals for release {number % 12}.")
+            elif doc_type == "User Story":
+                section.extend([
+                    f"As a {role} I want to {phrase} so that I can finish purchase {number}",
+                    "Acceptance Criteria:",
+                    f"Given I am signed in as a {role}.",
+                    f"When I {phrase} on {module}.",
+                    f"Then I should see confirmation {number}.",
+                ])
+            else:
+                section.extend([
+                    f"Test Case ID: TC-{module_index:03d}-{number}",
+                    "Preconditions:",
+                    f"The {role} is signed in",
+                    "Test Steps:",
+                    f"1. Open {module}",
+                    f"2. {phrase[0].upper()}{phrase[1:]}",
+                    f"3. Submit order {number}",
+                    "Expected Results:",
+                    f"Verify the page shows order {number}",
+                ])
+        section.append("")
+        lines.extend(section)
+        length += sum(len(line) + 1 for line in section)
+        module_index += 1
+    return "\n".join(lines)
+
+
+def to_docx(text: str) -> bytes:
+    """Render text as a DOCX file, with "## " lines as Heading 1 paragraphs"""
+    import docx
+
+    document = docx.Document()
+    for line in text.split("\n"):
+        if line.startswith("## "):
+            document.add_heading(line[3:], level=1)
+        else:
+            document.add_paragraph(line)
+    buffer = BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def to_pdf(text: str, lines_per_page: int = 60) -> bytes:
+    """Render text as a minimal single-font PDF with one text line per source line"""
+    lines = text.split("\n")
+    pages = [lines[start:start + lines_per_page] for start in range(0, len(lines), lines_per_page)] or [[]]
+
+    def escape(line: str) -> str:
+        return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>"]
+    kids = " ".join(f"{3 + 2 * index} 0 R" for index in range(len(pages)))
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>".encode())
+    font = 3 + 2 * len(pages)
+    for index, page in enumerate(pages):
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {4 + 2 * index} 0 R "
+            f"/Resources << /Font << /F1 {font} 0 R >> >> >>".encode()
+        )
+        operations = "BT /F1 9 Tf 40 760 Td 12 TL " + " ".join(f"({escape(line)}) '" for line in page) + " ET"
+        stream = operations.encode("cp1252", errors="replace")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+
+    output = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    output += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    output += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return output
+
+
+def make_document(doc_type: str, size: int, file_format: str, seed: int = 0) -> Tuple[str, bytes]:
+    """Return (filename, content) of a synthetic document"""
+    text = make_text(doc_type, size, seed)
+    slug = doc_type.lower().replace(" ", "_")
+    filename = f"{slug}_{size}_{seed}.{file_format}"
+    if file_format == "txt":
+        return filename, text.encode("utf-8")
+    elif file_format == "docx":
+        return filename, to_docx(text)
+    elif file_format == "pdf":
+        return filename, to_pdf(text)
+    raise ValueError(f"Unsupported format: {file_format}")
+
+
+def make_corpus(doc_types: List[str], sizes: List[int], formats: List[str], seed: int = 0) -> List[Dict]:
+    """Generate every combination as {"doc_type", "size", "format", "filename", "content"}"""
+    corpus = []
+    for doc_type in doc_types:
+        for size in sizes:
+            for file_format in formats:
+                filename, content = make_document(doc_type, size, file_format, seed)
+                corpus.append({
+                    "doc_type": doc_type,
+                    "size": size,
+                    "format": file_format,
+                    "filename": filename,
+                    "content": content
+                })
+    return corpus
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--out", required=True, help="Directory to write the documents to")
+    arg_parser.add_argument("--types", nargs="+", default=DOC_TYPES, choices=DOC_TYPES)
+    arg_parser.add_argument("--sizes", type=int, nargs="+", default=[20_000, 200_000], help="Approximate characters per document")
+    arg_parser.add_argument("--formats", nargs="+", default=FORMATS, choices=FORMATS)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args()
+
+    out = Path(args.out)
+    out.mkdir(parents=True, exist_ok=True)
+    for document in make_corpus(args.types, args.sizes, args.formats, args.seed):
+        (out / document["filename"]).write_bytes(document["content"])
+        print(out / document["filename"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Full benchmark suite: per-stage timings, the end-to-end load test and cold start times,
+written as one JSON report tagged with the git commit so runs can be compared with benchmarks.compare.
+
+    cd backend
+    python -m benchmarks.run --out bench-$(git rev-parse --short HEAD).json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from benchmarks import bench_e2e, bench_stages, bench_startup
+from benchmarks.corpus import DOC_TYPES, FORMATS
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--out", help="File to write the JSON report to (default: stdout)")
+    arg_parser.add_argument("--types", nargs="+", default=DOC_TYPES, choices=DOC_TYPES)
+    arg_parser.add_argument("--sizes", type=int, nargs="+", default=[20_000, 200_000])
+    arg_parser.add_argument("--formats", nargs="+", default=FORMATS, choices=FORMATS)
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    arg_parser.add_argument("--requests", type=int, default=100)
+    arg_parser.add_argument("--concurrency", type=int, default=8)
+    arg_parser.add_argument("--e2e-sizes", type=int, nargs="+", default=[20_000])
+    arg_parser.add_argument("--skip-e2e", action="store_true")
+    arg_parser.add_argument("--startup-runs", type=int, default=3)
+    arg_parser.add_argument("--skip-startup", action="store_true")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args()
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": vars(args)
+        },
+        "stages": bench_stages.run(args.types, args.sizes, args.formats, args.repeat, args.seed)
+    }
+    if not args.skip_e2e:
+        report["e2e"] = bench_e2e.run(
+            args.types, args.e2e_sizes, args.formats, args.requests, args.concurrency, seed=args.seed
+        )
+    if not args.skip_startup:
+        report["startup"] = bench_startup.run(args.startup_runs)
+
+    output = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as out:
+            out.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
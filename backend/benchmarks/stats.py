@@ -0,0 +1,68 @@
+"""Shared measurement helpers for the benchmark scripts"""
+import os
+import resource
+import sys
+from typing import Dict, List, Optional
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile, e.g. fraction=0.99 for p99"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(int(round(fraction * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def summarize_ms(seconds: List[float]) -> Dict[str, float]:
+    """p50/p99/min/max of a list of durations, in milliseconds"""
+    milliseconds = [value * 1000 for value in seconds]
+    return {
+        "p50_ms": round(percentile(milliseconds, 0.5), 3),
+        "p99_ms": round(percentile(milliseconds, 0.99), 3),
+        "min_ms": round(min(milliseconds), 3) if milliseconds else 0.0,
+        "max_ms": round(max(milliseconds), 3) if milliseconds else 0.0
+    }
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def process_tree_rss_mb(root_pid: int) -> Optional[float]:
+    """Current resident set size of a process and all its descendants; None where /proc is unavailable"""
+    if not os.path.isdir("/proc"):
+        return None
+
+    parents: Dict[int, int] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as stat:
+                # The command name may contain spaces, so fields are counted after its closing parenthesis
+                parents[int(entry)] = int(stat.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+
+    tree = {root_pid}
+    grew = True
+    while grew:
+        children = {pid for pid, parent in parents.items() if parent in tree} - tree
+        tree |= children
+        grew = bool(children)
+
+    total_kb = 0
+    for pid in tree:
+        try:
+            with open(f"/proc/{pid}/status") as status:
+                for line in status:
+                    if line.startswith("VmRSS:"):
+                        total_kb += int(line.split()[1])
+                        break
+        except OSError:
+            continue
+    return round(total_kb / 1024, 1)
@@ -0,0 +1,28 @@
+import pytest
+from app.api.endpoints import conversion
+from app.core.config import Settings
+from app.services.executor import StageExecutor
+from app.services.nlp_registry import nlp_registry
+from app.services.scheduler import StageScheduler
+
+
+@pytest.fixture(scope="session")
+def sentence_model():
+    """The sentence pipeline of BDD_SPACY_MODEL; tests that run NLP are skipped without the model"""
+    try:
+        return nlp_registry.get("sentences")
+    except RuntimeError as e:
+        pytest.skip(str(e))
+
+
+@pytest.fixture
+def threaded_executor(monkeypatch):
+    """The stage executor and scheduler as the default settings configure them for BDD_EXECUTOR_WORKERS=0"""
+    for name in ("BDD_EXECUTOR_QUEUE_SIZE", "BDD_INTERACTIVE_CONCURRENCY", "BDD_BULK_CONCURRENCY"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("BDD_EXECUTOR_WORKERS", "0")
+    config = Settings()
+    scheduler = StageScheduler(config.executor_workers, config.lane_concurrency, config.executor_queue_size, {})
+    executor = StageExecutor(0, config.executor_retry_after, {}, scheduler, config.executor_inline_max_bytes)
+    monkeypatch.setattr(conversion, "stage_executor", executor)
+    return executor
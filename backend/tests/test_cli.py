@@ -0,0 +1,101 @@
+import json
+import pytest
+from app import cli
+
+
+@pytest.fixture
+def conversions(monkeypatch):
+    """Documents converted by a stand-in for the NLP pipeline; a document saying "broken" fails"""
+    converted = []
+
+    def convert_document(path, doc_type, outlines):
+        converted.append(path)
+        text = open(path, encoding="utf-8").read().strip()
+        if "broken" in text:
+            raise ValueError("unreadable document")
+        return {"doc_type": "BRD", "feature_content": f"Feature: Doc\n\n  Scenario: Step\n    Given {text}\n"}
+
+    monkeypatch.setattr(cli, "convert_document", convert_document)
+    return converted
+
+
+def run(source, out, logs=None):
+    def log(message, file=None):
+        if logs is not None:
+            logs.append(message)
+    return cli.build(source, out, doc_type="BRD", steps="python", workers=0, log=log)
+
+
+def manifest(out):
+    return json.loads((out / cli.MANIFEST_NAME).read_text())
+
+
+def test_unchanged_documents_are_not_converted_again(tmp_path, conversions):
+    source, out = tmp_path / "docs", tmp_path / "features"
+    source.mkdir()
+    (source / "a.txt").write_text("the user logs in")
+    (source / "b.txt").write_text("the user logs out")
+    assert run(source, out)["converted"] == 2
+
+    logs = []
+    summary = run(source, out, logs)
+    assert (summary["converted"], summary["unchanged"], summary["failed"]) == (0, 2, 0)
+    assert len(conversions) == 2
+    assert not any(line.startswith("wrote") for line in logs)
+
+    (source / "b.txt").unlink()
+    summary = run(source, out)
+    assert summary["removed"] == 1 and not (out / "b.feature").exists()
+    assert list(manifest(out)["documents"]) == ["a.txt"]
+
+
+def test_failing_documents_are_recorded_and_not_retried_until_they_change(tmp_path, conversions):
+    source, out = tmp_path / "docs", tmp_path / "features"
+    source.mkdir()
+    (source / "a.txt").write_text("the user logs in")
+    (source / "bad.txt").write_text("broken")
+    summary = run(source, out)
+    assert (summary["converted"], summary["failed"]) == (1, 1)
+    entry = manifest(out)["documents"]["bad.txt"]
+    assert entry["error"] == "unreadable document" and entry["sha256"] == cli.file_sha256(source / "bad.txt")
+
+    logs = []
+    summary = run(source, out, logs)
+    assert (summary["converted"], summary["unchanged"], summary["failed"]) == (0, 1, 1)
+    assert summary["failures"] == [{"document": "bad.txt", "error": "unreadable document"}]
+    assert len(conversions) == 2
+    assert not any(line.startswith("wrote") for line in logs)
+    assert cli.main([str(source), "--out", str(out), "--doc-type", "BRD", "--steps", "python", "--workers", "0"]) == 1
+
+    (source / "bad.txt").write_text("the admin approves")
+    summary = run(source, out)
+    assert (summary["converted"], summary["failed"]) == (1, 0)
+    assert "error" not in manifest(out)["documents"]["bad.txt"]
+
+
+def test_a_document_that_starts_failing_loses_its_feature(tmp_path, conversions):
+    source, out = tmp_path / "docs", tmp_path / "features"
+    source.mkdir()
+    (source / "a.txt").write_text("the user logs in")
+    run(source, out)
+    assert (out / "a.feature").exists()
+
+    (source / "a.txt").write_text("broken now")
+    summary = run(source, out)
+    assert (summary["converted"], summary["removed"], summary["failed"]) == (0, 1, 1)
+    assert not (out / "a.feature").exists()
+    assert "logs in" not in (out / "steps" / "generated_steps.py").read_text()
+
+
+def test_unreadable_features_are_step_failures_not_conversion_failures(tmp_path, conversions):
+    source, out = tmp_path / "docs", tmp_path / "features"
+    source.mkdir()
+    (source / "a.txt").write_text("the user logs in")
+    (source / "b.txt").write_text("the user logs out")
+    run(source, out)
+
+    (out / "a.feature").write_text("Scenario: no feature line\n")
+    (source / "b.txt").write_text("the user signs out")
+    summary = run(source, out)
+    assert (summary["converted"], summary["failed"]) == (1, 0)
+    assert [failure["document"] for failure in summary["step_failures"]] == ["a.txt"]
@@ -0,0 +1,151 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from app.api.endpoints import conversion
+from app.core.config import settings
+from app.main import app
+from app.services import pipeline
+from app.services.document_cache import CachedDocument
+
+TEST_CASE = ["Given a registered user", "When the user signs in", "Then the dashboard is shown"]
+
+
+def text_pdf(pages) -> bytes:
+    """A PDF whose pages hold the given lines of text"""
+    font = 3 + 2 * len(pages)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % (3 + 2 * i) for i in range(len(pages))), len(pages)),
+    ]
+    for number, lines in enumerate(pages):
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents %d 0 R "
+            b"/Resources << /Font << /F1 %d 0 R >> >> >>" % (4 + 2 * number, font)
+        )
+        content = b"BT /F1 10 Tf 50 750 Td 12 TL " + b" ".join(b"(%s) '" % line.encode() for line in lines) + b" ET"
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(content), content))
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    pdf, offsets = b"%PDF-1.4\n", []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    pdf += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    return pdf + b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+
+
+def test_pdf_converts_without_a_process_pool(threaded_executor):
+    client = TestClient(app)
+    pdf = text_pdf([TEST_CASE[:2], TEST_CASE[2:]])
+    for pages in (None, "1-2"):
+        response = client.post(
+            "/api/convert-to-feature",
+            files={"file": ("login.pdf", pdf, "application/pdf")},
+            data={"doc_type": "Test Case", **({"pages": pages} if pages else {})},
+        )
+        assert response.status_code == 200, response.text
+        assert "Then the dashboard is shown" in response.json()["feature_content"]
+
+
+class FakeUpload:
+    """A spooled upload that only records being closed"""
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def batch(monkeypatch):
+    """convert_batch with extraction, parsing and rendering replaced by stubs that track what runs"""
+    state = {"active": 0, "peak": 0, "started": [], "cancelled": [], "delay": 0.01, "failures": {}}
+
+    async def load_content(upload, pages=None, max_pages=None):
+        state["started"].append(upload.filename)
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        try:
+            await asyncio.sleep(state["delay"] if not upload.filename.startswith("slow") else 10)
+        except asyncio.CancelledError:
+            state["cancelled"].append(upload.filename)
+            raise
+        finally:
+            state["active"] -= 1
+        if upload.filename in state["failures"]:
+            raise state["failures"][upload.filename]
+        return CachedDocument(document_id=upload.filename, filename=upload.filename, file_format="txt", text=upload.filename)
+
+    async def run_stage(stage, fn, *args, size=None):
+        texts = args[0] if fn is pipeline.parse_documents else [args[0]]
+        if "unparsable.txt" in texts:
+            raise ValueError("unparsable")
+        parsed = [{"text": text} for text in texts]
+        return parsed if fn is pipeline.parse_documents else parsed[0]
+
+    monkeypatch.setattr(conversion, "load_content", load_content)
+    monkeypatch.setattr(conversion, "run_stage", run_stage)
+    monkeypatch.setattr(conversion, "generate_feature", lambda entry, doc_type, parsed, outlines=False: f"Feature: {parsed['text']}")
+    return state
+
+
+def items(*filenames):
+    return [{"filename": filename, "upload": FakeUpload(filename)} for filename in filenames]
+
+
+async def collect(items):
+    return [record async for record in conversion.convert_batch(items, "Test Case")]
+
+
+def test_batch_extraction_is_bounded_by_the_batch_concurrency(batch, monkeypatch):
+    monkeypatch.setattr(settings, "batch_concurrency", 2)
+    files = items(*(f"{n}.txt" for n in range(6)))
+    records = asyncio.run(collect(files))
+    assert batch["peak"] == 2
+    assert sorted(record["index"] for record in records) == list(range(6))
+    assert all(record["status"] == "success" for record in records)
+    assert all(item["upload"].closed for item in files)
+
+
+def test_batch_failures_are_reported_per_file(batch, monkeypatch):
+    monkeypatch.setattr(settings, "batch_concurrency", 4)
+    batch["failures"] = {
+        "huge.pdf": HTTPException(status_code=413, detail="too large"),
+        "broken.docx": ValueError("not a zip file"),
+    }
+    records = asyncio.run(collect(items("a.txt", "huge.pdf", "unparsable.txt", "broken.docx", "b.txt")))
+    by_name = {record["filename"]: record for record in records}
+    assert len(records) == 5
+    assert by_name["a.txt"]["feature_content"] == "Feature: a.txt"
+    assert by_name["b.txt"]["feature_content"] == "Feature: b.txt"
+    assert (by_name["huge.pdf"]["status_code"], by_name["huge.pdf"]["detail"]) == (413, "too large")
+    assert (by_name["broken.docx"]["status_code"], by_name["broken.docx"]["detail"]) == (500, "not a zip file")
+    # A document that breaks its parse batch fails alone
+    assert (by_name["unparsable.txt"]["status_code"], by_name["unparsable.txt"]["detail"]) == (500, "unparsable")
+    assert [record["index"] for record in records if record["filename"] == "huge.pdf"] == [1]
+
+
+def test_disconnecting_cancels_pending_work(batch, monkeypatch):
+    monkeypatch.setattr(settings, "batch_concurrency", 2)
+    files = items("slow1.txt", "slow2.txt", "slow3.txt", "slow4.txt")
+
+    async def scenario():
+        stream = conversion.convert_batch(files, "Test Case")
+        waiting = asyncio.create_task(stream.__anext__())
+        await asyncio.sleep(0.05)
+        # The client goes away, so the server cancels the task streaming its response
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        await asyncio.sleep(0.05)
+        # Extractions in flight are cancelled and queued ones never start
+        assert sorted(batch["cancelled"]) == ["slow1.txt", "slow2.txt"] and batch["active"] == 0
+        assert batch["started"] == ["slow1.txt", "slow2.txt"]
+        assert all(item["upload"].closed for item in files)
+
+    asyncio.run(scenario())
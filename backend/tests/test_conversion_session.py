@@ -0,0 +1,71 @@
+import pytest
+from app.services import pipeline
+from app.services.conversion_session import ConversionSession, SessionStore
+
+STORIES = [
+    "As a shopper I want to search products so that I can find gifts.\nAcceptance criteria: results load fast.",
+    "As an admin I want to ban users so that the forum stays civil.",
+    "As a guest I want to browse the catalogue so that I can decide to register.",
+]
+
+
+def apply_patch(feature, patch):
+    for edit in reversed(patch):
+        feature = feature[:edit["offset"]] + edit["insert"] + feature[edit["offset"] + edit["delete"]:]
+    return feature
+
+
+def update(session, text):
+    """What PUT /sessions/{id} does, without the executor"""
+    fingerprints, missing = session.plan(pipeline.segment_sections(text, session.doc_type))
+    parsed = dict(zip(missing, pipeline.parse_documents(list(missing.values()), session.doc_type, None, None)))
+    return session.apply(fingerprints, parsed), len(missing)
+
+
+def new_session(doc_type="User Story"):
+    return ConversionSession("s", doc_type, "Shop", pipeline.gherkin_generator)
+
+
+@pytest.mark.usefixtures("sentence_model")
+def test_patches_reproduce_the_feature_of_every_revision():
+    revisions = [
+        "\n\n".join(STORIES),
+        "\n\n".join([STORIES[0], STORIES[2]]),  # a story removed
+        "\n\n".join([STORIES[0], STORIES[2], STORIES[1]]),  # added back at the end
+        "\n\n".join([STORIES[0].replace("gifts", "presents"), STORIES[2], STORIES[1]]),  # one edited
+        "",
+    ]
+    session = new_session()
+    feature = ""
+    for version, text in enumerate(revisions, 1):
+        patch, _ = update(session, text)
+        feature = apply_patch(feature, patch)
+        assert feature == session.feature_content
+        assert session.version == version
+
+        fresh = new_session()
+        update(fresh, text)
+        assert feature == fresh.feature_content
+
+
+@pytest.mark.usefixtures("sentence_model")
+def test_only_changed_sections_are_parsed_again():
+    session = new_session()
+    _, parsed = update(session, "\n\n".join(STORIES))
+    assert parsed == 3
+    patch, parsed = update(session, "\n\n".join([STORIES[0], STORIES[1].replace("ban", "mute"), STORIES[2]]))
+    assert parsed == 1
+    assert len(patch) == 1 and "mute" in patch[0]["insert"]
+    _, parsed = update(session, "\n\n".join(STORIES))
+    assert parsed == 1  # the original story left the session with its revision
+
+
+def test_store_evicts_the_least_recently_used_session():
+    store = SessionStore(max_sessions=2, ttl=60)
+    first = store.create("BRD", "a", pipeline.gherkin_generator)
+    second = store.create("BRD", "b", pipeline.gherkin_generator)
+    assert store.get(first.session_id) is first
+    store.create("BRD", "c", pipeline.gherkin_generator)
+    assert store.get(second.session_id) is None
+    assert store.get(first.session_id) is first
+    assert store.remove(first.session_id) and store.get(first.session_id) is None
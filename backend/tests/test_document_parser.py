@@ -0,0 +1,40 @@
+import pytest
+from app.services.document_ir import Criterion
+from app.services.document_parser import DocumentParser
+
+
+@pytest.fixture(scope="module")
+def parser():
+    return DocumentParser(pattern_packs=[], duplicate_threshold=0)
+
+
+def test_criteria_are_classified_by_their_first_word(parser):
+    criteria = parser._classify_criteria([
+        "Given a registered user",
+        "When they log in",
+        "Then the dashboard is shown",
+        "The system must verify the password"
+    ])
+    assert [criterion.type for criterion in criteria] == ["given", "when", "then", "verification"]
+
+
+def test_criteria_keywords_match_inside_words(parser):
+    # Substring matching, as before the keywords were compiled: "unchecked" and "whenever" count
+    criteria = parser._classify_criteria(["Items stay unchecked", "Whenever a row is added", "Nothing to see"])
+    assert criteria == [Criterion("verification", "Items stay unchecked"), Criterion("when", "Whenever a row is added")]
+
+
+@pytest.mark.parametrize("pages", [
+    ["First paragraph.\n\nSecond", " paragraph continues.\n", "\nThird after a break across pages."],
+    ["One page only, no breaks"],
+    ["Ends in a blank line \n \n", "", "  \t", "Last."],
+    [],
+])
+def test_page_sections_equal_sections_of_the_joined_text(parser, pages):
+    text = "".join(f"{page}\n" for page in pages)
+    assert list(parser.iter_page_sections(pages, "BRD")) == parser.segment_sections(text, "BRD")
+
+
+def test_page_sections_need_a_requirements_document(parser):
+    with pytest.raises(ValueError):
+        list(parser.iter_page_sections(["As a user I want to log in so that I can shop"], "User Story"))
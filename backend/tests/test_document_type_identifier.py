@@ -0,0 +1,35 @@
+from app.services.document_type_identifier import DocumentTypeIdentifier
+
+identifier = DocumentTypeIdentifier()
+
+
+def test_scores_follow_pattern_matches_and_structure():
+    scores = identifier.identify_document_type(
+        "Business Requirements Document\nScope and limitations\nThe objective is to cut costs."
+    )
+    # Two of five BRD patterns, plus the scope/objective bonus
+    assert scores["BRD"] == 2 / 5 + 0.2
+    assert identifier.get_document_type("", scores) == "BRD"
+
+
+def test_gherkin_lines_add_no_user_story_bonus():
+    # The scoring that predates sampling compared lowercased sentences with "Given"/"When"/"Then",
+    # so Gherkin lines never earned a bonus; scores must stay the same for existing documents
+    scores = identifier.identify_document_type("Given a cart\nWhen I pay\nThen I get a receipt")
+    assert scores["User Story"] == 0.0
+
+
+def test_numbered_lines_count_towards_test_cases():
+    scores = identifier.identify_document_type("Test case: login\n1. Open the page\n2. Sign in")
+    assert scores["Test Case"] == 1 / 6 + 0.2
+    assert identifier.get_document_type("", scores) == "Test Case"
+    assert identifier.get_document_type("Nothing to classify here") is None
+
+
+def test_large_documents_are_classified_from_a_sample():
+    content = "As a user I want to export data so that I can share it.\n" * 2000
+    result = identifier.classify(content, max_chars=4096)
+    assert result["sampled"] is True
+    assert result["suggested_type"] == "User Story"
+    assert result["sample_sufficient"] is True
+    assert identifier.classify(content)["sampled"] is False
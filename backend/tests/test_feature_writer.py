@@ -0,0 +1,116 @@
+from io import BytesIO
+import pytest
+from fastapi.testclient import TestClient
+from benchmarks.corpus import make_document
+from app.main import app
+from app.services import pipeline
+from app.services.document_ir import Criterion, Requirement, Story, TestCaseStep, parsed_from_records
+from app.services.gherkin_generator import FeatureWriter, GherkinGenerator
+
+generator = GherkinGenerator()
+
+RECORDS = {
+    "BRD": [
+        Requirement("requirements", "The system shall export 5 reports."),
+        Requirement("scenarios", "When the user pays 10 euros then a receipt is sent."),
+        Requirement("requirements", "The admin must approve every order."),
+        Requirement("requirements", "The system shall export 12 reports."),
+        Requirement("scenarios", "When the user pays 25 euros then a receipt is sent."),
+        Requirement("scenarios", "If the card is declined then the order is held."),
+    ],
+    "User Story": [
+        Story("customer", "order 5 items", "get a discount", (Criterion("given", "a basket"),)),
+        Story("customer", "order 12 items", "get a discount"),
+        Story("admin", "close the shop", "stop new orders"),
+    ],
+    "Test Case": [
+        TestCaseStep("preconditions", "the user is registered"),
+        TestCaseStep("steps", "open the login page"),
+        TestCaseStep("expected_results", "the dashboard is shown"),
+        TestCaseStep("steps", "enter the password"),
+    ],
+}
+
+
+def streamed(records, doc_type, outlines, batch):
+    """The feature file FeatureWriter renders from records arriving batch by batch"""
+    writer = FeatureWriter(generator, "Shop", doc_type, outlines)
+    parts = ["".join(writer.header())]
+    for start in range(0, len(records), batch):
+        parts.append("".join(writer.write(records[start:start + batch])))
+    parts.append("".join(writer.close()))
+    return "".join(parts)
+
+
+@pytest.mark.parametrize("doc_type", list(RECORDS))
+@pytest.mark.parametrize("outlines", [False, True])
+@pytest.mark.parametrize("batch", [1, 2, 100])
+def test_writer_matches_generate_feature(doc_type, outlines, batch):
+    records = RECORDS[doc_type]
+    whole = generator.generate_feature(parsed_from_records(records, doc_type), "Shop", doc_type, outlines)
+    assert streamed(records, doc_type, outlines, batch) == whole
+
+
+def test_outlines_are_folded_per_group():
+    feature = streamed(RECORDS["BRD"], "BRD", outlines=True, batch=1)
+    assert feature.count("Scenario Outline:") == 2
+    assert "Then The system shall export <number> reports" in feature
+    assert "When the user pays <number> euros" in feature
+
+
+def docx_test_case(rows) -> bytes:
+    docx = pytest.importorskip("docx")
+    document = docx.Document()
+    document.add_paragraph("Test case: Login")
+    document.add_paragraph("Preconditions: the user is registered")
+    grid = document.add_table(rows=len(rows), cols=len(rows[0]))
+    for row, values in zip(grid.rows, rows):
+        for cell, value in zip(row.cells, values):
+            cell.text = value
+    document.add_paragraph("Expected Result: the session is recorded")
+    stream = BytesIO()
+    document.save(stream)
+    return stream.getvalue()
+
+
+@pytest.mark.parametrize("outlines", ["false", "true"])
+def test_streamed_test_case_tables_match_the_parsed_feature(threaded_executor, outlines):
+    content = docx_test_case([
+        ["ID", "Test Steps", "Expected Result"],
+        ["1", f"Open the login page ({outlines})\nEnter the password", "The form is shown"],
+        ["2", "Press submit", "The dashboard is shown"],
+    ])
+    client = TestClient(app)
+
+    def convert(stream):
+        return client.post(
+            f"/api/convert-to-feature?stream={stream}",
+            files={"file": ("login.docx", content, "application/vnd.openxmlformats-officedocument.wordprocessingml.document")},
+            data={"doc_type": "Test Case", "outlines": outlines},
+        )
+
+    # Streamed first, so the document is parsed in chunks rather than rendered from the cached parse
+    streamed_response, parsed_response = convert("true"), convert("false")
+    assert streamed_response.status_code == parsed_response.status_code == 200
+    feature = parsed_response.json()["feature_content"]
+    assert streamed_response.text == feature
+    assert "When Open the login page" in feature and "Then The dashboard is shown" in feature
+
+
+@pytest.mark.parametrize("doc_type", ["BRD", "FRD", "User Story"])
+@pytest.mark.parametrize("outlines", [False, True])
+def test_streamed_documents_match_the_parsed_feature(sentence_model, doc_type, outlines):
+    name, content = make_document(doc_type, 6000, "docx")
+    text, tables, _ = pipeline.extract_document(content, name)
+    whole = generator.generate_feature(pipeline.parse_document(text, doc_type, None, tables), "Doc", doc_type, outlines)
+
+    # As conversion.stream_feature parses them: sections in chunks, near-duplicates filtered across chunks
+    sections = pipeline.segment_sections(text, doc_type, 500)
+    deduplicate = pipeline.document_parser.duplicate_filter()
+    writer = FeatureWriter(generator, "Doc", doc_type, outlines)
+    parts = ["".join(writer.header())]
+    for start in range(0, len(sections), 3):
+        parts.append("".join(writer.write(deduplicate(pipeline.parse_records(sections[start:start + 3], doc_type)))))
+    parts.append("".join(writer.close()))
+    assert len(sections) > 3
+    assert "".join(parts) == whole
@@ -0,0 +1,86 @@
+import pytest
+from app.services.gherkin_parser import DataTable, DocString, FeatureCache, GherkinSyntaxError, expand_steps, parse_feature
+
+FEATURE = '''# language: en
+@checkout
+Feature: Checkout
+  Customers pay for their basket.
+
+  Background:
+    Given a customer with a basket
+
+  Scenario Outline: Pay <amount>
+    When they pay <amount> euros
+    Then the receipt reads
+      """json
+      {"paid": <amount>}
+      """
+
+    Examples:
+      | amount |
+      | 10     |
+      | 25     |
+
+  Rule: Refunds
+    Scenario: Refund
+      * the customer asks for a refund
+      And the order is
+        | id | total |
+        | 7  | 10    |
+'''
+
+
+def test_feature_is_parsed():
+    feature = parse_feature(FEATURE)
+    assert (feature.name, feature.tags, feature.language) == ("Checkout", ("@checkout",), "en")
+    assert feature.description == "Customers pay for their basket."
+    outline = feature.scenarios[0]
+    assert outline.keyword == "Scenario Outline"
+    assert outline.steps[1].argument == DocString('{"paid": <amount>}', "json")
+    assert outline.examples[0].rows == (("10",), ("25",))
+    refund = feature.rules[0].scenarios[0]
+    assert [step.step_type for step in refund.steps] == ["given", "given"]
+    assert refund.steps[1].argument == DataTable((("id", "total"), ("7", "10")))
+
+
+def test_outline_rows_are_expanded():
+    texts = [step.text for step in expand_steps(parse_feature(FEATURE))]
+    assert texts[:3] == ["a customer with a basket", "they pay 10 euros", "the receipt reads"]
+    assert "they pay 25 euros" in texts
+    assert texts[-2:] == ["the customer asks for a refund", "the order is"]
+
+
+@pytest.mark.parametrize("content, line, message", [
+    ("", 1, "no Feature line found"),
+    ("Scenario: Orphan\n  Given a step\n", 1, "expected a Feature line"),
+    ("Feature: A\nFeature: B\n", 2, "only one Feature is allowed"),
+    ("Feature: A\n# language: en\n", 2, "# language must come before"),
+    ("# language: xx\nFeature: A\n", None, "Unsupported Gherkin language: xx"),
+    ("Feature: A\n  Given a step\n", 2, "steps must belong to a Scenario or Background"),
+    ("Feature: A\n  Scenario: S\n    Given a\n  Background:\n    Given b\n", 4, "Background must come before"),
+    ("Feature: A\n  Background:\n    Given a\n  Examples:\n", 4, "Examples must belong to a Scenario Outline"),
+    ("Feature: A\n  Scenario Outline: S\n    Given <x>\n  Examples:\n    | x |\n    Then y\n", 6, "steps cannot follow Examples"),
+    ("Feature: A\n  Scenario: S\n    Given a\n    | a | b |\n    | c |\n", 5, "table row has 1 cells, expected 2"),
+    ("Feature: A\n  Scenario: S\n    Given a\n    | a | b\n", 4, "table row must end with '|'"),
+    ("Feature: A\n  Scenario: S\n    | a |\n", 3, "a table must follow a step or Examples"),
+    ('Feature: A\n  Scenario: S\n    """\n    text\n    """\n', 3, "a doc string must follow a step"),
+    ('Feature: A\n  Scenario: S\n    Given a\n    """\n    text\n', 4, "unterminated doc string"),
+    ("Feature: A\n  Scenario: S\n    Given a\n    stray text\n", 4, "unexpected text 'stray text'"),
+    ("Feature: A\n  Scenario: S\n    Given a\n@dangling\n", 1, "tags must precede"),
+])
+def test_syntax_errors_name_the_line(content, line, message):
+    with pytest.raises(ValueError) as error:
+        parse_feature(content)
+    assert message in str(error.value)
+    if line is not None:
+        assert isinstance(error.value, GherkinSyntaxError) and error.value.line == line
+
+
+def test_cache_returns_the_parsed_feature():
+    cache = FeatureCache(max_entries=1)
+    feature, cached = cache.parse(FEATURE)
+    assert not cached and cache.parse(FEATURE) == (feature, True)
+    cache.parse("Feature: Other\n")
+    assert cache.parse(FEATURE)[1] is False
+    with pytest.raises(GherkinSyntaxError):
+        cache.parse("Scenario: no feature\n")
@@ -0,0 +1,123 @@
+import gzip
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.testclient import TestClient
+from app.core import http_cache
+from app.core.http_cache import CompressionMiddleware, entity_tag, matching_etag, negotiate_coding, not_modified
+
+ETAG = entity_tag("ab" * 32)
+
+
+@pytest.fixture
+def without_brotli(monkeypatch):
+    monkeypatch.setattr(http_cache, "_brotli", lambda: None)
+
+
+def test_entity_tag_is_strong_and_short():
+    assert ETAG == '"' + "ab" * 16 + '"'
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, None),
+    ("", None),
+    (ETAG, ETAG),
+    (f"W/{ETAG}", ETAG),
+    (f'"other", {ETAG[:-1]}-gzip"', f'{ETAG[:-1]}-gzip"'),
+    (f'W/{ETAG[:-1]}-br"', f'{ETAG[:-1]}-br"'),
+    ("*", ETAG),
+    ('"other"', None),
+    (f'{ETAG[:-1]}-deflate"', None),
+])
+def test_matching_etag(header, expected):
+    assert matching_etag(header, ETAG) == expected
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    ("", None),
+    ("identity", None),
+    ("gzip", "gzip"),
+    ("GZIP;q=0.5, deflate", "gzip"),
+    ("gzip;q=0", None),
+    ("*", "gzip"),
+    ("*;q=0.2, gzip;q=0", None),
+    ("gzip;q=abc", None),
+    ("br", None),
+])
+def test_negotiate_coding_without_brotli(without_brotli, accept_encoding, expected):
+    assert negotiate_coding(accept_encoding) == expected
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    ("gzip, br", "br"),
+    ("br;q=0.5, gzip", "gzip"),
+    ("*", "br"),
+])
+def test_negotiate_coding_prefers_br_on_a_tie(monkeypatch, accept_encoding, expected):
+    monkeypatch.setattr(http_cache, "_brotli", lambda: object())
+    assert negotiate_coding(accept_encoding) == expected
+
+
+@pytest.fixture
+def client(without_brotli):
+    app = FastAPI()
+    body = {"feature": "Given a step " * 200}
+
+    @app.get("/large")
+    def large():
+        return JSONResponse(body, headers={"ETag": ETAG})
+
+    @app.get("/cached")
+    def cached():
+        return not_modified(ETAG)
+
+    @app.get("/small")
+    def small():
+        return {"ok": True}
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse(iter(["Feature: A\n", "  Scenario: B\n"]), media_type="text/plain")
+
+    @app.get("/events")
+    def events():
+        return StreamingResponse(iter(["data: 1\n\n"] * 50), media_type="text/event-stream")
+
+    app.add_middleware(CompressionMiddleware, min_bytes=1024)
+    return TestClient(app)
+
+
+def raw(response):
+    return b"".join(response.iter_raw())
+
+
+def test_large_responses_are_gzipped_with_a_coding_specific_etag(client):
+    with client.stream("GET", "/large", headers={"Accept-Encoding": "gzip"}) as response:
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["etag"] == f'{ETAG[:-1]}-gzip"'
+        assert "accept-encoding" in response.headers["vary"].lower()
+        assert gzip.decompress(raw(response)).startswith(b'{"feature":"Given a step')
+    assert matching_etag(f'{ETAG[:-1]}-gzip"', ETAG)
+
+
+def test_small_and_unaccepted_responses_are_sent_as_is(client):
+    response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert "accept-encoding" in response.headers["vary"].lower()
+    response = client.get("/large", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers and response.headers["etag"] == ETAG
+
+
+def test_streams_are_compressed_but_event_streams_are_not(client):
+    with client.stream("GET", "/stream", headers={"Accept-Encoding": "gzip"}) as response:
+        assert response.headers["content-encoding"] == "gzip"
+        assert gzip.decompress(raw(response)) == b"Feature: A\n  Scenario: B\n"
+    response = client.get("/events", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+
+
+def test_not_modified_responses_are_not_compressed(client):
+    response = client.get("/cached", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 304 and response.content == b""
+    assert response.headers["etag"] == ETAG and response.headers["vary"] == "Accept-Encoding"
+    assert "content-encoding" not in response.headers
@@ -0,0 +1,112 @@
+import asyncio
+import pytest
+from app.services.job_runner import JobQueueFullError, JobRunner
+from app.services.job_store import ABANDONED_ERROR, JobStore
+
+
+def test_unfinished_jobs_do_not_expire():
+    store = JobStore("sqlite://", ttl=-1, stale_after=3600)
+    job = store.create("spec.txt", "BRD")
+    assert store.purge_expired() == 0
+    assert store.get(job["job_id"])["status"] == "queued"
+
+    store.update(job["job_id"], status="running")
+    assert store.get(job["job_id"])["status"] == "running"
+
+    store.update(job["job_id"], status="succeeded", result={"feature_content": "Feature: x"})
+    assert store.get(job["job_id"]) is None
+    assert store.purge_expired() == 1
+
+
+def test_jobs_left_behind_by_a_crash_fail(tmp_path):
+    url = f"sqlite:///{tmp_path / 'jobs.db'}"
+    crashed = JobStore(url, ttl=3600, stale_after=3600)
+    job = crashed.create("spec.txt", "BRD")
+    crashed.update(job["job_id"], status="running", stage="parse", stages={"extract": "done", "parse": "running"})
+    queued = crashed.create("other.txt", "BRD")
+
+    # A process started later, once the jobs have not been touched for stale_after
+    restarted = JobStore(url, ttl=3600, stale_after=0)
+    job = restarted.get(job["job_id"])
+    assert (job["status"], job["status_code"], job["error"]) == ("failed", 503, ABANDONED_ERROR)
+    assert job["stages"] == {"extract": "done", "parse": "failed"}
+    assert restarted.purge_expired() == 0
+    assert crashed.get(queued["job_id"])["status"] == "failed"
+
+
+def test_finished_jobs_keep_their_result_until_they_expire():
+    store = JobStore("sqlite://", ttl=3600, stale_after=3600)
+    job = store.create(None, "User Story")
+    store.update(job["job_id"], status="succeeded", result={"feature_content": "Feature: y"})
+    assert store.get(job["job_id"], include_result=True)["result"] == {"feature_content": "Feature: y"}
+    assert store.get(job["job_id"])["expires_at"] > job["expires_at"] - 1
+
+
+def test_runner_records_progress_and_result():
+    store = JobStore("sqlite://", ttl=3600, stale_after=3600)
+    runner = JobRunner(store, concurrency=1, queue_size=0, retry_after=5)
+
+    async def work(progress):
+        await progress("extract")
+        await progress("parse")
+        return {"feature_content": "Feature: z"}
+
+    async def scenario():
+        job = await runner.submit(work, "a.txt", "BRD")
+        with pytest.raises(JobQueueFullError):
+            await runner.submit(work, "b.txt", "BRD")
+        while store.get(job["job_id"])["status"] not in ("succeeded", "failed"):
+            await runner.wait(job["job_id"], 1.0)
+        return store.get(job["job_id"], include_result=True)
+
+    job = asyncio.run(scenario())
+    assert job["status"] == "succeeded"
+    assert job["stages"] == {"extract": "done", "segment": "skipped", "parse": "done", "generate": "skipped"}
+    assert job["result"] == {"feature_content": "Feature: z"}
+
+
+def test_runner_reports_failures_with_their_status():
+    store = JobStore("sqlite://", ttl=3600, stale_after=3600)
+    runner = JobRunner(store, concurrency=1, queue_size=1, retry_after=5)
+
+    class Rejected(Exception):
+        status_code = 413
+        detail = "too large"
+
+    async def work(progress):
+        await progress("extract")
+        raise Rejected()
+
+    async def scenario():
+        job = await runner.submit(work)
+        while store.get(job["job_id"])["status"] not in ("succeeded", "failed"):
+            await runner.wait(job["job_id"], 1.0)
+        return store.get(job["job_id"])
+
+    job = asyncio.run(scenario())
+    assert (job["status"], job["status_code"], job["error"]) == ("failed", 413, "too large")
+    assert job["stages"]["extract"] == "failed"
+
+
+def test_runner_keeps_its_jobs_from_going_stale():
+    store = JobStore("sqlite://", ttl=3600, stale_after=0.2)
+    runner = JobRunner(store, concurrency=1, queue_size=1, retry_after=5)
+    seen = []
+
+    async def work(progress):
+        await progress("extract")
+        for _ in range(5):
+            await asyncio.sleep(0.1)
+            seen.append((await asyncio.to_thread(store.get, job_id))["status"])
+        return {"feature_content": "Feature: slow"}
+
+    async def scenario():
+        nonlocal job_id
+        job_id = (await runner.submit(work))["job_id"]
+        while store.get(job_id)["status"] not in ("succeeded", "failed"):
+            await runner.wait(job_id, 1.0)
+        return store.get(job_id)
+
+    job_id = None
+    assert asyncio.run(scenario())["status"] == "succeeded"
+    assert seen == ["running"] * 5
@@ -0,0 +1,116 @@
+import random
+import pytest
+from app.core.config import settings
+from app.services.document_ir import Requirement
+from app.services.document_parser import DuplicateFilter
+from app.services.near_duplicates import NearDuplicateIndex, collapse_near_duplicates, jaccard, normalize, shingles
+from app.services.step_normalizer import fold_together, tokenize
+
+WORDS = "the system shall must allow admin user manager approve export report invoice order daily weekly all pending 5 10".split()
+
+
+def values(text):
+    return [token for kind, token in tokenize(text) if kind == "int"]
+
+
+def make_texts(count, seed):
+    """Random sentences, a third of them restating an earlier one with a word dropped or added"""
+    generator = random.Random(seed)
+    texts = []
+    for _ in range(count):
+        if texts and generator.random() < 0.33:
+            words = generator.choice(texts).split()
+            position = generator.randrange(len(words))
+            if generator.random() < 0.5 and len(words) > 3:
+                del words[position]
+            else:
+                words.insert(position, generator.choice(WORDS))
+        else:
+            words = generator.sample(WORDS, generator.randint(4, 9))
+        texts.append(" ".join(words))
+    return texts
+
+
+def brute_force_matches(representatives, text, threshold):
+    reference = shingles(normalize(text))
+    return {
+        group for group, representative in enumerate(representatives)
+        if values(representative) == values(text) and (
+            normalize(representative) == normalize(text)
+            or jaccard(reference, shingles(normalize(representative))) >= threshold and not fold_together(text, representative)
+        )
+    }
+
+
+@pytest.mark.parametrize("threshold", [0.5, 0.8])
+@pytest.mark.parametrize("seed", range(2))
+def test_prefix_filtering_finds_what_comparing_every_representative_finds(threshold, seed):
+    index = NearDuplicateIndex(threshold)
+    texts = make_texts(200, seed)
+    for text in texts:
+        matches = brute_force_matches(index.representatives, text, threshold)
+        group = index.add(text)
+        if group is None:
+            assert not matches
+        else:
+            assert group in matches
+    assert len(index) < len(texts)
+
+
+@pytest.mark.parametrize("first, second", [
+    ("The admin must approve 5 orders", "The admin must approve 10 orders"),
+    ('The user enters "alice" as name', 'The user enters "bob" as name'),
+])
+def test_variants_an_outline_would_fold_are_never_merged(first, second):
+    assert fold_together(first, second)
+    kept, duplicates = collapse_near_duplicates([first, second], threshold=0.1)
+    assert kept == [first, second] and duplicates == []
+
+
+def test_word_variants_are_kept_apart_only_when_outlines_fold_them(monkeypatch):
+    texts = ["The admin must approve all pending orders daily", "The manager must approve all pending orders daily"]
+    assert not fold_together(*texts)
+    assert collapse_near_duplicates(texts, threshold=0.5)[0] == texts[:1]
+
+    monkeypatch.setattr(settings, "step_varying_words", 2)
+    assert fold_together(*texts)
+    assert collapse_near_duplicates(texts, threshold=0.5) == (texts, [])
+
+
+def test_sentences_about_other_values_are_never_merged():
+    texts = ["The system will allow filtering the results of order 912.", "The system will be able to filter the results of order 446."]
+    assert collapse_near_duplicates(texts, threshold=0.5) == (texts, [])
+    assert collapse_near_duplicates([texts[0], texts[1].replace("446", "912")], threshold=0.5)[0] == texts[:1]
+
+
+def test_restatements_are_merged_and_reported():
+    texts = [
+        "The system shall export the daily report as PDF.",
+        "The admin must approve 5 orders.",
+        "The system shall export the daily report as a PDF.",
+        "the system shall export the daily report as PDF",
+    ]
+    kept, duplicates = collapse_near_duplicates(texts, threshold=0.7)
+    assert kept == texts[:2]
+    assert duplicates == [{
+        "kept": texts[0],
+        "merged": [{"text": texts[2], "similarity": duplicates[0]["merged"][0]["similarity"]}, {"text": texts[3], "similarity": 1.0}],
+    }]
+    assert 0.7 <= duplicates[0]["merged"][0]["similarity"] < 1
+
+
+def test_duplicate_filter_reports_what_it_drops():
+    records = [Requirement("requirements", text) for text in [
+        "The system shall export the daily report as PDF.",
+        "The system shall export the daily report as a PDF.",
+        "The admin must approve 5 orders.",
+        "The admin must approve 10 orders.",
+    ]] + [Requirement("scenarios", "The system shall export the daily report as PDF.")]
+    deduplicate = DuplicateFilter(0.7)
+    assert [record.text for record in deduplicate(records)] == [
+        records[0].text, records[2].text, records[3].text, records[4].text
+    ]
+    assert [entry["kept"] for entry in deduplicate.duplicates["requirements"]] == [records[0].text]
+    assert deduplicate.duplicates["requirements"][0]["merged"][0]["text"] == records[1].text
+    assert deduplicate.duplicates["scenarios"] == []
+    assert list(DuplicateFilter(0)(records)) == records
@@ -0,0 +1,102 @@
+import json
+import re
+import pytest
+from app.services.document_parser import DocumentParser
+from app.services.pattern_matcher import PatternMatcher, load_pattern_pack, merge_patterns, needs_own_regex
+
+PATTERNS = DocumentParser(pattern_packs=[], duplicate_threshold=0).patterns
+
+SENTENCES = [
+    "The system must be able to export reports as PDF.",
+    "The admin needs to approve every order before it ships.",
+    "When the user submits the form then a confirmation is shown.",
+    "Given a logged in customer when they pay then the order is placed.",
+    "If the payment fails then the platform will provide a retry option.",
+    "The service should support single sign-on for the application.",
+    "Users will have a dashboard.",
+    "Nothing in this sentence is a requirement.",
+]
+
+LINES = [
+    "Pre-conditions: the user is registered",
+    "Prerequisite the database is seeded",
+    "Given a clean browser",
+    "Before the test the cache is cleared",
+    "Step 1: open the login page",
+    "Action 2 enter the password",
+    "3. Click submit",
+    "When the page loads",
+    "Expected Result: the dashboard is shown",
+    "Then the user sees a greeting",
+    "Verify: the audit log has an entry",
+    "Validate the email was sent",
+    "Should redirect to the home page",
+    "An unrelated line",
+]
+
+
+def baseline_classify(table, text):
+    return {category for category, patterns in table.items() if any(re.search(p, text, re.IGNORECASE) for p in patterns)}
+
+
+def baseline_match(table, text):
+    for category, patterns in table.items():
+        if any(re.match(p, text, re.IGNORECASE) for p in patterns):
+            return category
+    return None
+
+
+@pytest.mark.parametrize("text", SENTENCES)
+def test_classify_matches_per_pattern_search(text):
+    table = {category: patterns for category, patterns in PATTERNS["BRD"].items() if category != "actors"}
+    assert PatternMatcher(table).classify(text) == baseline_classify(table, text)
+
+
+@pytest.mark.parametrize("text", SENTENCES)
+def test_findall_matches_per_pattern_findall(text):
+    table = {"actors": PATTERNS["BRD"]["actors"]}
+    expected = {found for pattern in table["actors"] for found in re.findall(pattern, text, re.IGNORECASE)}
+    assert set(PatternMatcher(table).findall(text, "actors")) == expected
+
+
+@pytest.mark.parametrize("line", LINES)
+def test_match_returns_first_matching_category(line):
+    table = PATTERNS["Test Case"]
+    assert PatternMatcher(table).match(line) == baseline_match(table, line)
+
+
+@pytest.mark.parametrize("pattern, expected", [
+    (r"(\w)\1", True),
+    (r"(?P<word>\w+) again", True),
+    (r"(a)?(?(1)b|c)", True),
+    (r"(?:must|shall)\s+(\w+)", False),
+    (r"\\1", False),
+])
+def test_needs_own_regex(pattern, expected):
+    assert needs_own_regex(pattern) is expected
+
+
+def test_backreferences_keep_their_meaning():
+    table = {
+        "first": [r"must\s+(\w+)", r"(\w+) and \1"],
+        "second": [r"(?P<verb>log) (?P=verb)"],
+        "third": [r"(?P<verb>save)", r"repeat (\w+) \1"],
+    }
+    matcher = PatternMatcher(table)
+    texts = ["log log in", "save it", "repeat twice twice", "this and this", "this and that", "must go", "nothing"]
+    for text in texts:
+        assert matcher.match(text) == baseline_match(table, text)
+        assert matcher.classify(text) == baseline_classify(table, text)
+
+
+def test_pattern_pack_is_validated_and_merged(tmp_path):
+    pack = tmp_path / "pack.json"
+    pack.write_text(json.dumps({"BRD": {"requirements": [r"is required to"]}, "Epic": {"goals": ["aim"]}}))
+    merged = merge_patterns(PATTERNS, load_pattern_pack(str(pack)))
+    assert merged["BRD"]["requirements"][-1] == r"is required to"
+    assert merged["Epic"] == {"goals": ["aim"]}
+    assert r"is required to" not in PATTERNS["BRD"]["requirements"]
+
+    pack.write_text(json.dumps({"BRD": {"requirements": ["(unclosed"]}}))
+    with pytest.raises(ValueError):
+        load_pattern_pack(str(pack))
@@ -0,0 +1,41 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.api.endpoints import debug
+from app.core.config import settings
+from app.services.profiler import profiling_allowed
+
+
+@pytest.fixture
+def profiling(monkeypatch):
+    monkeypatch.setattr(settings, "profiling_enabled", True)
+    monkeypatch.setattr(settings, "profiling_token", "")
+    app = FastAPI()
+    app.include_router(debug.router, prefix="/api")
+    return app
+
+
+@pytest.mark.parametrize("host, allowed", [
+    ("127.0.0.1", True), ("127.8.0.1", True), ("::1", True), ("localhost", True),
+    ("10.0.0.7", False), ("testclient", False), (None, False),
+])
+def test_without_token_only_loopback_clients_may_profile(monkeypatch, host, allowed):
+    monkeypatch.setattr(settings, "profiling_token", "")
+    assert profiling_allowed("anything", host) is allowed
+
+
+def test_with_token_any_client_must_send_it(monkeypatch):
+    monkeypatch.setattr(settings, "profiling_token", "s3cret")
+    assert profiling_allowed("s3cret", "10.0.0.7")
+    assert not profiling_allowed("guess", "127.0.0.1")
+    assert not profiling_allowed(None, "127.0.0.1")
+
+
+def test_debug_routes_refuse_remote_clients_without_token(profiling):
+    assert TestClient(profiling, client=("10.0.0.7", 5000)).get("/api/debug/profiles").status_code == 403
+    assert TestClient(profiling, client=("127.0.0.1", 5000)).get("/api/debug/profiles").status_code == 200
+
+
+def test_debug_routes_are_hidden_when_profiling_is_off(profiling, monkeypatch):
+    monkeypatch.setattr(settings, "profiling_enabled", False)
+    assert TestClient(profiling, client=("127.0.0.1", 5000)).get("/api/debug/profiles").status_code == 404
@@ -0,0 +1,115 @@
+import asyncio
+from contextlib import nullcontext
+from starlette.requests import Request
+from app.main import _request_priority
+from app.services.scheduler import StageScheduler
+
+
+def request(path, headers=()):
+    return Request({
+        "type": "http", "method": "POST", "path": path, "query_string": b"",
+        "headers": [(name.lower().encode(), value.encode()) for name, value in headers],
+        "client": ("10.0.0.7", 5000),
+    })
+
+
+class Tasks:
+    """Stage tasks that take a slot in the lane and client of the context they are started in, and hold it until finish()"""
+
+    def __init__(self, scheduler):
+        self.scheduler = scheduler
+        self.started = []
+        self.refused = []
+        self._done = asyncio.Event()
+        self._tasks = []
+
+    def start(self, name, lane=None, client=""):
+        with self.scheduler.priority(lane, client) if lane else nullcontext():
+            self._tasks.append(asyncio.create_task(self._run(name)))
+
+    async def _run(self, name):
+        lane, client = self.scheduler.current()
+        if not await self.scheduler.acquire(lane, client):
+            self.refused.append(name)
+            return
+        self.started.append(name)
+        await self._done.wait()
+        self.scheduler.release(lane)
+
+    async def settle(self):
+        for _ in range(10):
+            await asyncio.sleep(0)
+        return self.started
+
+    async def finish(self):
+        self._done.set()
+        await asyncio.gather(*self._tasks)
+        return self.started
+
+
+def test_ui_jobs_are_interactive_and_batches_bulk():
+    assert _request_priority(request("/api/jobs")) == ("interactive", "10.0.0.7")
+    assert _request_priority(request("/api/jobs", [("X-BDD-Priority", "bulk"), ("X-API-Key", "ci")])) == ("bulk", "ci")
+    assert _request_priority(request("/api/conversion/convert"))[0] == "bulk"
+    assert _request_priority(request("/api/convert-to-feature"))[0] == "interactive"
+
+
+def test_interactive_job_is_dispatched_ahead_of_queued_bulk_work():
+    async def scenario():
+        scheduler = StageScheduler(slots=1, lane_limits={}, queue_size=100, client_weights={})
+        tasks = Tasks(scheduler)
+        # Tasks inherit the lane of the request that started them, as a job's conversion does
+        with scheduler.priority(*_request_priority(request("/api/conversion/convert", [("X-API-Key", "ci")]))):
+            for number in range(3):
+                tasks.start(f"bulk {number}")
+        assert await tasks.settle() == ["bulk 0"]
+        with scheduler.priority(*_request_priority(request("/api/jobs"))):
+            tasks.start("job")
+        await tasks.settle()
+        return await tasks.finish()
+
+    assert asyncio.run(scenario()) == ["bulk 0", "job", "bulk 1", "bulk 2"]
+
+
+def test_bulk_lane_keeps_to_its_limit():
+    async def scenario():
+        scheduler = StageScheduler(slots=2, lane_limits={"bulk": 1}, queue_size=100, client_weights={})
+        tasks = Tasks(scheduler)
+        tasks.start("bulk 0", "bulk")
+        tasks.start("bulk 1", "bulk")
+        assert await tasks.settle() == ["bulk 0"]
+        tasks.start("interactive", "interactive")
+        assert await tasks.settle() == ["bulk 0", "interactive"]
+        return await tasks.finish()
+
+    assert asyncio.run(scenario()) == ["bulk 0", "interactive", "bulk 1"]
+
+
+def test_clients_of_a_lane_take_turns_by_weight():
+    async def scenario(weights, queued):
+        scheduler = StageScheduler(slots=1, lane_limits={}, queue_size=100, client_weights=weights)
+        tasks = Tasks(scheduler)
+        tasks.start("blocker", "bulk", "other")
+        await tasks.settle()
+        for client, count in queued:
+            for number in range(count):
+                tasks.start(f"{client}{number}", "bulk", client)
+        await tasks.settle()
+        return (await tasks.finish())[1:]
+
+    assert asyncio.run(scenario({}, [("a", 3), ("b", 1)])) == ["a0", "b0", "a1", "a2"]
+    assert asyncio.run(scenario({"a": 2.0}, [("a", 4), ("b", 2)])) == ["a0", "b0", "a1", "a2", "b1", "a3"]
+
+
+def test_full_lane_refuses_without_waiting():
+    async def scenario():
+        scheduler = StageScheduler(slots=1, lane_limits={}, queue_size=1, client_weights={})
+        tasks = Tasks(scheduler)
+        for name in ("running", "waiting", "refused"):
+            tasks.start(name, "bulk")
+            await tasks.settle()
+        refused = list(tasks.refused)
+        await tasks.finish()
+        return refused, tasks.started
+
+    assert asyncio.run(scenario()) == (["refused"], ["running", "waiting"])
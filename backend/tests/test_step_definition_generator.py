@@ -0,0 +1,36 @@
+import pytest
+from app.services.step_definition_generator import StepDefinitionGenerator
+
+FEATURE = """Feature: Cart
+  Scenario: Remove the last item
+    Given the cart is empty
+    When the user adds "apples"
+    And the checkout page is opened
+    Then the cart is empty
+    And the total is 0
+"""
+
+
+def definitions(language, framework=None, feature=FEATURE):
+    return StepDefinitionGenerator().generate_step_definitions(feature, language, framework)["step_definitions"]
+
+
+@pytest.mark.parametrize("framework", ["behave", "pytest-bdd"])
+def test_steps_shared_by_step_types_bind_any_keyword(framework):
+    stubs = list(definitions("python", framework).values())
+    cart_is_empty = [stub for stub in stubs if "the cart is empty" in stub]
+    assert len(cart_is_empty) == 1
+    assert cart_is_empty[0].startswith("@step(")
+    assert sum(stub.startswith("@when(") for stub in stubs) == 2
+    assert sum(stub.startswith("@then(") for stub in stubs) == 1
+
+
+def test_steps_of_one_type_keep_their_keyword():
+    stubs = definitions("python", "behave", FEATURE.replace("Then the cart is empty", "Then the cart is full"))
+    assert [stub.split("(")[0] for stub in stubs.values()] == ["@given", "@when", "@when", "@then", "@then"]
+
+
+def test_cucumber_binds_a_shared_step_once():
+    # Cucumber matches a definition whatever the keyword of the step, so a second one would be ambiguous
+    stubs = [stub for stub in definitions("javascript").values() if "the cart is empty" in stub]
+    assert len(stubs) == 1 and stubs[0].startswith("Given(")
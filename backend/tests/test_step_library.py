@@ -0,0 +1,64 @@
+import re
+import pytest
+from app.services.step_library import StepBinding, StepIndex, required_tokens
+
+BINDINGS = [
+    StepBinding(r"^the user logs in$", step_type="given"),
+    StepBinding(r"^the user logs in as (\w+)$"),
+    StepBinding(r"^I pay (\d+) euros?$", step_type="when"),
+    StepBinding(r"the basket (?:is|stays) empty"),
+    StepBinding(r"^The Admin approves (\d+) orders$", flags=re.IGNORECASE),
+    StepBinding("the {word} page is shown", kind="cucumber", step_type="then"),
+    StepBinding("I have/own {int} item(s)", kind="cucumber"),
+    StepBinding("I search for {query}", kind="parse"),
+    StepBinding("the total is {amount:d} cents", kind="parse", step_type="then"),
+    StepBinding(r"^(.*) is displayed$"),
+    StepBinding(r"confirm\w*"),
+    StepBinding(r"^log(?:in|out) works$"),
+]
+
+STEPS = [
+    ("the user logs in", "given"), ("the user logs in", "when"), ("the user logs in as admin", None),
+    ("I pay 30 euros", "when"), ("I pay 1 euro", "when"), ("I pay 30 euros", "given"),
+    ("after checkout the basket stays empty", None), ("THE ADMIN APPROVES 5 ORDERS", "when"),
+    ("the login page is shown", "then"), ("I have 3 items", None), ("I own 1 item", None),
+    ("I search for red shoes", "when"), ("the total is 250 cents", "then"),
+    ("the receipt is displayed", "then"), ("the user confirmed the order", None), ("login works", None),
+    ("logout works", "then"), ("nothing matches this", None), ("", None),
+]
+
+
+def linear_match(bindings, text, step_type):
+    matches = []
+    for binding in bindings:
+        if step_type and binding.step_type and binding.step_type != step_type:
+            continue
+        found = binding.regex.search(text)
+        if found:
+            matches.append((binding, found.groups()))
+    return matches
+
+
+@pytest.mark.parametrize("text, step_type", STEPS)
+def test_index_matches_like_a_linear_scan(text, step_type):
+    assert StepIndex(BINDINGS).match(text, step_type) == linear_match(BINDINGS, text, step_type)
+
+
+def test_each_binding_is_filed_under_its_rarest_word():
+    index = StepIndex(BINDINGS)
+    # Only the second login step requires "as", so a step without it never tries that binding
+    assert 1 not in index.candidates("the user logs in")
+    assert {0, 1} <= set(index.candidates("the user logs in as bob"))
+    assert index.candidates("nothing matches this") == index._unindexed
+    assert index.unindexed_count == sum(1 for binding in BINDINGS if not binding.tokens)
+
+
+@pytest.mark.parametrize("regex, tokens", [
+    (r"^the user logs in$", {"the", "user", "logs", "in"}),
+    (r"^I pay (\d+) euros?$", {"i", "pay"}),
+    (r"the basket (?:is|stays) empty", {"basket"}),
+    (r"confirm\w*", set()),
+    (r"^(.*) is displayed$", {"is", "displayed"}),
+])
+def test_required_tokens_only_count_bounded_words(regex, tokens):
+    assert required_tokens(regex) == tokens
@@ -0,0 +1,51 @@
+from app.services.document_ir import OutlineExamples, Scenario
+from app.services.step_normalizer import cluster_steps, fold_outlines
+
+
+def scenario(name, *steps):
+    return Scenario(name, tuple(steps))
+
+
+def test_scenarios_differing_in_values_fold_into_an_outline():
+    folded = fold_outlines([
+        scenario("Order 5 items", "Given a customer", "When they order 5 items"),
+        scenario("Order 12 items", "Given a customer", "When they order 12 items"),
+        scenario("Log in", "When the user logs in"),
+        scenario("Log out", "When the user logs out"),
+    ])
+    assert folded == [
+        Scenario("Order <number> items", ("Given a customer", "When they order <number> items"),
+                 OutlineExamples(["number"], [["5"], ["12"]])),
+        scenario("Log in", "When the user logs in"),
+        scenario("Log out", "When the user logs out"),
+    ]
+
+
+def test_scenarios_with_the_same_steps_are_kept_as_rows():
+    scenarios = [
+        scenario("Pay 10 euros", "When the user pays 10 euros"),
+        scenario("Pay 20 euros", "When the user pays 20 euros"),
+        scenario("Pay 10 euros again", "When the user pays 10 euros"),
+    ]
+    [outline] = fold_outlines(scenarios)
+    assert outline.steps == ("When the user pays <number> euros",)
+    assert outline.examples.rows == [["10"], ["20"], ["10"]]
+
+
+def test_identical_scenarios_alone_are_not_folded():
+    scenarios = [scenario("Log out", "When the user logs out"), scenario("Log out again", "When the user logs out")]
+    assert fold_outlines(scenarios) == scenarios
+
+
+def test_clusters_need_enough_literal_words():
+    clusters = cluster_steps(["the user pays 10 euros", "the user pays 25 euros", "a b"])
+    assert [cluster.texts for cluster in clusters] == [["the user pays 10 euros", "the user pays 25 euros"], ["a b"]]
+    assert clusters[0].pattern("cucumber") == "the user pays {int} euros"
+
+
+def test_words_only_vary_when_configured():
+    texts = ["the user logs in", "the user logs out", "the user pays 10 euros"]
+    assert [cluster.texts for cluster in cluster_steps(texts)] == [[text] for text in texts]
+    clusters = cluster_steps(texts, max_varying_words=2)
+    assert [cluster.texts for cluster in clusters] == [texts[:2], texts[2:]]
+    assert clusters[0].pattern("cucumber") == "the user logs {word}"
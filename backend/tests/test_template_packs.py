@@ -0,0 +1,80 @@
+import json
+import jinja2
+import pytest
+from app.core.config import settings
+from app.services import template_packs
+from app.services.template_packs import COMPILED_MANIFEST, PACKS, StepStub, TemplatePack, compile_templates, source_hashes
+
+STUBS = [
+    StepStub("given", "'^the user pays (\\\\d+) euros$'", "the_user_pays_euros", "context, number", "the user pays 10 euros"),
+    StepStub("Then", "'a {string} <message> & more'", "a_message", "", 'a "welcome" <message> & more'),
+]
+
+
+@pytest.mark.parametrize("key", list(PACKS))
+@pytest.mark.parametrize("stub", STUBS)
+def test_marker_split_rendering_matches_the_template(key, stub):
+    pack = PACKS[key]
+    macro = template_packs.get_template(pack.template).module.step_definition
+    assert pack.render(stub) == str(macro(stub)).strip("\n")
+
+
+def custom_pack(monkeypatch, source):
+    loader = jinja2.DictLoader({"custom.jinja": source})
+    monkeypatch.setattr(template_packs, "_environment", template_packs._create_environment(loader))
+    return TemplatePack("custom", "custom", "custom.jinja", ["regex"], str, repr, str, lambda *args: "", "steps.txt")
+
+
+def test_templates_must_interpolate_the_fields_unchanged(monkeypatch):
+    pack = custom_pack(monkeypatch, "{% macro step_definition(step) %}@{{ step.keyword }} {{ step.text | upper }}{% endmacro %}")
+    with pytest.raises(ValueError):
+        pack.render(STUBS[0])
+
+    pack = custom_pack(monkeypatch, "{% macro step_definition(step) %}\n{{ step.keyword }}({{ step.literal }}) # {{ step.text }}\n{% endmacro %}")
+    assert pack.render(STUBS[0]) == "given('^the user pays (\\\\d+) euros$') # the user pays 10 euros"
+
+
+@pytest.fixture
+def compiled(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "template_modules", str(tmp_path))
+    compile_templates(tmp_path)
+    return tmp_path
+
+
+def render_all(loader):
+    environment = template_packs._create_environment(loader)
+    pack = PACKS[("python", "behave")]
+    return [str(environment.get_template(pack.template).module.step_definition(stub)) for stub in STUBS]
+
+
+def test_compiled_templates_are_loaded_as_modules(compiled):
+    assert json.loads((compiled / COMPILED_MANIFEST).read_text()) == source_hashes()
+    loader = template_packs._loader()
+    assert isinstance(loader, jinja2.ChoiceLoader) and isinstance(loader.loaders[0], jinja2.ModuleLoader)
+    assert render_all(loader.loaders[0]) == render_all(jinja2.FileSystemLoader(str(template_packs.TEMPLATES_DIR)))
+
+
+@pytest.mark.parametrize("manifest", ['{"python_steps.py.jinja": "0000"}', "not json", None])
+def test_stale_compiled_templates_are_rebuilt(compiled, manifest):
+    module = next(path for path in compiled.iterdir() if path.suffix == ".py")
+    module.write_text("raise ImportError('compiled from other sources')\n")
+    if manifest is None:
+        (compiled / COMPILED_MANIFEST).unlink()
+    else:
+        (compiled / COMPILED_MANIFEST).write_text(manifest)
+
+    loader = template_packs._loader()
+    assert isinstance(loader, jinja2.ChoiceLoader)
+    assert json.loads((compiled / COMPILED_MANIFEST).read_text()) == source_hashes()
+    assert "compiled from other sources" not in module.read_text()
+    render_all(loader.loaders[0])
+
+
+def test_stale_templates_that_cannot_be_rebuilt_are_ignored(compiled, monkeypatch):
+    (compiled / COMPILED_MANIFEST).write_text("{}")
+
+    def read_only(target):
+        raise PermissionError(f"{target} is read-only")
+
+    monkeypatch.setattr(template_packs, "compile_templates", read_only)
+    assert isinstance(template_packs._loader(), jinja2.FileSystemLoader)
@@ -0,0 +1,173 @@
+from io import BytesIO
+import zipfile
+import pytest
+from PyPDF2 import PdfWriter
+from PyPDF2.errors import PdfReadError
+from app.services import text_extractor
+from app.services.section_detector import detect_headings
+from app.services.text_extractor import extract_docx, extract_document, iter_docx_records, locate_headings, pdf_outline
+
+TEXT = "1. Login\nUsers sign in with a password.\n\n2. Checkout\nUsers pay for their basket.\n"
+
+
+def docx(*body: str) -> bytes:
+    xml = (
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main" '
+        'xmlns:v="urn:schemas-microsoft-com:vml"><w:body>' + "".join(body) + "<w:sectPr/></w:body></w:document>"
+    )
+    stream = BytesIO()
+    with zipfile.ZipFile(stream, "w") as archive:
+        archive.writestr("word/document.xml", xml)
+    return stream.getvalue()
+
+
+def paragraph(*runs: str, style: str = None, outline_level: int = None) -> str:
+    properties = (f'<w:pStyle w:val="{style}"/>' if style else "") + (
+        f'<w:outlineLvl w:val="{outline_level}"/>' if outline_level is not None else ""
+    )
+    return (f"<w:p><w:pPr>{properties}</w:pPr>" if properties else "<w:p>") + "".join(f"<w:r>{run}</w:r>" for run in runs) + "</w:p>"
+
+
+def text(value: str) -> str:
+    return f"<w:t>{value}</w:t>"
+
+
+def table(*rows) -> str:
+    return "<w:tbl>" + "".join(
+        "<w:tr>" + "".join(f"<w:tc>{cell}</w:tc>" for cell in row) + "</w:tr>" for row in rows
+    ) + "</w:tbl>"
+
+
+def pdf_with_outline() -> bytes:
+    writer = PdfWriter()
+    writer.add_blank_page(200, 200)
+    parent = writer.add_outline_item("Login", 0)
+    writer.add_outline_item("Password rules", 0, parent=parent)
+    writer.add_outline_item("Checkout", 0)
+    stream = BytesIO()
+    writer.write(stream)
+    return stream.getvalue()
+
+
+class BrokenOutline:
+    def __init__(self, error):
+        self.error = error
+
+    @property
+    def outline(self):
+        raise self.error
+
+
+def test_outline_levels_follow_nesting():
+    assert pdf_outline(pdf_with_outline()) == [
+        {"title": "Login", "level": 1},
+        {"title": "Password rules", "level": 2},
+        {"title": "Checkout", "level": 1},
+    ]
+
+
+def test_outline_titles_are_located_as_whole_lines():
+    text = "Login\nThe Login page\nCheckout\n"
+    outline = [{"title": "Login", "level": 1}, {"title": "Missing", "level": 1}, {"title": "Checkout", "level": 1}]
+    assert locate_headings(text, outline) == [
+        {"title": "Login", "level": 1, "start": 0},
+        {"title": "Checkout", "level": 1, "start": text.index("Checkout")},
+    ]
+
+
+@pytest.mark.parametrize("error", [PdfReadError("bad reference"), KeyError("/Title"), RecursionError()])
+def test_malformed_outline_falls_back_to_detected_headings(monkeypatch, error):
+    monkeypatch.setattr(text_extractor, "pdf_reader", lambda stream: BrokenOutline(error))
+    monkeypatch.setattr(text_extractor, "extract_text", lambda content, filename, pages=None: TEXT)
+    assert pdf_outline(b"%PDF") is None
+    text, tables, headings = extract_document(b"%PDF", "spec.pdf")
+    assert text == TEXT and tables is None
+    assert headings == detect_headings(TEXT)
+
+
+def test_docx_headings_come_from_styles_and_outline_levels():
+    content = docx(
+        paragraph(text("Shop"), style="Title"),
+        paragraph(text("Login"), style="Heading1"),
+        paragraph(text("Password rules"), style="heading 2"),
+        paragraph(text("Checkout"), outline_level=0),
+        paragraph(text("Payment"), style="Heading1", outline_level=2),
+        paragraph(text("Body text"), style="Normal", outline_level=9),
+        paragraph(style="Heading1"),
+    )
+    assert [record["level"] for record in iter_docx_records(content)] == [1, 1, 2, 1, 3, None, 1]
+    extracted, tables, headings = extract_docx(content)
+    assert tables == []
+    assert [(heading["title"], heading["level"]) for heading in headings] == [
+        ("Shop", 1), ("Login", 1), ("Password rules", 2), ("Checkout", 1), ("Payment", 3)
+    ]
+    assert all(extracted[heading["start"]:].startswith(heading["title"]) for heading in headings)
+
+
+def test_docx_runs_keep_tabs_and_line_breaks():
+    content = docx(paragraph(text("Name"), "<w:tab/>", text("Alice"), "<w:br/>", text("Role"), "<w:cr/>", text("Admin")))
+    assert extract_docx(content)[0] == "Name\tAlice\nRole\nAdmin"
+
+
+def test_docx_table_rows_are_records_with_their_span():
+    content = docx(
+        paragraph(text("Users")),
+        table([paragraph(text("Name")), paragraph(text("Role"))], [paragraph(text("Alice")), paragraph(text("Admin"), style="Heading1")]),
+        paragraph(text("Orders")),
+        table([paragraph(text("Id")), paragraph(text("Line one")) + paragraph(text("Line two"))]),
+    )
+    records = list(iter_docx_records(content))
+    assert records == [
+        {"type": "paragraph", "text": "Users", "level": None},
+        {"type": "table_row", "table": 0, "cells": ["Name", "Role"]},
+        {"type": "table_row", "table": 0, "cells": ["Alice", "Admin"]},
+        {"type": "paragraph", "text": "Orders", "level": None},
+        {"type": "table_row", "table": 1, "cells": ["Id", "Line one\nLine two"]},
+    ]
+
+    extracted, tables, headings = extract_docx(content)
+    assert extracted == "Users\nName | Role\nAlice | Admin\nOrders\nId | Line one Line two"
+    assert [extracted[table["start"]:table["end"]] for table in tables] == [
+        "Name | Role\nAlice | Admin", "Id | Line one Line two"
+    ]
+    assert tables[1]["rows"] == [["Id", "Line one\nLine two"]]
+    assert headings == []
+
+
+def test_docx_nested_tables_and_text_boxes_are_flattened():
+    nested = table([paragraph(text("inner a")), paragraph(text("inner b"))])
+    text_box = f'<w:pict><v:shape><v:textbox><w:txbxContent>{paragraph(text("boxed"), style="Heading1")}</w:txbxContent></v:textbox></v:shape></w:pict>'
+    content = docx(
+        table([paragraph(text("outer")) + nested, paragraph(text("plain"))]),
+        paragraph(text("See "), text_box, text(" here")),
+    )
+    assert list(iter_docx_records(content)) == [
+        {"type": "table_row", "table": 0, "cells": ["outer\ninner a\ninner b", "plain"]},
+        {"type": "paragraph", "text": "See boxed here", "level": None},
+    ]
+
+
+def test_docx_is_read_from_a_spooled_file(tmp_path):
+    path = tmp_path / "spec.docx"
+    path.write_bytes(docx(paragraph(text("Login"), style="Heading1"), paragraph(text("Users sign in."))))
+    assert extract_document(str(path), "spec.docx") == (
+        "Login\nUsers sign in.", [], [{"title": "Login", "level": 1, "start": 0}]
+    )
+
+
+def test_docx_written_by_python_docx():
+    docx_module = pytest.importorskip("docx")
+    document = docx_module.Document()
+    document.add_heading("Requirements", level=1)
+    document.add_paragraph("The system shall export reports.")
+    grid = document.add_table(rows=2, cols=2)
+    for row, values in zip(grid.rows, [("Id", "Title"), ("R1", "Export")]):
+        for cell, value in zip(row.cells, values):
+            cell.text = value
+    stream = BytesIO()
+    document.save(stream)
+
+    extracted, tables, headings = extract_docx(stream.getvalue())
+    assert extracted == "Requirements\nThe system shall export reports.\nId | Title\nR1 | Export"
+    assert tables == [{"start": extracted.index("Id"), "end": len(extracted), "rows": [["Id", "Title"], ["R1", "Export"]]}]
+    assert headings == [{"title": "Requirements", "level": 1, "start": 0}]
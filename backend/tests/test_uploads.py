@@ -0,0 +1,118 @@
+from io import BytesIO
+from tempfile import SpooledTemporaryFile
+import hashlib
+import os
+import pytest
+from fastapi import FastAPI, File, Request, UploadFile
+from fastapi.testclient import TestClient
+from app.main import RequestSizeLimit
+from app.services import uploads
+from app.services.uploads import UploadTooLargeError, spool
+
+DATA = bytes(range(256)) * 40  # 10 KiB
+
+
+def rolled_over(data: bytes) -> SpooledTemporaryFile:
+    """An upload the way Starlette hands it over once it outgrew its in-memory spool"""
+    stream = SpooledTemporaryFile(max_size=1024)
+    stream.write(data)
+    stream.seek(0)
+    assert stream._rolled
+    return stream
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(uploads, "CHUNK_SIZE", 1000)
+
+
+def test_small_uploads_stay_in_memory(small_chunks, tmp_path):
+    upload = spool(BytesIO(DATA), "spec.txt", max_bytes=0, spool_max_bytes=len(DATA), directory=str(tmp_path))
+    assert (upload.content, upload.path, upload.size) == (DATA, None, len(DATA))
+    assert upload.source == DATA and upload.sha256.hexdigest() == hashlib.sha256(DATA).hexdigest()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_large_uploads_are_spooled_to_disk(small_chunks, tmp_path):
+    upload = spool(BytesIO(DATA), "spec.pdf", max_bytes=0, spool_max_bytes=len(DATA) - 1, directory=str(tmp_path))
+    assert upload.content is None and upload.source == upload.path
+    assert os.path.dirname(upload.path) == str(tmp_path) and upload.path.endswith(".pdf")
+    assert upload.read() == DATA and upload.sha256.hexdigest() == hashlib.sha256(DATA).hexdigest()
+    upload.close()
+    upload.close()
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.parametrize("spool_max_bytes", [len(DATA), 1000])
+def test_too_large_uploads_leave_nothing_behind(small_chunks, tmp_path, spool_max_bytes):
+    with pytest.raises(UploadTooLargeError):
+        spool(BytesIO(DATA), "spec.pdf", max_bytes=len(DATA) - 1, spool_max_bytes=spool_max_bytes, directory=str(tmp_path))
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.skipif(not os.path.isdir(uploads.PROC_FDS), reason="needs /proc")
+def test_uploads_already_on_disk_are_not_copied(small_chunks, tmp_path):
+    stream = rolled_over(DATA)
+    upload = spool(stream, "spec.pdf", max_bytes=0, spool_max_bytes=1000, directory=str(tmp_path))
+    assert list(tmp_path.iterdir()) == []
+    assert upload.sha256.hexdigest() == hashlib.sha256(DATA).hexdigest()
+
+    # The upload outlives the framework's file object, as queued jobs need it to
+    stream.close()
+    assert upload.read() == DATA
+    descriptor = upload.descriptor
+    upload.close()
+    upload.close()
+    with pytest.raises(OSError):
+        os.fstat(descriptor)
+
+
+def test_uploads_already_on_disk_below_the_threshold_stay_in_memory(small_chunks):
+    stream = rolled_over(DATA)
+    upload = spool(stream, "spec.txt", max_bytes=0, spool_max_bytes=len(DATA))
+    assert (upload.content, upload.path, upload.descriptor) == (DATA, None, None)
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+
+    @app.post("/raw")
+    async def raw(request: Request):
+        return {"size": len(await request.body())}
+
+    @app.post("/upload")
+    async def upload(file: UploadFile = File(...)):
+        return {"size": len(await file.read())}
+
+    app.add_middleware(RequestSizeLimit, max_bytes=4096)
+    return TestClient(app)
+
+
+def test_bodies_within_the_limit_are_served(client):
+    assert client.post("/raw", content=DATA[:4096]).json() == {"size": 4096}
+    assert client.post("/upload", files={"file": ("a.txt", DATA[:1024])}).json() == {"size": 1024}
+
+
+def test_declared_oversized_bodies_are_refused(client):
+    response = client.post("/raw", content=DATA)
+    assert response.status_code == 413
+    assert response.json() == {"detail": "The request body is larger than the 4096 byte limit"}
+
+
+MULTIPART = (
+    b'--x\r\nContent-Disposition: form-data; name="file"; filename="a.txt"\r\n\r\n' + DATA + b"\r\n--x--\r\n"
+)
+
+
+@pytest.mark.parametrize("path, body", [("/raw", DATA), ("/upload", MULTIPART)])
+def test_streamed_oversized_bodies_are_refused(client, path, body):
+    def chunks():
+        # Without a Content-Length, so the limit applies as the body arrives
+        for start in range(0, len(body), 1024):
+            yield body[start:start + 1024]
+
+    headers = {"Content-Type": "multipart/form-data; boundary=x"} if path == "/upload" else {}
+    response = client.post(path, content=chunks(), headers=headers)
+    assert response.status_code == 413
+    assert "4096 byte limit" in response.json()["detail"]
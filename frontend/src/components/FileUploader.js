@@ -13,19 +13,30 @@ import {
   Alert,
 } from '@mui/material';
 import { useDropzone } from 'react-dropzone';
+import { runConversionJob, JobSubmitError } from '../services/conversionJobs';
+
+const STAGE_LABELS = {
+  extract: 'Extracting text',
+  segment: 'Splitting sentences',
+  parse: 'Parsing requirements',
+  generate: 'Generating feature file',
+};
 
 const FileUploader = ({ onFeatureGenerated, onError }) => {
   const [file, setFile] = useState(null);
   const [fileFormat, setFileFormat] = useState('');
   const [docType, setDocType] = useState('');
   const [suggestedType, setSuggestedType] = useState(null);
+  const [documentId, setDocumentId] = useState(null);
   const [isAnalyzing, setIsAnalyzing] = useState(false);
   const [isGenerating, setIsGenerating] = useState(false);
+  const [stage, setStage] = useState(null);
 
   const onDrop = useCallback(async (acceptedFiles) => {
     const uploadedFile = acceptedFiles[0];
     if (uploadedFile) {
       setFile(uploadedFile);
+      setDocumentId(null);
       const format = uploadedFile.name.split('.').pop().toLowerCase();
       setFileFormat(format);
       
@@ -45,6 +56,7 @@ const FileUploader = ({ onFeatureGenerated, onError }) => {
         }
         
         const data = await response.json();
+        setDocumentId(data.document_id || null);
         if (data.suggested_type) {
           setSuggestedType(data.suggested_type);
           setDocType(data.suggested_type);
@@ -76,26 +88,36 @@ const FileUploader = ({ onFeatureGenerated, onError }) => {
     setIsGenerating(true);
     try {
       const formData = new FormData();
-      formData.append('file', file);
+      // Reuse the server-side extraction from /analyze instead of uploading the file again
+      if (documentId) {
+        formData.append('document_id', documentId);
+      } else {
+        formData.append('file', file);
+      }
       if (docType) {
         formData.append('doc_type', docType);
       }
 
-      const response = await fetch('/api/convert-to-feature', {
-        method: 'POST',
-        body: formData,
-      });
-
-      if (!response.ok) {
-        throw new Error('Failed to generate feature file');
+      const onProgress = (job) => setStage(job.stage);
+      let data;
+      try {
+        data = await runConversionJob(formData, onProgress);
+      } catch (error) {
+        // The cached extraction may have been evicted; fall back to a regular upload
+        if (!(error instanceof JobSubmitError && error.status === 404 && documentId)) {
+          throw error;
+        }
+        formData.delete('document_id');
+        formData.append('file', file);
+        data = await runConversionJob(formData, onProgress);
       }
 
-      const data = await response.json();
       onFeatureGenerated(data);
     } catch (error) {
       onError('Error generating feature file: ' + error.message);
     } finally {
       setIsGenerating(false);
+      setStage(null);
     }
   };
 
@@ -172,7 +194,7 @@ const FileUploader = ({ onFeatureGenerated, onError }) => {
                   {isGenerating ? (
                     <>
                       <CircularProgress size={20} sx={{ mr: 1 }} />
-                      Generating Feature File...
+                      {STAGE_LABELS[stage] || 'Queued'}...
                     </>
                   ) : (
                     'Generate Feature File'
@@ -1,4 +1,4 @@
-import React, { useState } from 'react';
+import React, { useEffect, useRef, useState } from 'react';
 import {
   Container,
   Typography,
@@ -11,8 +11,14 @@ import {
   MenuItem,
   Select,
   Grid,
+  FormControlLabel,
+  Switch,
 } from '@mui/material';
 import { Editor } from '@monaco-editor/react';
+import { runConversionJob, ConversionJob } from '../services/conversionJobs';
+import { createLiveConversion, startLiveConversion, LiveConversion } from '../services/liveConversion';
+
+const API_BASE = 'http://localhost:8000';
 
 interface FeatureContent {
   feature_content: string;
@@ -23,6 +29,32 @@ const FeatureGenerator = () => {
   const [file, setFile] = useState<File | null>(null);
   const [docType, setDocType] = useState('');
   const [featureContent, setFeatureContent] = useState<FeatureContent | null>(null);
+  const [isGenerating, setIsGenerating] = useState(false);
+  const [stage, setStage] = useState<string | null>(null);
+  const [livePreview, setLivePreview] = useState(false);
+  const [documentText, setDocumentText] = useState<string | null>(null);
+  const liveConversion = useRef<LiveConversion | null>(null);
+
+  const closeLiveConversion = () => {
+    liveConversion.current?.close().catch((error) => console.error('Error:', error));
+    liveConversion.current = null;
+  };
+
+  // End the session when the page is left
+  useEffect(() => {
+    const live = liveConversion;
+    return () => {
+      live.current?.close().catch((error) => console.error('Error:', error));
+    };
+  }, []);
+
+  const showFeature = (feature: string) =>
+    setFeatureContent((current) => ({ suggested_steps: {}, ...current, feature_content: feature }));
+
+  const handleTextChange = (event: React.ChangeEvent<HTMLInputElement | HTMLTextAreaElement>) => {
+    setDocumentText(event.target.value);
+    liveConversion.current?.update(event.target.value);
+  };
 
   const handleFileUpload = (event: React.ChangeEvent<HTMLInputElement>) => {
     if (event.target.files && event.target.files[0]) {
@@ -37,16 +69,37 @@ const FeatureGenerator = () => {
     formData.append('file', file);
     formData.append('doc_type', docType);
 
+    setIsGenerating(true);
+    closeLiveConversion();
+    setDocumentText(null);
     try {
-      const response = await fetch('http://localhost:8000/api/convert-to-feature', {
-        method: 'POST',
-        body: formData,
-      });
-
-      const data = await response.json();
+      if (livePreview) {
+        // The extracted text becomes editable; each edit patches the feature file
+        const session = await startLiveConversion(formData, API_BASE);
+        liveConversion.current = createLiveConversion(
+          session.session_id,
+          session.feature_content,
+          session.version,
+          showFeature,
+          (error) => console.error('Error:', error),
+          300,
+          API_BASE
+        );
+        setFeatureContent({ feature_content: session.feature_content, suggested_steps: {} });
+        setDocumentText(session.text);
+        return;
+      }
+      const data = await runConversionJob(
+        formData,
+        (job: ConversionJob) => setStage(job.stage),
+        API_BASE
+      );
       setFeatureContent(data);
     } catch (error) {
       console.error('Error:', error);
+    } finally {
+      setIsGenerating(false);
+      setStage(null);
     }
   };
 
@@ -89,16 +142,35 @@ const FeatureGenerator = () => {
                   </Select>
                 </FormControl>
               </Box>
+              <Box mt={2}>
+                <FormControlLabel
+                  control={<Switch checked={livePreview} onChange={(e) => setLivePreview(e.target.checked)} />}
+                  label="Live preview (edit the document text)"
+                />
+              </Box>
               <Box mt={3}>
                 <Button
                   variant="contained"
                   color="primary"
                   onClick={handleSubmit}
-                  disabled={!file || !docType}
+                  disabled={!file || !docType || isGenerating}
                 >
-                  Generate Feature File
+                  {isGenerating ? `Generating (${stage || 'queued'})...` : 'Generate Feature File'}
                 </Button>
               </Box>
+              {documentText !== null && (
+                <Box mt={3}>
+                  <TextField
+                    label="Document text"
+                    value={documentText}
+                    onChange={handleTextChange}
+                    multiline
+                    minRows={12}
+                    maxRows={24}
+                    fullWidth
+                  />
+                </Box>
+              )}
             </Paper>
           </Grid>
           <Grid item xs={12} md={6}>
@@ -111,7 +183,7 @@ const FeatureGenerator = () => {
                   <Editor
                     height="100%"
                     defaultLanguage="gherkin"
-                    defaultValue={featureContent.feature_content}
+                    value={featureContent.feature_content}
                     options={{
                       minimap: { enabled: false },
                       readOnly: false,
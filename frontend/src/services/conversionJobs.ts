@@ -0,0 +1,75 @@
+export interface ConversionJob {
+  job_id: string;
+  status: 'queued' | 'running' | 'succeeded' | 'failed';
+  stage: string | null;
+  stages: Record<string, string>;
+  error: string | null;
+  status_code: number | null;
+  events_url: string;
+  result_url: string;
+}
+
+export class JobSubmitError extends Error {
+  status: number;
+
+  constructor(status: number, message: string) {
+    super(message);
+    this.status = status;
+  }
+}
+
+const readError = async (response: Response): Promise<string> => {
+  try {
+    const data = await response.json();
+    return data.detail || response.statusText;
+  } catch {
+    return response.statusText;
+  }
+};
+
+/**
+ * Submit a conversion job, report its progress and resolve with the feature file result.
+ * formData carries the same fields as /api/convert-to-feature.
+ */
+export const runConversionJob = async (
+  formData: FormData,
+  onProgress: (job: ConversionJob) => void,
+  apiBase = ''
+): Promise<any> => {
+  const response = await fetch(`${apiBase}/api/jobs`, {
+    method: 'POST',
+    body: formData,
+  });
+  if (!response.ok) {
+    throw new JobSubmitError(response.status, await readError(response));
+  }
+
+  const submitted: ConversionJob = await response.json();
+  onProgress(submitted);
+
+  const finished = await new Promise<ConversionJob>((resolve, reject) => {
+    const events = new EventSource(`${apiBase}${submitted.events_url}`);
+    const onUpdate = (event: MessageEvent) => onProgress(JSON.parse(event.data));
+    events.addEventListener('progress', onUpdate as EventListener);
+    events.addEventListener('done', ((event: MessageEvent) => {
+      events.close();
+      resolve(JSON.parse(event.data));
+    }) as EventListener);
+    events.onerror = () => {
+      // EventSource reconnects on its own while the stream is open; give up once it is closed
+      if (events.readyState === EventSource.CLOSED) {
+        reject(new Error('Lost connection to the job progress stream'));
+      }
+    };
+  });
+
+  if (finished.status === 'failed') {
+    throw new Error(finished.error || 'Conversion failed');
+  }
+
+  const result = await fetch(`${apiBase}${finished.result_url}`);
+  if (!result.ok) {
+    throw new Error(await readError(result));
+  }
+  return result.json();
+};
@@ -0,0 +1,96 @@
+export interface FeaturePatchEdit {
+  offset: number;
+  delete: number;
+  insert: string;
+}
+
+/** Apply a session patch; offsets refer to the previous feature file, so edits go last to first. */
+export const applyFeaturePatch = (feature: string, patch: FeaturePatchEdit[]): string =>
+  patch.reduceRight(
+    (text, edit) => text.slice(0, edit.offset) + edit.insert + text.slice(edit.offset + edit.delete),
+    feature
+  );
+
+export interface LiveSession {
+  session_id: string;
+  version: number;
+  feature_content: string;
+  text: string;
+}
+
+/**
+ * Start an incremental conversion session; formData carries doc_type and a file, document_id or text.
+ * Resolves with the feature file and the document text to edit.
+ */
+export const startLiveConversion = async (formData: FormData, apiBase = ''): Promise<LiveSession> => {
+  const response = await fetch(`${apiBase}/api/conversion/sessions`, {
+    method: 'POST',
+    body: formData,
+  });
+  if (!response.ok) {
+    throw new Error(`Live preview failed to start: ${response.statusText}`);
+  }
+  return response.json();
+};
+
+/**
+ * Keep a feature file in sync with an edited document through an incremental conversion session.
+ * Call update() on every edit; requests are debounced and the patched feature is reported to onFeature.
+ */
+export const createLiveConversion = (
+  sessionId: string,
+  initialFeature: string,
+  initialVersion: number,
+  onFeature: (feature: string) => void,
+  onError: (error: Error) => void,
+  debounceMs = 300,
+  apiBase = ''
+) => {
+  let feature = initialFeature;
+  let version = initialVersion;
+  let timer: ReturnType<typeof setTimeout> | undefined;
+  let inFlight: Promise<void> = Promise.resolve();
+
+  const send = async (text: string) => {
+    const response = await fetch(`${apiBase}/api/conversion/sessions/${sessionId}`, {
+      method: 'PUT',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ text, base_version: version }),
+    });
+    if (response.status === 409) {
+      // Out of sync (e.g. another tab edited the session); reload the whole feature file
+      const current = await (await fetch(`${apiBase}/api/conversion/sessions/${sessionId}`)).json();
+      feature = current.feature_content;
+      version = current.version;
+      return send(text);
+    }
+    if (!response.ok) {
+      throw new Error(`Live preview update failed: ${response.statusText}`);
+    }
+    const data = await response.json();
+    feature = applyFeaturePatch(feature, data.patch);
+    version = data.version;
+    onFeature(feature);
+  };
+
+  return {
+    update(text: string) {
+      if (timer !== undefined) {
+        clearTimeout(timer);
+      }
+      timer = setTimeout(() => {
+        // Updates are applied in order, each against the version the previous one produced
+        inFlight = inFlight.then(() => send(text)).catch(onError);
+      }, debounceMs);
+    },
+    async close() {
+      if (timer !== undefined) {
+        clearTimeout(timer);
+      }
+      await inFlight;
+      await fetch(`${apiBase}/api/conversion/sessions/${sessionId}`, { method: 'DELETE' });
+    },
+  };
+};
+
+export type LiveConversion = ReturnType<typeof createLiveConversion>;